@@ -84,6 +84,17 @@ class ArchiveInfo:
                     self._is_dir = bool(self.info.is_directory)
         return self._is_dir  # ty: ignore[invalid-return-type]
 
+    def file_size(self) -> int:
+        """Return the uncompressed size of the member's data."""
+        match self.info:
+            case ZipInfo() | RarInfo():
+                size = self.info.file_size
+            case TarInfo():
+                size = self.info.size if self.info.isreg() else 0
+            case SevenZipInfo():
+                size = self.info.uncompressed
+        return int(size or 0)
+
     def datetime(self) -> datetime | None:
         """Return mtime as a datetime."""
         if self._dttm is None:
@@ -129,6 +140,7 @@ class ArchiveInfo:
                     info = ZipInfo(filename=filename, date_time=clamped)
                 else:
                     info = ZipInfo(filename=filename)
+                info.file_size = self.info.file_size or 0
             case _:  # TarInfo | SevenZipInfo
                 dttm = self.datetime()
                 date_time = _DATETIME_ATTRGETTER(dttm)[:6] if dttm else _ZIP_EPOCH
@@ -0,0 +1,253 @@
+"""
+Content-addressed persistent cache of optimization results.
+
+Keys hash the input bytes together with everything that decides what a
+handler's pipeline produces from them: the handler class, the input format,
+the output-affecting settings, and the probed version of every selected tool
+stage. A hit therefore stands in for re-running the pipeline on the same
+bytes — files copied between trees, re-downloaded comics, archive members
+shared across volumes.
+
+Each entry is either the optimized bytes or a "no gain" marker recording
+only the size the pipeline produced, so repeatedly finding nothing to save
+costs a hash and a lookup instead of a full optimization.
+
+Storage is an SQLite index plus a directory of blobs, shared by every worker
+process. The index tracks each blob's size and last use, and triggers keep
+a running total; once it exceeds ``cache_max_size`` the least recently used
+entries are evicted in one transaction. Last use is only rewritten once it
+is stale, so lookups from many workers don't all queue on SQLite's single
+writer lock.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import TYPE_CHECKING, BinaryIO, Final
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from picopt.path import PathInfo
+
+_DB_FILENAME: Final = "results.sqlite3"
+_BLOBS_DIRNAME: Final = "blobs"
+# Seconds a worker waits on another worker's write lock before giving up.
+_DB_TIMEOUT: Final = 30.0
+# Evict down to this fraction of the limit so a full cache doesn't evict
+# on every single insert.
+_EVICT_TARGET: Final = 0.9
+_HASH_CHUNK: Final = 1024 * 1024
+# Nominal index cost of one entry, so no-gain markers (no blob) still count
+# toward the size limit and age out like everything else.
+_ROW_SIZE: Final = 256
+# A hit only rewrites its last use time once it is older than this. LRU
+# order finer than this doesn't matter for eviction.
+_USED_RESOLUTION: Final = 60.0
+# Created in one transaction so concurrent workers never see the running
+# total without its triggers. The total is seeded from the table for caches
+# made before it existed.
+_SCHEMA: Final = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    no_gain INTEGER NOT NULL,
+    bytes_out INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals SELECT 0, COALESCE(SUM(size), 0) FROM results;
+CREATE TRIGGER IF NOT EXISTS results_insert AFTER INSERT ON results BEGIN
+    UPDATE totals SET size = size + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS results_delete AFTER DELETE ON results BEGIN
+    UPDATE totals SET size = size - OLD.size;
+END;
+CREATE TRIGGER IF NOT EXISTS results_resize AFTER UPDATE OF size ON results BEGIN
+    UPDATE totals SET size = size + NEW.size - OLD.size;
+END;
+COMMIT;
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class CachedResult:
+    """One cache entry. ``data`` is None for a "no gain" marker."""
+
+    bytes_out: int
+    data: bytes | None
+
+
+def content_digest(buffer: BinaryIO) -> str:
+    """Hash a file's bytes."""
+    digest = hashlib.sha256()
+    buffer.seek(0)
+    while chunk := buffer.read(_HASH_CHUNK):
+        digest.update(chunk)
+    buffer.seek(0)
+    return digest.hexdigest()
+
+
+def predigest(path_info: PathInfo) -> None:
+    """Hash and cache the content digest onto the PathInfo. Worker-side."""
+    if path_info.digest is None and not path_info.is_dir():
+        with path_info.fp_or_buffer() as buffer:
+            path_info.digest = content_digest(buffer)
+
+
+def result_key(content: str, parts: Iterable[str]) -> str:
+    """Hash a content digest with the strings that determine the output."""
+    digest = hashlib.sha256()
+    for part in (*parts, content):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """SQLite index plus blob directory, safe to share across processes."""
+
+    def __init__(self, cache_dir: Path, max_size: int) -> None:
+        """Open (creating if needed) the cache under ``cache_dir``."""
+        self._blobs = cache_dir / _BLOBS_DIRNAME
+        self._max_size = max_size
+        self._blobs.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(
+            cache_dir / _DB_FILENAME, timeout=_DB_TIMEOUT, isolation_level=None
+        )
+        # WAL lets readers in other workers proceed while one writes.
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def _blob_path(self, key: str) -> Path:
+        return self._blobs / key[:2] / key
+
+    def get(self, key: str) -> CachedResult | None:
+        """Return the entry for ``key`` and mark it used, or None."""
+        try:
+            return self._get(key)
+        except (OSError, sqlite3.Error) as exc:
+            # The cache is an optimization; trouble with it is never an error.
+            logger.debug(f"Result cache lookup failed: {exc}")
+            return None
+
+    def put(self, key: str, bytes_out: int, data: bytes | None) -> None:
+        """Store optimized bytes, or a no-gain marker when ``data`` is None."""
+        try:
+            self._put(key, bytes_out, data)
+        except (OSError, sqlite3.Error) as exc:
+            logger.debug(f"Result cache store failed: {exc}")
+
+    def _get(self, key: str) -> CachedResult | None:
+        row = self._db.execute(
+            "SELECT no_gain, bytes_out, used FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        no_gain, bytes_out, used = row
+        data = None
+        if not no_gain:
+            try:
+                data = self._blob_path(key).read_bytes()
+            except OSError:
+                # Evicted by another worker between lookup and read.
+                self._delete(key)
+                return None
+        if (now := time.time()) - used > _USED_RESOLUTION:
+            self._db.execute("UPDATE results SET used = ? WHERE key = ?", (now, key))
+        return CachedResult(bytes_out=bytes_out, data=data)
+
+    def _put(self, key: str, bytes_out: int, data: bytes | None) -> None:
+        size = _ROW_SIZE
+        if data is not None:
+            blob_path = self._blob_path(key)
+            blob_path.parent.mkdir(exist_ok=True)
+            # Unique temp name and an atomic replace: concurrent writers of
+            # the same key never expose a partial blob.
+            with NamedTemporaryFile(
+                dir=blob_path.parent, prefix=key, delete=False
+            ) as tmp:
+                tmp.write(data)
+            Path(tmp.name).replace(blob_path)
+            size += len(data)
+        # An upsert, not INSERT OR REPLACE: REPLACE's implicit delete
+        # wouldn't fire the trigger that keeps the running total.
+        self._db.execute(
+            "INSERT INTO results VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE"
+            " SET no_gain = excluded.no_gain, bytes_out = excluded.bytes_out,"
+            " size = excluded.size, used = excluded.used",
+            (key, data is None, bytes_out, size, time.time()),
+        )
+        self._evict()
+
+    def _delete(self, key: str) -> None:
+        self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+        with suppress(FileNotFoundError):
+            self._blob_path(key).unlink()
+
+    def _total(self) -> int:
+        (total,) = self._db.execute("SELECT size FROM totals").fetchone()
+        return total
+
+    def _evict(self) -> None:
+        """Drop least recently used entries while the cache is over its limit."""
+        if self._total() <= self._max_size:
+            return
+        keys: list[str] = []
+        blob_keys: list[str] = []
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            # Another worker may have evicted while we waited for the lock.
+            excess = self._total() - int(self._max_size * _EVICT_TARGET)
+            # Walk the used index only as far as the excess reaches, and
+            # delete exactly the rows walked: ties on used have no order.
+            rows = self._db.execute(
+                "SELECT key, no_gain, size FROM results ORDER BY used"
+            )
+            for key, no_gain, size in rows:
+                if excess <= 0:
+                    break
+                excess -= size
+                keys.append(key)
+                if not no_gain:
+                    blob_keys.append(key)
+            rows.close()
+            self._db.executemany(
+                "DELETE FROM results WHERE key = ?", ((key,) for key in keys)
+            )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        for key in blob_keys:
+            with suppress(FileNotFoundError):
+                self._blob_path(key).unlink()
+
+
+@cache
+def get_result_cache(cache_dir: str, max_size: int) -> ResultCache | None:
+    """
+    Return this process's connection to the cache, or None if unusable.
+
+    Handlers are pickled into workers, so they carry only the cache
+    settings and open the cache through here, once per process.
+    """
+    try:
+        return ResultCache(Path(cache_dir).expanduser(), max_size)
+    except (OSError, sqlite3.Error) as exc:
+        logger.warning(f"Result cache disabled, cannot open {cache_dir}: {exc}")
+        return None
@@ -394,6 +394,36 @@ def get_arguments(params: tuple[str, ...] | None = None) -> Namespace:
             "process isn't OOM-killed. 0 (default) means auto: two-thirds of RAM."
         ),
     )
+    parser.add_argument(
+        "--cache-dir",
+        action="store",
+        dest="cache_dir",
+        help=(
+            "Directory for a persistent cache of optimization results, keyed by "
+            "file contents, options and tool versions. Identical files seen "
+            "again, in any tree or archive, skip re-optimization."
+        ),
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        action="store",
+        dest="cache_max_size",
+        help=(
+            "Size limit for the result cache, e.g. 1G (default) or 512M. "
+            "Least recently used results are evicted beyond it."
+        ),
+    )
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        default=None,
+        dest="dedupe",
+        help=(
+            "Optimize files and archive members with identical contents only "
+            "once per run and reuse the result for the rest. Hardlinked files "
+            "are always optimized once and stay linked."
+        ),
+    )
     parser.add_argument(
         "-C",
         "--config",
@@ -88,9 +88,12 @@ def _build_template() -> MappingTemplate:
                 {
                     "after": Optional(float),
                     "bigger": bool,
+                    "cache_dir": Optional(str),
+                    "cache_max_size": Integer(),
                     "convert_jpeg_to_jxl": bool,
                     "convert_to": Optional(Sequence(Choice(convert_to_format_strs))),
                     "convert_webp_to_jxl": bool,
+                    "dedupe": bool,
                     "disable_programs": Sequence(str),
                     "dry_run": bool,
                     "extra_formats": Optional(Sequence(Choice(all_format_strs))),
@@ -315,6 +318,16 @@ class PicoptConfig(ConfigHandlers):
             after = time.ctime(timestamp)
             logger.info(f"Optimizing after {after}")
 
+    @staticmethod
+    def _set_cache_max_size(config: Subview) -> None:
+        """Resolve the result cache size limit (int or K/M/G/T string) to bytes."""
+        raw = config["cache_max_size"].get()
+        limit = _parse_memory_str(raw)
+        if limit is None or limit < 0:
+            msg = f"Unparseable --cache-max-size value: {raw!r}"
+            raise ConfigError(msg)
+        config["cache_max_size"].set(limit)
+
     def _set_memory_limit(self, config: Subview, *, print_summary: bool) -> None:
         """
         Resolve the memory budget (in bytes) used to throttle large archives.
@@ -445,6 +458,7 @@ class PicoptConfig(ConfigHandlers):
         self._set_ignore(config_program, print_summary=print_summary)
         self._set_after(config_program, print_summary=print_summary)
         self._set_memory_limit(config_program, print_summary=print_summary)
+        self._set_cache_max_size(config_program)
         self._set_timestamps(config_program, print_summary=print_summary)
         self.set_format_handler_map(config_program, print_summary=print_summary)
         return config
@@ -532,4 +546,7 @@ def _settings_from_attrdict(ad: Any) -> PicoptSettings:
             handler_stages=dict(computed.handler_stages),
             ignore=IgnorePatterns(case=ignore.case, ignore_case=ignore.ignore_case),
         ),
+        cache_dir=Path(ad.cache_dir) if ad.cache_dir else None,
+        cache_max_size=ad.cache_max_size,
+        dedupe=ad.dedupe,
     )
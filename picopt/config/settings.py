@@ -103,3 +103,9 @@ class PicoptSettings:
 
     # Computed (populated by config-time helpers)
     computed: ComputedSettings
+
+    # Persistent result cache; disabled without a cache_dir
+    cache_dir: Path | None = None
+    cache_max_size: int = 0
+    # Coalesce identical files within a run by content hash
+    dedupe: bool = False
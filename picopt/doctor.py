@@ -83,6 +83,41 @@ _INSTALL_HINTS: MappingProxyType[str, MappingProxyType[str, str]] = MappingProxy
                 _DNF: "dnf install unrar",
             }
         ),
+        "7zz": MappingProxyType(
+            {
+                _BREW: "brew install sevenzip",
+                _APT: "apt install 7zip",
+                _DNF: "dnf install 7zip",
+            }
+        ),
+        "7z": MappingProxyType(
+            {
+                _BREW: "brew install p7zip",
+                _APT: "apt install p7zip-full",
+                _DNF: "dnf install p7zip",
+            }
+        ),
+        "pigz": MappingProxyType(
+            {
+                _BREW: "brew install pigz",
+                _APT: "apt install pigz",
+                _DNF: "dnf install pigz",
+            }
+        ),
+        "lbzip2": MappingProxyType(
+            {
+                _BREW: "brew install lbzip2",
+                _APT: "apt install lbzip2",
+                _DNF: "dnf install lbzip2",
+            }
+        ),
+        "xz": MappingProxyType(
+            {
+                _BREW: "brew install xz",
+                _APT: "apt install xz-utils",
+                _DNF: "dnf install xz",
+            }
+        ),
         "pngout": MappingProxyType({_BREW: "brew install jonof/kenutils/pngout"}),
         "svgo": MappingProxyType(
             {
@@ -0,0 +1,203 @@
+"""
+Learned memory costs for the scheduler's admission gate.
+
+The gate charges every top-level item an estimate of the peak resident memory
+it will need. One constant multiple of the on-disk size is far too high for
+JPEGs and far too low for a highly compressed TIFF converted to PNG or a solid
+7z. Instead, workers measure the peak RSS of every job they run, the scheduler
+attributes each item's largest job peak to the item, and a per-format ratio of
+peak to on-disk size is learned from those observations.
+
+Ratios are smoothed with an asymmetric moving average that rises quickly and
+falls slowly, so one surprisingly hungry file raises the estimate at once but a
+run of lean ones only erodes it gradually, and never below the input size the
+worker must hold. With a cache dir configured the
+ratios persist across runs alongside the result cache.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import TYPE_CHECKING, Final
+
+from loguru import logger
+from typing_extensions import Self
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+    from picopt.plugins.base import Handler
+
+_FILENAME: Final = "memory_costs.json"
+# Smoothing weights for an observation above and below the current ratio.
+_ALPHA_UP: Final = 0.5
+_ALPHA_DOWN: Final = 0.1
+# Interpreter and tool start-up overhead dominates the peak of small files and
+# says nothing about how memory scales with size, so they don't teach.
+_MIN_OBSERVED_BYTES: Final = 1024 * 1024
+# A worker holds at least the input itself. A pool worker reusing heap it
+# freed earlier shows little peak growth, and lean observations like that
+# must not wear the persisted ratio down until the gate admits everything.
+_MIN_FACTOR: Final = 1.0
+
+_PROC_STATUS: Final = Path("/proc/self/status")
+_PROC_CLEAR_REFS: Final = Path("/proc/self/clear_refs")
+# Writing this to clear_refs resets the process's peak RSS (VmHWM).
+_RESET_PEAK: Final = "5"
+_KIB: Final = 1024
+# getrusage() reports ru_maxrss in bytes on macOS and KiB elsewhere.
+_MAXRSS_UNIT: Final = 1 if sys.platform == "darwin" else _KIB
+
+
+def _proc_status_bytes(field: str) -> int | None:
+    """Read one ``kB`` field of /proc/self/status."""
+    try:
+        with _PROC_STATUS.open() as status:
+            for line in status:
+                if line.startswith(field):
+                    return int(line.split()[1]) * _KIB
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _maxrss() -> int | None:
+    """Return the process's lifetime peak RSS."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+
+
+class PeakRss:
+    """
+    Measure the peak RSS a block of work adds to this process.
+
+    On Linux the kernel's high-water mark is reset on entry, so the peak is
+    the block's own. Elsewhere only a block that raises the process's lifetime
+    peak is measurable and yields a lower bound. Nested measurements defer to
+    the outermost, which resetting the peak would otherwise corrupt.
+    """
+
+    _depth: int = 0
+
+    def __init__(self) -> None:
+        """Initialize unmeasured."""
+        self.peak: int | None = None
+        self._outermost: bool = False
+        self._baseline: int | None = None
+        self._reset: bool = False
+
+    def __enter__(self) -> Self:
+        """Reset the high-water mark and record the starting RSS."""
+        self._outermost = PeakRss._depth == 0
+        PeakRss._depth += 1
+        if not self._outermost:
+            return self
+        try:
+            _PROC_CLEAR_REFS.write_text(_RESET_PEAK)
+            self._reset = True
+            self._baseline = _proc_status_bytes("VmRSS:")
+        except OSError:
+            self._baseline = _maxrss()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Record the peak above the starting RSS."""
+        PeakRss._depth -= 1
+        if not self._outermost or self._baseline is None:
+            return
+        peak = _proc_status_bytes("VmHWM:") if self._reset else _maxrss()
+        if peak is not None and peak > self._baseline:
+            self.peak = peak - self._baseline
+
+
+def cost_key(handler: Handler) -> str:
+    """Key costs by input format and output format."""
+    return f"{handler.input_file_format!r} -> {handler.OUTPUT_FORMAT_STR}"
+
+
+class MemoryCosts:
+    """Per-format ratios of peak memory to on-disk size."""
+
+    def __init__(self, default_factor: float, path: Path | None = None) -> None:
+        """Start from ``default_factor``, loading learned ratios from ``path``."""
+        self._default_factor = default_factor
+        self._path = path
+        self._factors: dict[str, float] = {}
+        self._dirty = False
+        if path is not None:
+            self._load(path)
+
+    @classmethod
+    def from_cache_dir(
+        cls, default_factor: float, cache_dir: Path | None
+    ) -> MemoryCosts:
+        """Persist in the result cache dir, or only for this run without one."""
+        path = cache_dir.expanduser() / _FILENAME if cache_dir else None
+        return cls(default_factor, path)
+
+    def _load(self, path: Path) -> None:
+        try:
+            factors = json.loads(path.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            logger.debug(f"Ignoring unreadable memory costs {path}: {exc}")
+            return
+        if isinstance(factors, dict):
+            self._factors = {
+                str(key): max(_MIN_FACTOR, float(factor))
+                for key, factor in factors.items()
+                if isinstance(factor, int | float) and factor > 0
+            }
+
+    def estimate(self, key: str, size: int) -> int:
+        """Estimate the peak memory of an item of ``size`` bytes."""
+        return int(size * self._factors.get(key, self._default_factor))
+
+    def observe(self, key: str, size: int, peak: int | None) -> None:
+        """Learn from one item's measured peak memory."""
+        if peak is None or size < _MIN_OBSERVED_BYTES:
+            return
+        observed = peak / size
+        factor = self._factors.get(key)
+        if factor is None:
+            factor = observed
+        else:
+            alpha = _ALPHA_UP if observed > factor else _ALPHA_DOWN
+            factor += alpha * (observed - factor)
+        self._factors[key] = max(_MIN_FACTOR, factor)
+        self._dirty = True
+
+    def save(self) -> None:
+        """Write learned ratios back, atomically, if anything was learned."""
+        if self._path is None or not self._dirty:
+            return
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = NamedTemporaryFile(  # noqa: SIM115
+                "w", dir=self._path.parent, prefix=_FILENAME + ".", delete=False
+            )
+        except OSError as exc:
+            logger.warning(f"Could not save memory costs {self._path}: {exc}")
+            return
+        tmp_path = Path(tmp.name)
+        try:
+            with tmp:
+                json.dump(self._factors, tmp, indent=2, sort_keys=True)
+            tmp_path.replace(self._path)
+            self._dirty = False
+        except OSError as exc:
+            logger.warning(f"Could not save memory costs {self._path}: {exc}")
+        finally:
+            tmp_path.unlink(missing_ok=True)
@@ -12,6 +12,7 @@ from rarfile import RarInfo
 
 from picopt.archiveinfo import ArchiveInfo
 from picopt.config.settings import PicoptSettings
+from picopt.shared_buffer import SharedBuffer, share
 
 _CONTAINER_PATH_DELIMITER = ":"
 _LOWERCASE_TESTNAME = ".picopt_case_sensitive_test"
@@ -60,6 +61,13 @@ class PathInfo:
     lazily; ``rename()`` invalidates the name-derived caches and
     ``set_data()`` replaces the payload — add matching invalidation if a
     new cached field depends on either.
+
+    Between processes, a large payload travels as a SharedBuffer handle
+    (see ``share_data()``); pickling then drops the in-memory copy. A payload
+    spilled to a staging file (see ``set_spill_path()``) is never held in
+    memory at all: every read goes back to the file. An unchanged archive
+    member may be left unread in its source archive entirely (see
+    ``leave_in_source()``) for the repack to copy verbatim.
     """
 
     _UNSET = object()
@@ -145,10 +153,16 @@ class PathInfo:
 
         # optionally computed
         self._data: bytes | None = data
+        self._shared: SharedBuffer | None = None
+        self._spill_path: Path | None = None
+        self._in_source: bool = False
         self._header_bytes: bytes | None = None
         # (FileFormat | None, info-Mapping) cached by unpack workers via
         # predetect_format(); None means detection has not run yet.
         self.detected: tuple | None = None
+        # Content hash cached by workers (see picopt.cache.content_digest)
+        # for in-run dedupe and result-cache keys; None means not hashed.
+        self.digest: str | None = None
 
         # always computed
         self._is_dir: bool | None = None
@@ -182,28 +196,82 @@ class PathInfo:
             self._stat_cached = True
         return self._stat
 
+    def __getstate__(self) -> dict:
+        """Pickle shared data by segment name only."""
+        state = self.__dict__.copy()
+        if self._shared is not None:
+            state["_data"] = None
+        return state
+
     def data(self) -> bytes:
         """Get the data from the file."""
+        if self._in_source:
+            msg = f"{self.full_output_name()} was left unread in its archive."
+            raise ValueError(msg)
+        if self._spill_path is not None:
+            return self._spill_path.read_bytes()
         if self._data is None:
-            if not self.path or self.path.is_dir():
+            if self._shared is not None:
+                self._data = self._shared.read()
+            elif not self.path or self.path.is_dir():
                 self._data = b""
             else:
                 with self.path.open("rb") as fp:
                     self._data = fp.read()
         return self._data
 
-    def set_data(self, data: bytes) -> None:
+    def set_data(self, data: bytes | SharedBuffer) -> None:
         """Set the data."""
-        self._data = data
+        if isinstance(data, SharedBuffer):
+            self._data, self._shared = None, data
+        else:
+            self._data, self._shared = data, None
+        self._spill_path = None
+        self._in_source = False
+        self.digest = None
+
+    def set_spill_path(self, path: Path) -> None:
+        """Read the data from a staging file instead of holding it in memory."""
+        self._data = self._shared = None
+        self._spill_path = path
+        self._bytes_in = self._header_bytes = None
+
+    def leave_in_source(self) -> None:
+        """Leave an unchanged member unread; repack copies it from the archive."""
+        self._data = self._shared = self._spill_path = None
+        self._in_source = True
+        self._bytes_in = self._header_bytes = None
+
+    def is_in_source(self) -> bool:
+        """Whether the data was left unread in the source archive."""
+        return self._in_source
+
+    def share_data(self) -> None:
+        """Move large in-memory data to shared memory. Worker-side."""
+        if self._shared is None and self._data is not None:
+            shared = share(self._data)
+            if isinstance(shared, SharedBuffer):
+                self._shared = shared
+
+    def shared_buffer(self) -> SharedBuffer | None:
+        """Return the shared memory handle for the data, if any."""
+        return self._shared
+
+    def spill_path(self) -> Path | None:
+        """Return the staging file holding the data, if any."""
+        return self._spill_path
 
     def header_bytes(self) -> bytes:
         """First _HEADER_BYTES_CACHE_SIZE bytes of the file, cached for detectors."""
         if self._header_bytes is None:
+            path = self._spill_path or self.path
             if self._data is not None:
                 self._header_bytes = self._data[:_HEADER_BYTES_CACHE_SIZE]
-            elif self.path and not self.path.is_dir():
+            elif self._shared is not None:
+                self._header_bytes = self._shared.read(_HEADER_BYTES_CACHE_SIZE)
+            elif path and not path.is_dir():
                 try:
-                    with self.path.open("rb") as fp:
+                    with path.open("rb") as fp:
                         self._header_bytes = fp.read(_HEADER_BYTES_CACHE_SIZE)
                 except OSError:
                     self._header_bytes = b""
@@ -217,22 +285,28 @@ class PathInfo:
 
     def path_or_buffer(self) -> Path | BytesIO:
         """Return a the path or the buffered data."""
-        return self.path or self._buffer()
+        return self.path or self._spill_path or self._buffer()
 
     def fp_or_buffer(self) -> BufferedReader | BytesIO:
         """Return an file pointer for chunking or buffer."""
-        if self.path:
-            return self.path.open("rb")
+        if path := self.path or self._spill_path:
+            return path.open("rb")
         return self._buffer()
 
     def bytes_in(self) -> int:
         """Return the length of the data."""
         if self._bytes_in is None:
             stat = self.stat()
-            if stat is None:
-                self._bytes_in = len(self.data())
-            else:
+            if stat is not None:
                 self._bytes_in = stat.st_size
+            elif self._spill_path is not None:
+                self._bytes_in = self._spill_path.stat().st_size
+            elif self._in_source and self.archiveinfo is not None:
+                self._bytes_in = self.archiveinfo.file_size()
+            elif self._data is None and self._shared is not None:
+                self._bytes_in = self._shared.size
+            else:
+                self._bytes_in = len(self.data())
         return self._bytes_in
 
     def mtime(self) -> float:
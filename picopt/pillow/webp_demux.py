@@ -0,0 +1,149 @@
+"""
+Split an animated WebP into its frames in one read.
+
+Walks the RIFF chunks the way :mod:`picopt.pillow.webp_lossless` does. Each
+``ANMF`` chunk becomes a standalone still WebP plus the placement and timing
+its frame parameters carry, and the ``ANIM`` chunk gives the loop count:
+https://developers.google.com/speed/webp/docs/riff_container
+
+This should be a part of Pillow.
+"""
+
+from io import BytesIO
+from struct import pack, unpack
+from typing import BinaryIO, NamedTuple
+
+from picopt.pillow.webp_lossless import (
+    _ANIM_FRAME_FOURCC,
+    _ANMF_FRAME_PARAMS_LEN,
+    _CHUNK_HEADER_LEN,
+    _RIFF_HEADER_LEN,
+)
+
+_ANIM_FOURCC = b"ANIM"
+_ALPHA_FOURCC = b"ALPH"
+_VP8X_FOURCC = b"VP8X"
+# Chunks a frame keeps; anything else inside an ANMF is unknown and dropped.
+_FRAME_DATA_FOURCCS = frozenset({_ALPHA_FOURCC, b"VP8 ", b"VP8L"})
+_VP8X_ALPHA_FLAG = 0x10
+_ANMF_DISPOSE_FLAG = 0x1
+_ANMF_NO_BLEND_FLAG = 0x2
+# ANIM: background color (4 bytes), then the loop count.
+_ANIM_LOOP_OFFSET = 4
+_ANIM_LEN = 6
+
+
+class WebPFrame(NamedTuple):
+    """One animation frame, as a still WebP and its ANMF parameters."""
+
+    data: bytes
+    duration: int
+    x_offset: int
+    y_offset: int
+    dispose: bool  # dispose to the background color after display
+    blend: bool  # alpha blend onto the canvas instead of overwriting it
+
+
+class WebPAnimation(NamedTuple):
+    """Every frame of an animated WebP and how often it loops (0 = forever)."""
+
+    frames: tuple[WebPFrame, ...]
+    loop: int
+
+
+def _uint24(data: bytes) -> int:
+    return int.from_bytes(data[:3], "little")
+
+
+def _chunk(fourcc: bytes, payload: bytes) -> bytes:
+    """Serialize a RIFF chunk, padding its payload to an even size."""
+    return fourcc + pack("<I", len(payload)) + payload + b"\x00" * (len(payload) & 1)
+
+
+def _read_chunks(input_buffer: BinaryIO, end: int) -> list[tuple[bytes, bytes]]:
+    """Read every chunk up to ``end`` as (fourcc, payload) pairs."""
+    chunks = []
+    while input_buffer.tell() + _CHUNK_HEADER_LEN <= end:
+        chunk_header = input_buffer.read(_CHUNK_HEADER_LEN)
+        if len(chunk_header) < _CHUNK_HEADER_LEN:
+            # The RIFF header declared more than the file holds.
+            msg = "Truncated WebP RIFF container"
+            raise ValueError(msg)
+        fourcc = chunk_header[:4]
+        (size,) = unpack("<I", chunk_header[4:])
+        payload = input_buffer.read(size)
+        if len(payload) < size:
+            msg = f"Truncated WebP {fourcc!r} chunk"
+            raise ValueError(msg)
+        # Chunk payloads are padded to even sizes.
+        input_buffer.seek(size & 1, 1)
+        chunks.append((fourcc, payload))
+    return chunks
+
+
+def _still_webp(width: int, height: int, chunks: list[tuple[bytes, bytes]]) -> bytes:
+    """Wrap a frame's image chunks in a RIFF container of their own."""
+    body = b"".join(
+        _chunk(fourcc, payload)
+        for fourcc, payload in chunks
+        if fourcc in _FRAME_DATA_FOURCCS
+    )
+    if any(fourcc == _ALPHA_FOURCC for fourcc, _ in chunks):
+        # A separate alpha chunk is only valid in the extended format.
+        vp8x = pack("<B3x", _VP8X_ALPHA_FLAG)
+        vp8x += (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+        body = _chunk(_VP8X_FOURCC, vp8x) + body
+    body = b"WEBP" + body
+    return b"RIFF" + pack("<I", len(body)) + body
+
+
+def _frame(payload: bytes) -> WebPFrame:
+    """Build a frame from an ANMF chunk's payload."""
+    if len(payload) < _ANMF_FRAME_PARAMS_LEN:
+        msg = "Truncated WebP ANMF chunk"
+        raise ValueError(msg)
+    params = payload[:_ANMF_FRAME_PARAMS_LEN]
+    width = _uint24(params[6:]) + 1
+    height = _uint24(params[9:]) + 1
+    flags = params[15]
+    # Parse the frame's own chunks from the rest of the payload.
+    frame_data = BytesIO(payload[_ANMF_FRAME_PARAMS_LEN:])
+    chunks = _read_chunks(frame_data, len(frame_data.getbuffer()))
+    return WebPFrame(
+        data=_still_webp(width, height, chunks),
+        duration=_uint24(params[12:]),
+        # Offsets are stored halved.
+        x_offset=_uint24(params) * 2,
+        y_offset=_uint24(params[3:]) * 2,
+        dispose=bool(flags & _ANMF_DISPOSE_FLAG),
+        blend=not flags & _ANMF_NO_BLEND_FLAG,
+    )
+
+
+def demux(input_buffer: BinaryIO) -> WebPAnimation:
+    """
+    Read an animated WebP's frames and loop count.
+
+    Leaves the buffer position at 0; the caller owns closing it.
+    """
+    input_buffer.seek(0)
+    try:
+        header = input_buffer.read(_RIFF_HEADER_LEN)
+        if (
+            len(header) < _RIFF_HEADER_LEN
+            or header[:4] != b"RIFF"
+            or header[8:12] != b"WEBP"
+        ):
+            msg = "Not a WebP RIFF container"
+            raise ValueError(msg)
+        (riff_size,) = unpack("<I", header[4:8])
+        frames = []
+        loop = 0
+        for fourcc, payload in _read_chunks(input_buffer, riff_size + 8):
+            if fourcc == _ANIM_FRAME_FOURCC:
+                frames.append(_frame(payload))
+            elif fourcc == _ANIM_FOURCC and len(payload) >= _ANIM_LEN:
+                (loop,) = unpack("<H", payload[_ANIM_LOOP_OFFSET:_ANIM_LEN])
+        return WebPAnimation(tuple(frames), loop)
+    finally:
+        input_buffer.seek(0)
@@ -20,13 +20,12 @@ from typing_extensions import override
 
 from picopt.path import PathInfo
 from picopt.plugins.base.container import ContainerHandler
+from picopt.plugins.base.format import FileFormat
 from picopt.plugins.base.image import ImageHandler
 
 if TYPE_CHECKING:
     from collections.abc import Generator, Mapping
 
-    from picopt.plugins.base.format import FileFormat
-
 ANIMATED_INFO_KEYS = ("bbox", "blend", "disposal", "duration")
 
 
@@ -46,6 +45,7 @@ class ImageAnimated(ImageHandler, ContainerHandler, ABC):  # pyright: ignore[rep
     )
     PIL2_KWARGS: MappingProxyType[str, Any] = MappingProxyType({})
     CONTAINER_TYPE: str = "Animated Image"
+    BATCH_MEMBERS: bool = True
 
     def __init__(
         self,
@@ -75,18 +75,44 @@ class ImageAnimated(ImageHandler, ContainerHandler, ABC):  # pyright: ignore[rep
                     frame_info[key] = []
                 frame_info[key].append(value)
 
+    def _frame_detected(
+        self, frame_buffer: BinaryIO, *, lossless: bool = True
+    ) -> tuple[FileFormat, dict[str, Any]]:
+        """
+        Describe a frame the way detect_format() would, without sniffing it.
+
+        We wrote the frame, so its format is known. Its info comes from the
+        header alone, as detection reads it, but with no verify() decode.
+        """
+        # Lazy import to avoid a cycle (detect_format imports the registry).
+        from picopt.walk.detect_format import extract_image_info_from_image
+
+        info: dict[str, Any] = {}
+        with Image.open(frame_buffer) as frame:
+            extract_image_info_from_image(
+                frame, info, keep_metadata=self.config.keep_metadata
+            )
+        frame_buffer.seek(0)
+        file_format = FileFormat(
+            self.PIL2_FRAME_KWARGS["format"], lossless=lossless, animated=False
+        )
+        return file_format, info
+
     def _unpack_frame(self, frame, frame_index: int, frame_info: dict) -> PathInfo:
         """Save the frame as quickly as possible to a lossless intermediate."""
         self.populate_frame_info(frame, frame_info)
         with BytesIO() as frame_buffer:
             frame.save(frame_buffer, **self.PIL2_FRAME_KWARGS)
             frame_buffer.seek(0)
-            return PathInfo(
+            detected = self._frame_detected(frame_buffer)
+            path_info = PathInfo(
                 path_info=self.path_info,
                 frame=frame_index,
                 data=frame_buffer.read(),
                 container_parents=self.path_info.container_path_history(),
             )
+        path_info.detected = detected
+        return path_info
 
     @staticmethod
     def _fix_duration(frame_info: dict, index: int) -> None:
@@ -160,7 +186,7 @@ class ImageAnimated(ImageHandler, ContainerHandler, ABC):  # pyright: ignore[rep
         info = dict(self.prepare_info(self.OUTPUT_FORMAT_STR))
         info.update(self.frame_info)
 
-        output_buffer = BytesIO()
+        output_buffer = self.open_pack_output()
         with Image.open(BytesIO(head_image_data)) as image:
             image.save(
                 output_buffer,
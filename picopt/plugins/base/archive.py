@@ -2,13 +2,16 @@
 
 from __future__ import annotations
 
+import os
+import subprocess
 from abc import ABC, abstractmethod
-from io import BytesIO
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from shutil import rmtree
+from tempfile import mkdtemp, mkstemp
+from typing import TYPE_CHECKING, Any, BinaryIO, Final
 
 from loguru import logger
-from typing_extensions import override
+from typing_extensions import Self, override
 
 from picopt.archiveinfo import ArchiveInfo
 from picopt.path import PathInfo
@@ -16,11 +19,17 @@ from picopt.plugins.base.container import ContainerHandler
 from picopt.plugins.base.handler import Handler
 
 if TYPE_CHECKING:
-    from collections.abc import Generator, Iterable
+    from collections.abc import Callable, Generator, Iterable
+    from io import BytesIO
 
     from picopt.plugins.base.format import FileFormat
     from picopt.report import ReportStats
 
+# Members at least this big are staged on disk instead of held in memory from
+# walk until repack. Under memory pressure everything but small members is.
+_SPILL_MIN_BYTES: Final = 16 * 1024 * 1024
+_SPILL_TIGHT_MIN_BYTES: Final = 64 * 1024
+
 
 class ArchiveHandler(ContainerHandler, ABC):
     """
@@ -48,6 +57,9 @@ class ArchiveHandler(ContainerHandler, ABC):
         super().__init__(*args, **kwargs)
         self._skip_path_infos: set[PathInfo] = set()
         self._convert_children = self.CONVERT_CHILDREN and self.path_info.convert
+        self._spill_dir: Path | None = None
+        self._extract_dir: Path | None = None
+        self._extract_tried: bool = False
 
     # ------------------------------------------------------------ sniffing
 
@@ -67,6 +79,10 @@ class ArchiveHandler(ContainerHandler, ABC):
     def _archive_readfile(self, archive, archiveinfo) -> bytes:
         """Read the data for one archive entry."""
 
+    def _archive_spillfile(self, archive, archiveinfo, fp: BinaryIO) -> None:
+        """Write the data for one archive entry to a file; override to stream."""
+        fp.write(self._archive_readfile(archive, archiveinfo))
+
     def _get_archive(self):
         """Open the archive for reading."""
         archive_class = type(self).ARCHIVE_CLASS
@@ -83,7 +99,7 @@ class ArchiveHandler(ContainerHandler, ABC):
 
     # ----------------------------------------------------------- packing
 
-    def _archive_for_write(self, output_buffer: BytesIO):
+    def _archive_for_write(self, output_buffer: BinaryIO):
         """Open the archive for writing; CAN_PACK handlers must override."""
         msg = f"{type(self).__name__} does not support packing"
         raise NotImplementedError(msg)
@@ -93,7 +109,8 @@ class ArchiveHandler(ContainerHandler, ABC):
         msg = f"{type(self).__name__} does not support packing"
         raise NotImplementedError(msg)
 
-    def _archive_write(self, archive) -> None:
+    def _pop_sorted_contents(self) -> list[PathInfo]:
+        """Take the optimized contents in the order to pack them."""
         # Preserve the source archive's member order (EPUB requires its
         # mimetype entry first); members without an index sort last, stably.
         contents = sorted(
@@ -101,18 +118,21 @@ class ArchiveHandler(ContainerHandler, ABC):
             key=lambda pi: (pi.archive_index is None, pi.archive_index or 0),
         )
         self._optimized_contents.clear()
-        for path_info in contents:
+        return contents
+
+    def _archive_write(self, archive) -> None:
+        for path_info in self._pop_sorted_contents():
             self._pack_info_one_file(archive, path_info)
         if self.comment:
             archive.comment = self.comment
 
     @override
-    def pack_into(self) -> BytesIO:
-        """Pack into a BytesIO and return it."""
+    def pack_into(self) -> BinaryIO:
+        """Pack into the pack output and return it."""
         if not self.CAN_PACK:
             msg = f"{type(self).__name__} is a read-only archive."
             raise NotImplementedError(msg)
-        output_buffer = BytesIO()
+        output_buffer = self.open_pack_output()
         with self._archive_for_write(output_buffer) as archive:
             self._archive_write(archive)
         return output_buffer
@@ -148,13 +168,111 @@ class ArchiveHandler(ContainerHandler, ABC):
             and skipper.is_older_than_timestamp(path_info)
         )
 
+    def _spill_min_bytes(self) -> int:
+        """Members at least this big are staged on disk."""
+        return _SPILL_TIGHT_MIN_BYTES if self._spill else _SPILL_MIN_BYTES
+
+    def _is_spill(self, path_info: PathInfo) -> bool:
+        if path_info.archiveinfo is None:
+            return False
+        return path_info.archiveinfo.file_size() >= self._spill_min_bytes()
+
+    def _get_spill_dir(self) -> Path:
+        """Create the staging dir the scheduler cleans up, once."""
+        if self._spill_dir is None:
+            self._spill_dir = Path(mkdtemp(prefix="picopt-spill-"))
+        return self._spill_dir
+
+    def _spill_member(self, archive, archiveinfo, path_info: PathInfo) -> None:
+        """Stage a member's data in a file the scheduler cleans up."""
+        if path_info.archiveinfo and (
+            path := self._extracted_path(archive, path_info.archiveinfo.filename())
+        ):
+            # Already extracted into the staging dir; use it as is.
+            path_info.set_spill_path(path)
+            return
+        fd, spill_path = mkstemp(dir=self._get_spill_dir())
+        with os.fdopen(fd, "wb") as fp:
+            self._archive_spillfile(archive, archiveinfo, fp)
+        path_info.set_spill_path(Path(spill_path))
+
+    def _is_copied_raw(self, archiveinfo: ArchiveInfo) -> bool:  # noqa: ARG002
+        """Whether repack copies an unchanged member without reading it."""
+        return False
+
+    def _bulk_extract(self, archive) -> Path | None:  # noqa: ARG002
+        """
+        Extract every member to a staging subdir at once; override to enable.
+
+        Returns None to read members from the archive one at a time.
+        """
+        return None
+
+    def _run_extractor(
+        self, name: str, args: Callable[[Path, Path], tuple[str, ...]]
+    ) -> Path | None:
+        """Run an external extractor from ``args(source, dest)`` into staging."""
+        staging_dir = self._get_spill_dir()
+        extract_dir = Path(mkdtemp(prefix=f"{name}-", dir=staging_dir))
+        source = self.path_info.path
+        is_tmp_source = source is None
+        if source is None:
+            # A nested archive only exists in memory; extractors need a file.
+            fd, tmp_path = mkstemp(suffix=self.path_info.suffix(), dir=staging_dir)
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(self.path_info.data())
+            source = Path(tmp_path)
+        try:
+            subprocess.run(  # noqa: S603
+                args(source, extract_dir),
+                check=True,
+                capture_output=True,
+                stdin=subprocess.DEVNULL,
+            )
+        except (subprocess.SubprocessError, OSError) as exc:
+            logger.debug(f"Reading {self.original_path} members one at a time: {exc}")
+            rmtree(extract_dir, ignore_errors=True)
+            return None
+        finally:
+            if is_tmp_source:
+                source.unlink(missing_ok=True)
+        return extract_dir
+
+    def _bulk_extracted(self, archive) -> Path | None:
+        """Return the bulk extraction dir, extracting on first use."""
+        if not self._extract_tried:
+            self._extract_tried = True
+            self._extract_dir = self._bulk_extract(archive)
+        return self._extract_dir
+
+    def _extracted_path(self, archive, filename: str) -> Path | None:
+        """Return a member's bulk extracted file, if there is one."""
+        if (extract_dir := self._bulk_extracted(archive)) is None:
+            return None
+        path = (extract_dir / filename).resolve()
+        if not path.is_relative_to(extract_dir.resolve()) or not path.is_file():
+            return None
+        return path
+
+    @staticmethod
+    def _read_extracted(path: Path) -> bytes:
+        """Read a bulk extracted member into memory and drop the file."""
+        data = path.read_bytes()
+        path.unlink()
+        return data
+
+    def _read_member(self, archive, archiveinfo, path_info: PathInfo) -> None:
+        if self._is_spill(path_info):
+            self._spill_member(archive, archiveinfo, path_info)
+        elif data := self._archive_readfile(archive, archiveinfo):
+            path_info.set_data(data)
+
     def _walk_one_entry(self, archive, archiveinfo, index: int):
         path_info = self._create_path_info(archiveinfo, index)
         if self._is_archive_path_skip(path_info):
             self._skip_path_infos.add(path_info)
             return None
-        if data := self._archive_readfile(archive, archiveinfo):
-            path_info.set_data(data)
+        self._read_member(archive, archiveinfo, path_info)
         return path_info
 
     def _consume_archive_timestamps(self, archive):
@@ -181,14 +299,21 @@ class ArchiveHandler(ContainerHandler, ABC):
             self._do_repack = True
         return tuple(non_treestamp_entries)
 
+    @override
+    def shard(self, count: int) -> list[Self]:
+        # Every shard spills into one staging dir the scheduler knows about
+        # before any of them has finished.
+        self._get_spill_dir()
+        return super().shard(count)
+
     def _copy_unchanged_files(self, archive) -> None:
         while self._skip_path_infos:
             path_info = self._skip_path_infos.pop()
             archiveinfo = path_info.archiveinfo
-            if archiveinfo and (
-                data := self._archive_readfile(archive, archiveinfo.info)
-            ):
-                path_info.set_data(data)
+            if archiveinfo and self._is_copied_raw(archiveinfo):
+                path_info.leave_in_source()
+            elif archiveinfo:
+                self._read_member(archive, archiveinfo.info, path_info)
             self._optimized_contents.add(path_info)
 
     @override
@@ -199,7 +324,7 @@ class ArchiveHandler(ContainerHandler, ABC):
         with self._get_archive() as archive:
             self._set_comment(archive)
             non_treestamp_entries = self._consume_archive_timestamps(archive)
-            for index, archiveinfo in enumerate(non_treestamp_entries):
+            for index, archiveinfo in self._shard_entries(non_treestamp_entries):
                 if path_info := self._walk_one_entry(archive, archiveinfo, index):
                     yield path_info
             # Always copy unchanged files: the scheduler decides
@@ -208,6 +333,11 @@ class ArchiveHandler(ContainerHandler, ABC):
             self._copy_unchanged_files(archive)
         self._walk_finish()
 
+    @override
+    def get_staging_dir(self) -> Path | None:
+        """Expose the member spill dir so the scheduler can clean it up."""
+        return self._spill_dir
+
     @override
     def hydrate_optimized_path_info(
         self,
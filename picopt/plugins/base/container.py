@@ -18,22 +18,33 @@ The new shape: every container is one class. ``CAN_PACK`` is a class flag
 that says whether ``pack_into`` and ``repack`` are real implementations or
 ``NotImplementedError``. Read-only containers (RAR) set ``CAN_PACK = False``
 and the routing layer requires them to have a ``convert`` target.
+``CAN_APPEND`` says whether ``pack_into`` can add members to an output an
+earlier ``pack_into`` left on disk, so the scheduler may write a large
+container's repack in runs as its members finish. ``CAN_SHARD`` says whether
+``walk`` can read just one slice of the members, so the scheduler may unpack
+a large container in several workers at once. ``BATCH_MEMBERS`` says the
+members are many small, uniform images (animation frames) that the scheduler
+should optimize several to a job instead of one job each.
 """
 
 from __future__ import annotations
 
+import subprocess
 from abc import ABC, abstractmethod
 from copy import copy
+from io import BytesIO
+from itertools import islice
 from typing import TYPE_CHECKING, Any, BinaryIO
 
 from loguru import logger
-from typing_extensions import override
+from typing_extensions import Self, override
 
+from picopt import WORKING_SUFFIX
 from picopt.log.reporter import Reporter
 from picopt.plugins.base.handler import Handler
 
 if TYPE_CHECKING:
-    from collections.abc import Generator
+    from collections.abc import Generator, Iterable
     from pathlib import Path
 
     from picopt.archive_stamps import ArchiveStamps
@@ -48,6 +59,10 @@ class ContainerHandler(Handler, ABC):
 
     CONTAINER_TYPE: str = "Container"
     CAN_PACK: bool = True
+    CAN_APPEND: bool = False
+    CAN_SHARD: bool = False
+    BATCH_MEMBERS: bool = False
+    CACHEABLE: bool = False
 
     def __init__(
         self,
@@ -71,6 +86,17 @@ class ContainerHandler(Handler, ABC):
         self.comment: bytes | None = comment
         self._optimized_contents: set[PathInfo] = optimized_contents or set()
         self._do_repack: bool = bool(optimized_contents)
+        # Set by the scheduler when memory is tight: stage member payloads on
+        # disk instead of holding them in memory.
+        self._spill: bool = False
+        # Set by the scheduler when earlier members are already packed into
+        # the pack output: pack_into() appends to it instead of starting over.
+        self._append: bool = False
+        # Set by the scheduler to the idle workers' share of the cores that
+        # pack_into() may compress on.
+        self._threads: int = 1
+        # Which of how many slices of the members walk() reads.
+        self._shard: tuple[int, int] = (0, 1)
 
     def _get_skipper(self) -> WalkSkipper:
         """Build the walk skipper lazily; workers rebuild after pickling."""
@@ -85,6 +111,48 @@ class ContainerHandler(Handler, ABC):
             )
         return self._skipper
 
+    def set_timestamps(self, timestamps: ArchiveStamps | None) -> None:
+        """Attach the timestamps slice to a handler built in a worker."""
+        self._timestamps = timestamps
+        self._skipper = None
+
+    def set_spill(self, *, spill: bool) -> None:
+        """Ask walk() to stage members on disk; only archives honor it."""
+        self._spill = spill
+
+    def set_append(self, *, append: bool) -> None:
+        """Ask pack_into() to append to the pack output; needs CAN_APPEND."""
+        self._append = append
+
+    def set_threads(self, *, threads: int) -> None:
+        """Let pack_into() compress on up to ``threads`` threads."""
+        self._threads = threads
+
+    def shard(self, count: int) -> list[Self]:
+        """Return ``count`` copies that each walk one slice; needs CAN_SHARD."""
+        shards = []
+        for index in range(count):
+            handler = copy(self)
+            handler._optimized_contents = set()  # noqa: SLF001
+            handler._shard = (index, count)  # noqa: SLF001
+            shards.append(handler)
+        return shards
+
+    def _shard_entries(self, entries: Iterable) -> Iterable[tuple[int, Any]]:
+        """Return this shard's contiguous slice of the entries, numbered."""
+        index, count = self._shard
+        if count == 1:
+            return enumerate(entries)
+        entries = tuple(entries)
+        start = len(entries) * index // count
+        stop = len(entries) * (index + 1) // count
+        return islice(enumerate(entries), start, stop)
+
+    def merge_shard(self, other: ContainerHandler) -> None:
+        """Take on what an earlier walk of another slice left on ``other``."""
+        self._optimized_contents.update(other.get_optimized_contents())
+        self._do_repack = self._do_repack or other.is_do_repack()
+
     # ----------------------------------------------------------- walk/unpack
 
     @abstractmethod
@@ -145,6 +213,43 @@ class ContainerHandler(Handler, ABC):
 
     # ------------------------------------------------------------- packing
 
+    def pack_output_path(self) -> Path:
+        """Return the sibling temp file a container on disk packs into."""
+        return self.final_path.with_name(self.final_path.name + WORKING_SUFFIX)
+
+    def open_pack_output(self) -> BinaryIO:
+        """
+        Open the file or buffer pack_into() writes the new container into.
+
+        A container on disk packs straight into the sibling temp file that
+        atomically replaces it, so the result is never held in memory. A
+        nested container's bytes travel back to its parent in its report,
+        so it packs into memory.
+        """
+        if self.path_info.path is None:
+            return BytesIO()
+        self.working_path = self.pack_output_path()
+        # Appending continues the output earlier appends left on disk.
+        return self.working_path.open("r+b" if self._append else "w+b")
+
+    def copy_for_append(self, path_infos: Iterable[PathInfo]) -> Self:
+        """Return a copy of this handler that packs only ``path_infos``."""
+        handler = copy(self)
+        handler._optimized_contents = set(path_infos)  # noqa: SLF001
+        return handler
+
+    def run_pack_ext(self, args: tuple[str, ...]) -> BinaryIO:
+        """Run a packer that writes the container to stdout into the output."""
+        output = self.open_pack_output()
+        if isinstance(output, BytesIO):
+            proc = subprocess.run(args, check=True, capture_output=True)  # noqa: S603
+            output.write(proc.stdout)
+        else:
+            subprocess.run(  # noqa: S603
+                args, check=True, stdout=output, stderr=subprocess.PIPE
+            )
+        return output
+
     def pack_into(self) -> BinaryIO:
         """
         Build the new packed buffer from optimized contents.
@@ -163,7 +268,13 @@ class ContainerHandler(Handler, ABC):
             raise NotImplementedError(msg)
         if self.config.verbose > 1:
             logger.info(f"Repacking {self.path_info.full_output_name()}…")
-        return self.pack_into()
+        try:
+            return self.pack_into()
+        except BaseException:
+            # Don't leave a half-written temp file beside the original.
+            if self.working_path != self.original_path:
+                self.working_path.unlink(missing_ok=True)
+            raise
 
     def __getstate__(self) -> dict[str, Any]:
         """Drop the skipper for worker handoff; it rebuilds lazily."""
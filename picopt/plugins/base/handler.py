@@ -17,9 +17,10 @@ Subclasses live in:
 from __future__ import annotations
 
 import os
+import shutil
 import subprocess
 from abc import ABC, abstractmethod
-from io import BufferedReader, BytesIO
+from io import BufferedRandom, BufferedReader, BytesIO
 from pathlib import Path
 from types import MappingProxyType
 from typing import TYPE_CHECKING, BinaryIO, Final
@@ -27,15 +28,21 @@ from typing import TYPE_CHECKING, BinaryIO, Final
 from loguru import logger
 
 from picopt import WORKING_SUFFIX
+from picopt.cache import get_result_cache, predigest, result_key
 from picopt.exceptions import print_exc_unless_expected
 from picopt.path import DOUBLE_SUFFIX, PathInfo
 from picopt.plugins.base.format import FileFormat
 from picopt.report import ReportStats
+from picopt.shared_buffer import SharedBuffer
 
 if TYPE_CHECKING:
+    from picopt.cache import ResultCache
     from picopt.config.settings import PicoptSettings
     from picopt.plugins.base.tool import Tool
 
+# First element of a dedupe key for hardlinks of one inode.
+DEDUPE_LINK: Final = "link"
+
 # Used by working-path construction for nested-container scratch files.
 _WORKING_PATH_TRANS_TABLE: Final[MappingProxyType[int, str]] = MappingProxyType(
     str.maketrans(dict.fromkeys(" /", "_"))
@@ -61,6 +68,9 @@ class Handler(ABC):
       Handlers that fail the check are simply left out of the probed
       handler map, which the routing layer already reads as "unavailable"
       and falls through.
+    - ``CACHEABLE``: whether results may be served from and stored in the
+      persistent result cache. Containers opt out: their output depends on
+      their members' results, not just their own input bytes.
     """
 
     SUFFIXES: tuple[str, ...] = ()
@@ -71,6 +81,7 @@ class Handler(ABC):
     INPUT_FILE_FORMATS: frozenset[FileFormat] = frozenset()
     PIPELINE: tuple[tuple[Tool, ...], ...] = ()
     CONFIG_ENABLED_KEY: str = ""
+    CACHEABLE: bool = True
 
     # ------------------------------------------------------------------ init
 
@@ -238,15 +249,167 @@ class Handler(ABC):
     def optimize_wrapper(self) -> ReportStats:
         """Run optimize() and convert the result into a ReportStats record."""
         try:
+            if cache := self._result_cache():
+                return self._optimize_cached(cache)
             buffer = self.optimize()
             return self._cleanup_after_optimize(buffer)
         except Exception as exc:
             print_exc_unless_expected(exc)
             return self.error(exc)
 
+    # ---------------------------------------------------------- result cache
+
+    def _result_cache(self) -> ResultCache | None:
+        """Return the persistent result cache if enabled for this handler."""
+        if not self.CACHEABLE or not self.config.cache_dir:
+            return None
+        return get_result_cache(str(self.config.cache_dir), self.config.cache_max_size)
+
+    def _output_parts(self) -> tuple[str, ...]:
+        """Everything besides the input bytes that decides the output bytes."""
+        config = self.config
+        return (
+            f"{type(self).__module__}.{type(self).__qualname__}",
+            repr(self.input_file_format),
+            *(
+                f"{type(tool).__name__}={tool.probe().version}"
+                for tool in self.selected_stages()
+            ),
+            f"bigger={config.bigger}",
+            f"keep_metadata={config.keep_metadata}",
+            f"near_lossless={config.near_lossless}",
+            f"png_max={config.png_max}",
+        )
+
+    def _result_cache_key(self) -> str:
+        """Hash the input bytes with everything that decides the output."""
+        predigest(self.path_info)
+        return result_key(self.path_info.digest or "", self._output_parts())
+
+    # ---------------------------------------------------------------- dedupe
+
+    def dedupe_key(self) -> tuple[str, ...] | None:
+        """
+        Key shared by jobs whose results are interchangeable, or None.
+
+        Hardlinks of one inode always coalesce. Identical content coalesces
+        when ``dedupe`` is on and a worker has hashed the input; files on
+        disk and archive members never mix, since one writes a file and the
+        other returns bytes.
+        """
+        if not self.CACHEABLE:
+            return None
+        if self.path_info.path is not None:
+            stat = self.path_info.stat()
+            if stat is not None and stat.st_nlink > 1:
+                inode = (str(stat.st_dev), str(stat.st_ino))
+                return (DEDUPE_LINK, *inode, *self._output_parts())
+        if self.config.dedupe and self.path_info.digest:
+            domain = "file" if self.path_info.path is not None else "member"
+            return (domain, self.path_info.digest, *self._output_parts())
+        return None
+
+    def follow_wrapper(self, source: Path, *, link: bool) -> ReportStats:
+        """
+        Adopt an identical file's already-written result.
+
+        ``source`` is the coalesced leader's final file. Hardlinks of the
+        leader's original inode are relinked to it; content duplicates get a
+        copy. Either way the new file lands via a sibling temp file and an
+        atomic replace, exactly like an optimized result.
+        """
+        try:
+            bytes_in = self.path_info.bytes_in()
+            tmp_path = self.final_path.with_name(self.final_path.name + WORKING_SUFFIX)
+            tmp_path.unlink(missing_ok=True)
+            if link:
+                os.link(source, tmp_path)
+            else:
+                shutil.copyfile(source, tmp_path)
+                with tmp_path.open("rb") as tmp_file:
+                    os.fsync(tmp_file.fileno())
+            tmp_path.replace(self.final_path)
+            self._cleanup_original_path()
+            self._preserve_stats()
+            bytes_out = self.final_path.stat().st_size
+            converted = self.original_path != self.final_path
+            if converted:
+                self.path_info.rename(self.final_path)
+            return ReportStats(
+                self.final_path,
+                converted=converted,
+                path_info=self.path_info,
+                config=self.config,
+                bytes_in=bytes_in,
+                bytes_out=bytes_out,
+                changed=True,
+            )
+        except Exception as exc:
+            print_exc_unless_expected(exc)
+            return self.error(exc)
+
+    def _optimize_cached(self, cache: ResultCache) -> ReportStats:
+        """Serve optimize() from the cache, or run it and remember the result."""
+        key = self._result_cache_key()
+        if (hit := cache.get(key)) is not None:
+            if hit.data is None:
+                return self._no_gain_report(hit.bytes_out)
+            return self._cleanup_after_optimize(BytesIO(hit.data))
+        buffer = self.optimize()
+        bytes_out = self._get_buffer_len(buffer)
+        data = None
+        if bytes_out > 0 and (
+            bytes_out < self.path_info.bytes_in() or self.config.bigger
+        ):
+            buffer.seek(0)
+            data = buffer.read()
+            buffer.seek(0)
+        cache.put(key, bytes_out, data)
+        return self._cleanup_after_optimize(buffer)
+
+    def adopt_report(self, leader: ReportStats) -> ReportStats:
+        """
+        Report an identical input's result where adopting it needs no file I/O.
+
+        Covers a leader that errored, one whose result was discarded, and
+        archive members, whose optimized bytes travel in the report itself.
+        """
+        if leader.exc is not None:
+            return ReportStats(self.original_path, exc=leader.exc)
+        if self.path_info.path is None and leader.data:
+            # Each container owns and unlinks its members' segments.
+            data = leader.data
+            if isinstance(data, SharedBuffer):
+                data = data.copy()
+            return ReportStats(
+                self.final_path,
+                converted=self.original_path != self.final_path,
+                path_info=self.path_info,
+                config=self.config,
+                bytes_in=self.path_info.bytes_in(),
+                bytes_out=leader.bytes_out,
+                data=data,
+                changed=True,
+            )
+        return self._no_gain_report(leader.bytes_out)
+
+    def _no_gain_report(self, bytes_out: int) -> ReportStats:
+        """Report a cached result that would have been discarded anyway."""
+        return ReportStats(
+            self.original_path,
+            path_info=self.path_info,
+            config=self.config,
+            bytes_in=self.path_info.bytes_in(),
+            bytes_out=bytes_out,
+        )
+
     # --------------------------------------------------------------- cleanup
 
     def _get_buffer_len(self, buffer: BinaryIO) -> int:
+        if isinstance(buffer, BufferedRandom):
+            # Packed straight into working_path.
+            buffer.flush()
+            return os.fstat(buffer.fileno()).st_size
         if isinstance(buffer, BufferedReader):
             return self.working_path.stat().st_size
         if isinstance(buffer, BytesIO):
@@ -279,6 +442,11 @@ class Handler(ABC):
                 tmp_file.flush()
                 os.fsync(tmp_file.fileno())
             self.working_path = tmp_path
+        elif isinstance(final_data_buffer, BufferedRandom):
+            # Packed straight into working_path: only durability is missing.
+            final_data_buffer.flush()
+            os.fsync(final_data_buffer.fileno())
+            final_data_buffer.close()
         self.working_path.replace(self.final_path)
 
     def _cleanup_original_path(self) -> None:
@@ -343,7 +511,7 @@ class Handler(ABC):
         if (
             self.working_path
             and self.working_path not in {self.final_path, self.original_path}
-            and isinstance(final_data_buffer, BufferedReader)
+            and isinstance(final_data_buffer, (BufferedReader, BufferedRandom))
         ):
             self.working_path.unlink(missing_ok=True)
         # A discarded (or dry-run) result leaves the original in place: no
@@ -30,12 +30,19 @@ Two sources of savings:
    renderer reads colorspace/ICC from the ``/ColorSpace`` dict, not from
    the JPEG's APP segments.
 
+   A PDF large enough to shard has its JPEGs read by several workers,
+   each opening the file and indexing one slice of its objects. Only the
+   first shard checks the whole file for signatures and compactness, and
+   a refusal there refuses every shard.
+
 2. **Structural recompression.** qpdf (via pikepdf) on save with
    ``recompress_flate=True`` and ``object_stream_mode=generate`` re-encodes
    every ``/FlateDecode`` stream at level 9 and bundles small dict objects
    into compressed object streams with a compressed xref. That handles
    content streams, font programs, XMP metadata, structure trees, and
-   Flate-encoded images all at once.
+   Flate-encoded images all at once. A PDF that already has object streams,
+   an xref stream and well deflated streams skips this rewrite unless one
+   of its JPEGs shrank, since qpdf would only reproduce it.
 
 Things deliberately not done
 ----------------------------
@@ -60,9 +67,10 @@ Refusals
 
 from __future__ import annotations
 
+import zlib
 from contextlib import suppress
 from io import BytesIO
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, BinaryIO, NamedTuple
 from zipfile import ZipInfo
 
 from loguru import logger
@@ -133,7 +141,7 @@ class PikepdfTool(InternalTool):
     module_name = "pikepdf"
 
     @override
-    def run_pack(self, handler: Handler) -> BytesIO:
+    def run_pack(self, handler: Handler) -> BinaryIO:
         if not isinstance(handler, Pdf):
             msg = "PikepdfTool only packs Pdf handlers"
             raise TypeError(msg)
@@ -148,28 +156,50 @@ _PIKEPDF_TOOL = PikepdfTool()
 # ---------------------------------------------------------------------------
 
 
-def _is_dct_filter(filt: Any) -> bool:
-    """
-    Whether a stream's ``/Filter`` resolves to a single ``/DCTDecode``.
+_DCT_FILTERS: tuple[str, ...] = ("/DCTDecode",)
+_FLATE_FILTERS: tuple[str, ...] = ("/FlateDecode",)
+_XREF_TYPE = "/XRef"
+_OBJSTM_TYPE = "/ObjStm"
+# qpdf leaves XMP metadata uncompressed so other tools can read it.
+_METADATA_TYPE = "/Metadata"
+# To check whether a PDF is already compact, recompress this many of its
+# largest Flate streams at level 9. Each may be at most this much bigger
+# than that, to allow for producers' small differences in deflate.
+_COMPACT_SAMPLE_STREAMS = 4
+_COMPACT_SLACK = 1.02
 
-    Handles bare ``Name`` and length-1 ``Array`` cases. Multi-filter arrays
-    (``[/ASCII85Decode /DCTDecode]`` and friends) are intentionally rejected:
-    rewriting only the inner JPEG bitstream while leaving the outer wrapper
-    in place is fragile and the case is vanishingly rare in modern PDFs.
-    """
-    if filt is None:
-        return False
+
+class _StreamEntry(NamedTuple):
+    """One stream object, as walk()'s pass over the objects saw it."""
+
+    objgen: tuple[int, int]
+    filters: tuple[str, ...]
+    image: bool
+    kind: str  # the stream dictionary's /Type, if any
+    length: int  # stored (encoded) bytes
+
+    def is_jpeg(self) -> bool:
+        """
+        Whether the stream is an image whose filter is a single ``/DCTDecode``.
+
+        Multi-filter arrays (``[/ASCII85Decode /DCTDecode]`` and friends) are
+        intentionally rejected: rewriting only the inner JPEG bitstream while
+        leaving the outer wrapper in place is fragile and the case is
+        vanishingly rare in modern PDFs.
+        """
+        return self.image and self.filters == _DCT_FILTERS
+
+
+def _filter_names(filt: Any) -> tuple[str, ...]:
+    """Return a stream's ``/Filter`` as a tuple of names, bare or in an array."""
     # Lazy import: keep module import working when pikepdf is missing.
     import pikepdf
 
     if isinstance(filt, pikepdf.Name):
-        return filt == pikepdf.Name.DCTDecode
+        return (str(filt),)
     if isinstance(filt, pikepdf.Array):
-        if len(filt) != 1:
-            return False
-        only = filt[0]
-        return isinstance(only, pikepdf.Name) and only == pikepdf.Name.DCTDecode
-    return False
+        return tuple(str(name) for name in filt)
+    return ()
 
 
 def _has_signature_flag(pdf: Any) -> bool:
@@ -195,25 +225,32 @@ def _has_signature_flag(pdf: Any) -> bool:
         return False
 
 
-def _has_signature_object(pdf: Any) -> bool:
+def _is_signature_object(obj: Any, pikepdf: Any) -> bool:
     """
-    Return True iff any object is a signature dictionary (``/Type /Sig``).
+    Return True iff the object is a signature dictionary (``/Type /Sig``).
 
     Catches signed PDFs from non-conforming producers that never set the
     AcroForm ``SigFlags`` bit; rewriting those would destroy the signature.
     """
-    import pikepdf
-
-    for obj in pdf.objects:
-        with suppress(Exception):
-            if obj.get(pikepdf.Name.Type, None) == pikepdf.Name.Sig:
-                return True
+    with suppress(Exception):
+        return obj.get(pikepdf.Name.Type, None) == pikepdf.Name.Sig
     return False
 
 
-def _has_signature(pdf: Any) -> bool:
-    """Return True iff the PDF appears to be digitally signed."""
-    return _has_signature_flag(pdf) or _has_signature_object(pdf)
+def _index_stream(obj: Any, pikepdf: Any) -> _StreamEntry | None:
+    """Record a stream object's filters and whether it is an image."""
+    try:
+        return _StreamEntry(
+            obj.objgen,
+            _filter_names(obj.get(pikepdf.Name.Filter)),
+            obj.get(pikepdf.Name.Subtype) == pikepdf.Name.Image,
+            str(obj.get(pikepdf.Name.Type, "")),
+            int(obj.get(pikepdf.Name.Length, 0)),
+        )
+    except Exception:
+        # One weird object should never sink the whole file.
+        logger.warning(f"Read error on PDF object {obj}, continuing.")
+        return None
 
 
 def _synthetic_zipinfo(objgen: tuple[int, int]) -> ZipInfo:
@@ -258,6 +295,8 @@ class Pdf(ContainerHandler):
     INPUT_FILE_FORMATS = frozenset({OUTPUT_FILE_FORMAT})
     CONTAINER_TYPE: str = "PDF"
     CONVERT_CHILDREN: bool = False
+    # A shard reads the embedded JPEGs of one slice of the index.
+    CAN_SHARD: bool = True
     PIPELINE: tuple[tuple[Tool, ...], ...] = ((_PIKEPDF_TOOL,),)
 
     def __init__(
@@ -278,6 +317,8 @@ class Pdf(ContainerHandler):
         # walk(), consumed during pack_into() to find which object each
         # optimized child came from.
         self._jpeg_objgen_map: dict[str, tuple[int, int]] = {}
+        # Signed or encrypted: never repack, whatever the children did.
+        self._refused: bool = False
 
     # ------------------------------------------------------------- input I/O
 
@@ -316,22 +357,87 @@ class Pdf(ContainerHandler):
         self._jpeg_objgen_map[zipinfo.filename] = objgen
         return path_info
 
-    def _walk_pdf_obj(self, obj, pikepdf) -> PathInfo | None:
-        if not isinstance(obj, pikepdf.Stream):
+    @staticmethod
+    def _index_objects(objects, pikepdf) -> tuple[_StreamEntry, ...] | None:
+        """
+        Index the stream objects in one pass, watching for signatures.
+
+        Returns None if a signature dictionary turned up. The index is
+        local to walk(): it is not worth pickling back to the scheduler.
+        """
+        index = []
+        for obj in objects:
+            if _is_signature_object(obj, pikepdf):
+                return None
+            if isinstance(obj, pikepdf.Stream) and (
+                entry := _index_stream(obj, pikepdf)
+            ):
+                index.append(entry)
+        return tuple(index)
+
+    def _scan(
+        self, pdf, pikepdf
+    ) -> tuple[tuple[_StreamEntry, ...], tuple[_StreamEntry, ...]] | None:
+        """
+        Index this shard's slice of the objects, and the rest in the first.
+
+        Returns this slice's streams and the streams _is_compact() needs,
+        or None if a signature turned up. Only the first shard scans the
+        whole file, so a sharded PDF is still scanned once.
+        """
+        shard, count = self._shard
+        if shard == 0 and _has_signature_flag(pdf):
+            return None
+        objects = pdf.objects
+        start = len(objects) * shard // count
+        stop = len(objects) * (shard + 1) // count
+        own = self._index_objects(objects[start:stop], pikepdf)
+        if own is None:
             return None
+        if shard > 0:
+            return own, ()
+        rest = self._index_objects(objects[stop:], pikepdf)
+        return None if rest is None else (own, own + rest)
+
+    @staticmethod
+    def _is_compact(pdf, index: tuple[_StreamEntry, ...]) -> bool:
+        """
+        Whether qpdf's structural rewrite would find nothing to shrink.
+
+        That takes an xref stream, object streams, every stream compressed,
+        and the largest Flate streams already deflated about as well as
+        level 9 manages.
+        """
+        kinds = {entry.kind for entry in index}
+        if _XREF_TYPE not in kinds or _OBJSTM_TYPE not in kinds:
+            return False
+        if any(not entry.filters and entry.kind != _METADATA_TYPE for entry in index):
+            return False
+        # qpdf writes the xref stream itself, with a predictor, regardless.
+        flate = sorted(
+            (e for e in index if e.filters == _FLATE_FILTERS and e.kind != _XREF_TYPE),
+            key=lambda entry: entry.length,
+            reverse=True,
+        )
+        for entry in flate[:_COMPACT_SAMPLE_STREAMS]:
+            try:
+                data = pdf.get_object(entry.objgen).read_bytes()
+            except Exception:
+                return False
+            if entry.length > len(zlib.compress(data, 9)) * _COMPACT_SLACK:
+                return False
+        return True
+
+    def _walk_jpeg(self, pdf, entry: _StreamEntry) -> PathInfo | None:
         try:
-            if obj.get(pikepdf.Name.Subtype) != pikepdf.Name.Image:
-                return None
-            if not _is_dct_filter(obj.get(pikepdf.Name.Filter)):
-                return None
-            raw = obj.read_raw_bytes()
+            raw = pdf.get_object(entry.objgen).read_raw_bytes()
         except Exception:
             # One weird object should never sink the whole file.
-            logger.warning(f"Read error on PDF object {obj}, continuing.")
+            logger.warning(f"Read error on PDF object {entry.objgen}, continuing.")
             return None
         if not raw:
             return None
-        return self._create_jpeg_path_info(obj.objgen, raw)
+        return self._create_jpeg_path_info(entry.objgen, raw)
 
     @override
     def walk(self) -> Generator[PathInfo]:
@@ -352,19 +458,23 @@ class Pdf(ContainerHandler):
             msg = f"could not open PDF {self.path_info.full_output_name()}: {exc}"
             raise OSError(msg) from exc
 
+        compact = False
         try:
-            if refuse := _has_signature(pdf):
+            import pikepdf
+
+            if refuse := (scanned := self._scan(pdf, pikepdf)) is None:
                 msg = (
                     f"{self.path_info.full_output_name()}: "
                     "PDF has a digital signature; refusing to modify."
                 )
                 logger.warning(msg)
             else:
-                import pikepdf
-
-                for obj in pdf.objects:
-                    if path_info := self._walk_pdf_obj(obj, pikepdf):
+                streams, index = scanned
+                for entry in streams:
+                    if entry.is_jpeg() and (path_info := self._walk_jpeg(pdf, entry)):
                         yield path_info
+                # The first shard decides for all; merge_shard ORs the flag.
+                compact = self._shard[0] > 0 or self._is_compact(pdf, index)
         except PasswordError:
             refuse = True
             msg = (
@@ -376,28 +486,50 @@ class Pdf(ContainerHandler):
             with suppress(Exception):
                 pdf.close()
 
-        # Force the repack pass to run unconditionally. Even a PDF with
-        # zero embedded JPEGs benefits from qpdf's Flate level-9 +
-        # object-stream + xref-stream rewrite, which is the second source
-        # of savings the handoff calls out. The framework's per-file
+        # Force the repack pass to run unless the PDF is already compact.
+        # Even a PDF with zero embedded JPEGs benefits from qpdf's Flate
+        # level-9 + object-stream + xref-stream rewrite, which is the second
+        # source of savings the handoff calls out. The framework's per-file
         # bytes_in vs bytes_out check in _cleanup_after_optimize discards
-        # the rewrite cleanly if it grew the file (common for already-
-        # optimized PDFs), so flipping this flag is safe.
-        self._do_repack = not refuse
+        # the rewrite cleanly if it grew the file, so flipping this flag is
+        # safe; skipping it for compact PDFs just saves the wasted rewrite.
+        # A JPEG that shrinks still triggers the repack.
+        self._refused = refuse
+        self._do_repack = not refuse and not compact
 
         self._walk_finish()
 
+    @override
+    def merge_shard(self, other: ContainerHandler) -> None:
+        super().merge_shard(other)
+        if isinstance(other, Pdf):
+            self._jpeg_objgen_map.update(other._jpeg_objgen_map)  # noqa: SLF001
+            self._refused = self._refused or other._refused  # noqa: SLF001
+        if self._refused:
+            # Other shards yield their JPEGs before the first one finds a
+            # signature; none of them may be written back.
+            self._optimized_contents.clear()
+            self._jpeg_objgen_map.clear()
+            self._do_repack = False
+
+    @override
+    def set_do_repack(self, *, do_repack: bool) -> None:
+        """Set the repack flag, unless walk() refused the file."""
+        super().set_do_repack(do_repack=do_repack and not self._refused)
+
     # ------------------------------------------------------------ packing
 
-    def _apply_optimized_jpeg(self, child, objgen_to_obj, pikepdf) -> int:
+    def _apply_optimized_jpeg(self, child, pdf, pikepdf) -> int:
         ai = child.archiveinfo
         if ai is None:
             return 0
         objgen = self._jpeg_objgen_map.get(ai.filename())
         if objgen is None:
             return 0
-        obj = objgen_to_obj.get(objgen)
-        if obj is None:
+        # PDF objgen tuples are stable across opens because they're part
+        # of the file's xref table, so walk()'s index finds the live object.
+        obj = pdf.get_object(objgen)
+        if not isinstance(obj, pikepdf.Stream):
             return 0
         try:
             original_raw = obj.read_raw_bytes()
@@ -430,20 +562,12 @@ class Pdf(ContainerHandler):
         import pikepdf
 
         replaced = 0
-        # Build a fast lookup of the live objects in this freshly-opened
-        # PDF. PDF objgen tuples are stable across opens because they're
-        # part of the file's xref table.
-        objgen_to_obj: dict[tuple[int, int], Any] = {}
-        for obj in pdf.objects:
-            if isinstance(obj, pikepdf.Stream):
-                objgen_to_obj[obj.objgen] = obj
-
         for child in self._optimized_contents:
-            replaced += self._apply_optimized_jpeg(child, objgen_to_obj, pikepdf)
+            replaced += self._apply_optimized_jpeg(child, pdf, pikepdf)
         return replaced
 
     @override
-    def pack_into(self) -> BytesIO:
+    def pack_into(self) -> BinaryIO:
         """
         Build the recompressed PDF.
 
@@ -457,7 +581,7 @@ class Pdf(ContainerHandler):
         pdf = self._open_input_pdf()
         try:
             self._apply_optimized_jpegs(pdf)
-            output_buffer = BytesIO()
+            output_buffer = self.open_pack_output()
             save_kwargs: dict[str, Any] = {
                 "object_stream_mode": pikepdf.ObjectStreamMode.generate,
                 "compress_streams": True,
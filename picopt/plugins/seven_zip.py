@@ -1,27 +1,35 @@
 """
 7-Zip archive plugin.
 
-Owns: SevenZip, Cb7. Uses py7zr for both reading and writing. py7zr is a
-pure-Python (with C accelerators) library, so the "tool" here is an
-:class:`InternalTool` and its presence is governed by whether py7zr is
-installed.
+Owns: SevenZip, Cb7. Prefers the 7-Zip binary (``7zz``, or p7zip's ``7z``)
+when one is installed: it extracts every member in one run and packs with
+multithreaded LZMA2. Otherwise falls back to py7zr for both reading and
+writing. py7zr is a pure-Python (with C accelerators) library, so its
+"tool" is an :class:`InternalTool` whose presence is governed by whether
+py7zr is installed.
 """
 
 from __future__ import annotations
 
-from io import BytesIO
-from sys import maxsize
+import os
+import subprocess
+from collections import deque
+from io import BufferedRandom, BytesIO
+from pathlib import Path
+from shutil import copyfile, copyfileobj
+from tempfile import TemporaryDirectory, mkstemp
 from types import MappingProxyType
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, BinaryIO, Final
 
 from py7zr import SevenZipFile, is_7zfile
 from py7zr.helpers import ArchiveTimestamp
-from py7zr.io import BytesIOFactory
+from py7zr.io import Py7zIO, WriterFactory
 from typing_extensions import override
 
 from picopt.plugins.base import (
     ArchiveHandler,
     Detector,
+    ExternalTool,
     Handler,
     InternalTool,
     Plugin,
@@ -31,16 +39,58 @@ from picopt.plugins.base import (
 from picopt.plugins.base.format import FileFormat
 
 if TYPE_CHECKING:
-    from pathlib import Path
+    from collections.abc import Callable, Iterable
 
     from picopt.path import PathInfo
 
+# Extracted members held in memory at once, in multiples of the size at which
+# a single member is staged on disk.
+_MEMORY_POOL_MEMBERS: Final = 4
+_PACK_ARGS: Final = ("-t7z", "-m0=lzma2", "-mx=9", "-mmt=on", "-scsUTF-8")
+_QUIET_ARGS: Final = ("-y", "-bso0", "-bsp0")
+_PACK_LIST_FN: Final = ".picopt-members.txt"
+_PACK_FN: Final = "packed.7z"
+
 
 # ---------------------------------------------------------------------------
-# Tool
+# Tools
 # ---------------------------------------------------------------------------
 
 
+class SevenZipTool(ExternalTool):
+    """The 7-Zip binary: ``7zz`` from 7-zip.org."""
+
+    name = "7zz"
+    binary = "7zz"
+    version_args = ()
+
+    @override
+    def parse_version(self, version: str) -> str:
+        """Parse the version from the banner 7-Zip prints without a command."""
+        for line in version.splitlines():
+            if line.startswith("7-Zip"):
+                words = line.split()[1:]
+                return next((word for word in words if word[0].isdigit()), "")
+        return ""
+
+    @override
+    def run_pack(self, handler: Handler) -> BinaryIO:
+        if not isinstance(handler, SevenZip):
+            msg = "SevenZipTool only packs SevenZip handlers"
+            raise TypeError(msg)
+        return handler.pack_into()
+
+
+class P7zipTool(SevenZipTool):
+    """The 7-Zip binary as packaged by p7zip: ``7z``."""
+
+    name = "7z"
+    binary = "7z"
+
+
+_SEVEN_ZIP_TOOLS = (SevenZipTool(), P7zipTool())
+
+
 class Py7zrTool(InternalTool):
     """The py7zr Python library."""
 
@@ -48,7 +98,7 @@ class Py7zrTool(InternalTool):
     module_name = "py7zr"
 
     @override
-    def run_pack(self, handler: Handler) -> BytesIO:
+    def run_pack(self, handler: Handler) -> BinaryIO:
         if not isinstance(handler, SevenZip):
             msg = "Py7zrTool only packs SevenZip handlers"
             raise TypeError(msg)
@@ -58,6 +108,125 @@ class Py7zrTool(InternalTool):
 _PY7ZR_TOOL = Py7zrTool()
 
 
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+
+
+class _StagedIO(Py7zIO):
+    """One extracted member: in memory until it must move to a staging file."""
+
+    def __init__(self, factory: _StagingFactory) -> None:
+        self._factory = factory
+        self._buffer: BytesIO | BufferedRandom = BytesIO()
+        self._size: int = 0
+        self.path: Path | None = None
+
+    def _spill(self, memory: BytesIO) -> None:
+        fd, path = mkstemp(dir=self._factory.staging_dir())
+        self._buffer = os.fdopen(fd, "w+b")
+        self._buffer.write(memory.getbuffer())
+        self._factory.held -= self._size
+        self.path = Path(path)
+
+    @override
+    def write(self, s: bytes | bytearray) -> int:
+        if isinstance(self._buffer, BytesIO):
+            if self._factory.is_spill(self._size + len(s)):
+                self._spill(self._buffer)
+            else:
+                self._factory.held += len(s)
+        self._size += len(s)
+        return self._buffer.write(s)
+
+    @override
+    def read(self, size: int | None = None) -> bytes:
+        return self._buffer.read(size)
+
+    @override
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._buffer.seek(offset, whence)
+
+    @override
+    def flush(self) -> None:
+        self._buffer.flush()
+
+    @override
+    def size(self) -> int:
+        return self._size
+
+    @override
+    def close(self) -> None:
+        # Staging files don't hold a descriptor once the member is complete.
+        if self.path is not None:
+            self._buffer.close()
+
+    def getvalue(self) -> bytes:
+        """Return the data, removing a staging file it no longer needs."""
+        if isinstance(self._buffer, BytesIO):
+            self._factory.held -= self._size
+            return self._buffer.getvalue()
+        if self.path is None:
+            return b""
+        data = self.path.read_bytes()
+        self.path.unlink()
+        return data
+
+
+def _member_key(info) -> tuple[str, int, int | None]:
+    return info.filename, info.uncompressed, info.crc32
+
+
+class _StagingFactory(WriterFactory):
+    """
+    Extract members into a bounded memory pool that spills to disk.
+
+    A member moves to a file in the staging dir once it grows past the
+    handler's spill threshold, or once the members still in memory would
+    exceed the pool.
+    """
+
+    def __init__(
+        self, staging_dir: Callable[[], Path], member_limit: int, infolist: Iterable
+    ) -> None:
+        self.staging_dir = staging_dir
+        self._member_limit = member_limit
+        self._pool_limit = member_limit * _MEMORY_POOL_MEMBERS
+        self.held: int = 0
+        self.products: dict[str, _StagedIO] = {}
+        # py7zr extracts a repeated name as ``name_0``, ``name_1``, ...
+        # Members are matched to those by name, size and CRC; members
+        # alike in all three hold the same bytes, so any match will do.
+        self._names: dict[tuple[str, int, int | None], deque[str]] = {}
+        seen: dict[str, int] = {}
+        for info in infolist:
+            if (count := seen.get(info.filename)) is None:
+                name, seen[info.filename] = info.filename, 0
+            else:
+                name, seen[info.filename] = f"{info.filename}_{count}", count + 1
+            self._names.setdefault(_member_key(info), deque()).append(name)
+
+    def is_spill(self, size: int) -> bool:
+        """Whether a member growing to ``size`` bytes must go to disk."""
+        return size >= self._member_limit or self.held + size > self._pool_limit
+
+    @override
+    def create(self, filename: str) -> Py7zIO:
+        product = _StagedIO(self)
+        self.products[filename] = product
+        return product
+
+    def take(self, info, *, staged: bool = False) -> _StagedIO | None:
+        """Hand out a member's product; with ``staged``, only one on disk."""
+        names = self._names.get(_member_key(info))
+        if not names or (product := self.products.get(names[0])) is None:
+            return None
+        if staged and product.path is None:
+            return None
+        del self.products[names.popleft()]
+        return product
+
+
 # ---------------------------------------------------------------------------
 # Detector
 # ---------------------------------------------------------------------------
@@ -88,10 +257,13 @@ class SevenZip(ArchiveHandler):
     """
     7-Zip container.
 
-    py7zr requires extracting through a factory rather than reading entries
-    one at a time, so this handler keeps a per-instance
-    :class:`BytesIOFactory` and asks py7zr to materialize each requested
-    entry into it on demand.
+    With the 7-Zip binary selected, the whole archive is extracted to the
+    staging dir in one run and members are read from there. py7zr requires
+    extracting through a factory rather than reading entries one at a time,
+    so without the binary this handler extracts the whole archive into a
+    per-instance :class:`_StagingFactory` on the first read and hands out
+    its products. Members that don't fit the factory's memory pool are
+    staged on disk and their children read them from there.
     """
 
     OUTPUT_FORMAT_STR: str = "7Z"
@@ -99,17 +271,16 @@ class SevenZip(ArchiveHandler):
     OUTPUT_FILE_FORMAT = FileFormat(OUTPUT_FORMAT_STR, archive=True)
     INPUT_FILE_FORMATS = frozenset({OUTPUT_FILE_FORMAT})
     ARCHIVE_CLASS = SevenZipFile
-    PIPELINE: tuple[tuple[Tool, ...], ...] = ((_PY7ZR_TOOL,),)
+    PIPELINE: tuple[tuple[Tool, ...], ...] = ((*_SEVEN_ZIP_TOOLS, _PY7ZR_TOOL),)
 
     def __init__(
         self,
         *args: Any,
         **kwargs: Any,
     ) -> None:
-        """Allocate the py7zr extraction factory."""
+        """Init the py7zr extraction factory."""
         super().__init__(*args, **kwargs)
-        self._factory: BytesIOFactory = BytesIOFactory(maxsize)
-        self._extracted: dict[str, bytes] | None = None
+        self._factory: _StagingFactory | None = None
 
     @override
     @classmethod
@@ -121,32 +292,132 @@ class SevenZip(ArchiveHandler):
     def _archive_infolist(archive):
         return archive.list()
 
+    def _external_tool(self) -> SevenZipTool | None:
+        """Return the 7-Zip binary if the config selected one over py7zr."""
+        stages = self.selected_stages()
+        if stages and isinstance(stages[0], SevenZipTool):
+            return stages[0]
+        return None
+
     @override
-    def _archive_readfile(self, archive, archiveinfo) -> bytes:
-        if archiveinfo.is_directory:
-            return b""
-        if self._extracted is None:
+    def _bulk_extract(self, archive) -> Path | None:
+        if (tool := self._external_tool()) is None:
+            return None
+        names = archive.getnames()
+        if len(set(names)) != len(names):
+            # Later duplicates would overwrite earlier ones on disk.
+            return None
+        seven_zip = tool.exec_args()
+        return self._run_extractor(
+            tool.name,
+            lambda source, dest: (
+                *seven_zip,
+                "x",
+                *_QUIET_ARGS,
+                f"-o{dest}",
+                "--",
+                str(source),
+            ),
+        )
+
+    def _extract(self, archive) -> _StagingFactory:
+        if self._factory is None:
             # Solid 7z archives decompress from the start for every
             # single-target extract — O(n^2) over members. Materialize
             # everything in one pass instead; walk() reads every member's
             # bytes anyway.
+            self._factory = _StagingFactory(
+                self._get_spill_dir, self._spill_min_bytes(), archive.list()
+            )
             archive.reset()
             archive.extract(factory=self._factory)
-            self._extracted = {
-                name: product.read() for name, product in self._factory.products.items()
-            }
-        return self._extracted.get(archiveinfo.filename, b"")
+        return self._factory
+
+    @override
+    def _archive_readfile(self, archive, archiveinfo) -> bytes:
+        if archiveinfo.is_directory:
+            return b""
+        if path := self._extracted_path(archive, archiveinfo.filename):
+            return self._read_extracted(path)
+        # Not bulk extracted, or missing from the extraction: use py7zr.
+        product = self._extract(archive).take(archiveinfo)
+        return product.getvalue() if product is not None else b""
+
+    @override
+    def _read_member(self, archive, archiveinfo, path_info: PathInfo) -> None:
+        if not archiveinfo.is_directory and self._bulk_extracted(archive) is None:
+            product = self._extract(archive).take(archiveinfo, staged=True)
+            if product is not None and product.path is not None:
+                # Already staged; the child reads it from there.
+                path_info.set_spill_path(product.path)
+                return
+        super()._read_member(archive, archiveinfo, path_info)
 
     @override
     def _walk_finish(self) -> None:
-        # Don't pickle the whole archive's bytes back with the handler;
-        # the children already carry their own data.
-        self._extracted = None
-        self._factory = BytesIOFactory(maxsize)
+        # Don't pickle extracted data back with the handler; the children
+        # already carry their own.
+        self._factory = None
         super()._walk_finish()
 
+    def _pack_external(self, tool: SevenZipTool) -> BinaryIO:
+        """Lay the members out in a temp dir and pack them with one 7-Zip run."""
+        with TemporaryDirectory(prefix="picopt-7z-") as tmp:
+            tmp_path = Path(tmp)
+            members_dir = (tmp_path / "members").resolve()
+            members_dir.mkdir()
+            names = []
+            dirs = []
+            for path_info in self._pop_sorted_contents():
+                archiveinfo = path_info.archiveinfo
+                name = archiveinfo.filename() if archiveinfo else ""
+                member_path = (members_dir / name).resolve()
+                if not name or not member_path.is_relative_to(members_dir):
+                    continue
+                if path_info.is_dir():
+                    member_path.mkdir(parents=True, exist_ok=True)
+                    dirs.append(name.rstrip("/"))
+                else:
+                    member_path.parent.mkdir(parents=True, exist_ok=True)
+                    if spill_path := path_info.spill_path():
+                        copyfile(spill_path, member_path)
+                    else:
+                        member_path.write_bytes(path_info.data())
+                    names.append(name)
+                if archiveinfo and (mtime := archiveinfo.mtime()) is not None:
+                    os.utime(member_path, (mtime, mtime))
+            # 7-Zip adds a listed dir recursively, so list only empty ones.
+            names += [name for name in dirs if not any((members_dir / name).iterdir())]
+            list_path = tmp_path / _PACK_LIST_FN
+            list_path.write_text("\n".join(names), encoding="utf-8")
+            output_path = tmp_path / _PACK_FN
+            subprocess.run(  # noqa: S603
+                (
+                    *tool.exec_args(),
+                    "a",
+                    *_QUIET_ARGS,
+                    *_PACK_ARGS,
+                    str(output_path),
+                    f"@{list_path}",
+                ),
+                check=True,
+                capture_output=True,
+                cwd=members_dir,
+                stdin=subprocess.DEVNULL,
+            )
+            output = self.open_pack_output()
+            with output_path.open("rb") as packed:
+                copyfileobj(packed, output)
+            return output
+
+    @override
+    def pack_into(self) -> BinaryIO:
+        if (tool := self._external_tool()) is not None:
+            return self._pack_external(tool)
+        return super().pack_into()
+
     @override
-    def _archive_for_write(self, output_buffer: BytesIO) -> SevenZipFile:
+    def _archive_for_write(self, output_buffer: BinaryIO) -> SevenZipFile:
         # py7zr does not expose the original archive's compression filters
         # in a way we can round-trip cleanly, so new archives use py7zr's
         # default LZMA2 settings.
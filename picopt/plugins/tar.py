@@ -2,8 +2,10 @@
 Tar-family archive plugin.
 
 Owns: Tar, TarGz, TarBz, TarXz, Cbt. Uses Python's stdlib :mod:`tarfile`
-for both reading and writing; the InternalTool here exists only for the
-doctor inventory.
+for reading and writing. The compressed variants prefer a multithreaded
+external compressor (``pigz``, ``lbzip2``, ``xz -T0``) for repacking when
+one is installed: tarfile writes an uncompressed stream into its stdin.
+The stdlib InternalTool is the fallback and the doctor inventory entry.
 
 Detector ordering matters: ``is_tarfile()`` matches plain tar *and*
 gzipped/bzipped/xzipped tar (Python's tarfile transparently
@@ -15,11 +17,14 @@ hand-maintained list inside the dispatcher.
 
 from __future__ import annotations
 
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
+from shutil import copyfileobj
 from tarfile import TarFile, TarInfo, is_tarfile
 from tarfile import open as tar_open
 from types import MappingProxyType
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, BinaryIO, Literal
 
 import filetype
 from typing_extensions import override
@@ -27,6 +32,7 @@ from typing_extensions import override
 from picopt.plugins.base import (
     ArchiveHandler,
     Detector,
+    ExternalTool,
     Handler,
     Plugin,
     Route,
@@ -53,7 +59,7 @@ class TarTool(StdLibTool):
     module_name = "tarfile"
 
     @override
-    def run_pack(self, handler: Handler) -> BytesIO:
+    def run_pack(self, handler: Handler) -> BinaryIO:
         if not isinstance(handler, Tar):
             msg = "StdlibTarTool only packs Tar handlers"
             raise TypeError(msg)
@@ -63,6 +69,54 @@ class TarTool(StdLibTool):
 _TAR_TOOL = TarTool()
 
 
+class TarCompressorTool(ExternalTool):
+    """
+    A multithreaded compressor that reads a tar stream on stdin.
+
+    Compressors that write concatenated streams (``pbzip2``) are left out:
+    tarfile's stream reader stops at the end of the first one.
+    """
+
+    compress_args: tuple[str, ...] = ()
+
+    @override
+    def run_pack(self, handler: Handler) -> BinaryIO:
+        if not isinstance(handler, Tar):
+            msg = f"{type(self).__name__} only packs Tar handlers"
+            raise TypeError(msg)
+        return handler.pack_into()
+
+
+class PigzTool(TarCompressorTool):
+    """Parallel gzip."""
+
+    name = "pigz"
+    binary = "pigz"
+    # -n: no name or timestamp in the gzip header, like reading from stdin.
+    compress_args = ("-9", "-n", "-c")
+
+
+class Lbzip2Tool(TarCompressorTool):
+    """Parallel bzip2 that writes a single bzip2 stream."""
+
+    name = "lbzip2"
+    binary = "lbzip2"
+    compress_args = ("-9", "-c")
+
+
+class XzTool(TarCompressorTool):
+    """xz with one thread per core."""
+
+    name = "xz"
+    binary = "xz"
+    compress_args = ("-9", "-T0", "-c")
+
+
+_PIGZ_TOOL = PigzTool()
+_LBZIP2_TOOL = Lbzip2Tool()
+_XZ_TOOL = XzTool()
+
+
 # ---------------------------------------------------------------------------
 # Detectors
 # ---------------------------------------------------------------------------
@@ -105,6 +159,8 @@ class Tar(ArchiveHandler):
     INPUT_FILE_FORMATS = frozenset({OUTPUT_FILE_FORMAT})
     ARCHIVE_CLASS = TarFile
     PIPELINE: tuple[tuple[Tool, ...], ...] = ((_TAR_TOOL,),)
+    # Uncompressed members can be seeked to; compressed tars override.
+    CAN_SHARD: bool = True
 
     WRITE_MODE: str = "w"
     COMPRESS_KWARGS: MappingProxyType[str, Any] = MappingProxyType({})
@@ -116,14 +172,29 @@ class Tar(ArchiveHandler):
         # disambiguation; here we only need to confirm it's tarfile-readable.
         return is_tarfile(path)
 
+    def _read_mode(self) -> Literal["r", "r|*"]:
+        """
+        Read in one forward pass unless timestamps need a look ahead.
+
+        Seeking backwards in a compressed tar restarts decompression from the
+        start. A stream reads every member, skipped or not, as it passes. A
+        timestamps file may come after the members it dates, so consuming
+        one needs random access to find it before the walk, as does a shard
+        skipping to its own slice of the members.
+        """
+        if (self.config.timestamps and self._timestamps) or self._shard[1] > 1:
+            return "r"
+        return "r|*"
+
     @override
     def _get_archive(self) -> TarFile:
         # In-archive members have no filesystem path; open from the buffer.
         target = self.path_info.path_or_buffer()
+        mode = self._read_mode()
         if isinstance(target, BytesIO):
-            archive = tar_open(fileobj=target, mode="r")  # noqa: SIM115
+            archive = tar_open(fileobj=target, mode=mode)  # noqa: SIM115
         else:
-            archive = tar_open(target, "r")  # noqa: SIM115
+            archive = tar_open(target, mode)  # noqa: SIM115
         if not archive:
             msg = f"Unknown archive type: {self.original_path}"
             raise ValueError(msg)
@@ -132,7 +203,15 @@ class Tar(ArchiveHandler):
     @override
     @staticmethod
     def _archive_infolist(archive):
-        return archive.getmembers()
+        # Members as they are read; a stream has no list up front.
+        return iter(archive)
+
+    @override
+    def _walk_one_entry(self, archive, archiveinfo, index: int):
+        path_info = super()._walk_one_entry(archive, archiveinfo, index)
+        # Read a skipped member now; a stream can't come back for it.
+        self._copy_unchanged_files(archive)
+        return path_info
 
     @override
     def _archive_readfile(self, archive, archiveinfo) -> bytes:
@@ -146,12 +225,57 @@ class Tar(ArchiveHandler):
             return buf.read()
         return b""
 
+    @override
+    def _archive_spillfile(self, archive, archiveinfo, fp: BinaryIO) -> None:
+        if archiveinfo.isreg() and (buf := archive.extractfile(archiveinfo)):
+            copyfileobj(buf, fp)
+
     @override
     def _set_comment(self, archive: TarFile) -> None:
         """Tar has no archive-level comment."""
 
+    def _external_compressor(self) -> TarCompressorTool | None:
+        """Return the external compressor if the config selected one."""
+        stages = self.selected_stages()
+        if stages and isinstance(stages[0], TarCompressorTool):
+            return stages[0]
+        return None
+
+    def _pack_external(self, tool: TarCompressorTool) -> BinaryIO:
+        """Stream an uncompressed tar through the compressor's stdin."""
+        output = self.open_pack_output()
+        with (
+            subprocess.Popen(  # noqa: S603
+                (*tool.exec_args(), *tool.compress_args),
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            ) as proc,
+            ThreadPoolExecutor(max_workers=1) as pool,
+        ):
+            if proc.stdin is None or proc.stdout is None:
+                msg = f"{tool.name} pipes were not opened"
+                raise OSError(msg)
+            # Drain stdout while writing so a full pipe can't deadlock.
+            drained = pool.submit(copyfileobj, proc.stdout, output)
+            try:
+                with tar_open(mode="w|", fileobj=proc.stdin) as archive:
+                    self._archive_write(archive)
+            finally:
+                proc.stdin.close()
+            drained.result()
+        if proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, proc.args)
+        return output
+
+    @override
+    def pack_into(self) -> BinaryIO:
+        if (tool := self._external_compressor()) is not None:
+            return self._pack_external(tool)
+        return super().pack_into()
+
     @override
-    def _archive_for_write(self, output_buffer: BytesIO) -> TarFile:
+    def _archive_for_write(self, output_buffer: BinaryIO) -> TarFile:
         return tar_open(  # pyright: ignore[reportCallIssue], # ty: ignore[no-matching-overload]
             mode=self.WRITE_MODE,  # pyright: ignore[reportArgumentType]
             fileobj=output_buffer,
@@ -178,6 +302,8 @@ class TarGz(Tar):
     SUFFIXES: tuple[str, ...] = (".tar.gz", ".tgz")
     OUTPUT_FILE_FORMAT = FileFormat(OUTPUT_FORMAT_STR, archive=True)
     INPUT_FILE_FORMATS = frozenset({OUTPUT_FILE_FORMAT})
+    PIPELINE: tuple[tuple[Tool, ...], ...] = ((_PIGZ_TOOL, _TAR_TOOL),)
+    CAN_SHARD: bool = False
     WRITE_MODE: str = "w:gz"
     COMPRESS_KWARGS: MappingProxyType[str, Any] = MappingProxyType({"compresslevel": 9})
 
@@ -189,6 +315,8 @@ class TarBz(Tar):
     SUFFIXES: tuple[str, ...] = (".tar.bz2", ".tbz")
     OUTPUT_FILE_FORMAT = FileFormat(OUTPUT_FORMAT_STR, archive=True)
     INPUT_FILE_FORMATS = frozenset({OUTPUT_FILE_FORMAT})
+    PIPELINE: tuple[tuple[Tool, ...], ...] = ((_LBZIP2_TOOL, _TAR_TOOL),)
+    CAN_SHARD: bool = False
     WRITE_MODE: str = "w:bz2"
     COMPRESS_KWARGS: MappingProxyType[str, Any] = MappingProxyType({"compresslevel": 9})
 
@@ -200,6 +328,8 @@ class TarXz(Tar):
     SUFFIXES: tuple[str, ...] = (".tar.xz", ".txz")
     OUTPUT_FILE_FORMAT = FileFormat(OUTPUT_FORMAT_STR, archive=True)
     INPUT_FILE_FORMATS = frozenset({OUTPUT_FILE_FORMAT})
+    PIPELINE: tuple[tuple[Tool, ...], ...] = ((_XZ_TOOL, _TAR_TOOL),)
+    CAN_SHARD: bool = False
     WRITE_MODE: str = "w:xz"
     COMPRESS_KWARGS: MappingProxyType[str, Any] = MappingProxyType({"preset": 9})
 
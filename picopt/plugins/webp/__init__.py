@@ -28,9 +28,9 @@ the routing layer picks the first whose tools are all available.
                                      unpack time, then ``img2webp`` packs
                                      the frame files.
 
-- :class:`WebPMuxAnimatedLossless`   container. ``webpmux -get frame``
-                                     extracts frames; ``webpmux -frame``
-                                     packs them. Only valid for animated
+- :class:`WebPMuxAnimatedLossless`   container. Frames are demuxed in
+                                     process; ``webpmux -frame`` packs
+                                     them. Only valid for animated
                                      WebP input.
 
 - :class:`PILPackWebPAnimatedLossless`
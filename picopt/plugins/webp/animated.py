@@ -2,10 +2,9 @@
 
 from __future__ import annotations
 
-import re
 import shutil
-import subprocess
 from abc import ABC
+from io import BytesIO
 from itertools import zip_longest
 from pathlib import Path
 from tempfile import mkdtemp
@@ -16,6 +15,8 @@ from loguru import logger
 from typing_extensions import override
 
 from picopt.path import PathInfo
+from picopt.pillow.webp_demux import WebPFrame, demux
+from picopt.pillow.webp_lossless import is_lossless
 from picopt.plugins.base import ImageAnimated, ImageHandler, PILSaveTool, Tool
 from picopt.plugins.base.format import FileFormat
 from picopt.plugins.gif import GifAnimated
@@ -239,21 +240,19 @@ class Img2WebPAnimatedLossless(WebPAnimatedLossless):
 
 class WebPMuxAnimatedLossless(WebPAnimatedLossless):
     """
-    Animated WebP unpacked and repacked via ``webpmux``.
+    Animated WebP unpacked in process and repacked via ``webpmux``.
 
-    Only meaningful when the input is already animated WebP — webpmux
-    can't read anything else. Both unpack and pack go through the same
-    binary; we override :meth:`walk` entirely (replacing Pillow's frame
-    iterator) and :meth:`pack_into` calls :class:`WebPMuxTool`.
+    Only meaningful when the input is already animated WebP. We override
+    :meth:`walk` entirely: :func:`picopt.pillow.webp_demux.demux` splits
+    every ANMF frame, its placement and timing, and the loop count in one
+    read of the file, so no process is spawned per frame. Only
+    :meth:`pack_into` shells out, calling :class:`WebPMuxTool`.
     """
 
     INPUT_FILE_FORMATS = frozenset({WebPAnimatedLossless.OUTPUT_FILE_FORMAT})
 
     PIPELINE: tuple[tuple[Tool, ...], ...] = ((WebPMuxTool(),),)
 
-    _DURATION_RE: re.Pattern[str] = re.compile(r"frame \d+: (\d+) ms")
-    _DEFAULT_DURATION_MS: int = 100
-
     def __init__(
         self,
         *args: Any,
@@ -261,21 +260,8 @@ class WebPMuxAnimatedLossless(WebPAnimatedLossless):
     ) -> None:
         """Initialize instance."""
         super().__init__(*args, **kwargs)
-        self._durations: dict[int, int] = {}
-
-    # ----- frame file plumbing
-    def _webpmux_exec(self) -> tuple[str, ...]:
-        """Resolve ``webpmux`` argv prefix from the probed tool instance."""
-        return self.resolved_tool(WebPMuxTool).exec_args()
-
-    def _read_durations(self, num_frames: int) -> dict[int, int]:
-        cmd = (*self._webpmux_exec(), "-info", str(self.original_path))
-        result = subprocess.run(cmd, check=True, capture_output=True)  # noqa: S603
-        text = result.stdout.decode("utf-8", errors="replace")
-        durations = self._DURATION_RE.findall(text)
-        if durations:
-            return {i: int(d) for i, d in enumerate(durations, start=1)}
-        return dict.fromkeys(range(1, num_frames + 1), self._DEFAULT_DURATION_MS)
+        self._frames: dict[int, WebPFrame] = {}
+        self._loop: int = 0
 
     # ----- walk
 
@@ -283,42 +269,33 @@ class WebPMuxAnimatedLossless(WebPAnimatedLossless):
     def walk(self) -> Generator[PathInfo]:
         if self.config.verbose > 1:
             logger.info(f"Unpacking {self.path_info.full_output_name()}…")
-        n_frames = self.info["n_frames"]
-        self._frame_index_width = len(str(n_frames))
+        with self.path_info.fp_or_buffer() as input_buffer:
+            animation = demux(input_buffer)
+        if not animation.frames:
+            msg = "No frames found — is this actually an animated WebP?"
+            raise ValueError(msg)
+        self._frame_index_width = len(str(len(animation.frames)))
         self._ensure_tmp_dir()
 
-        webpmux = self._webpmux_exec()
         container_parents = self.path_info.container_path_history()
-        extracted: list[Path] = []
-        for frame_index in range(1, n_frames + 1):
+        for frame_index, frame in enumerate(animation.frames, start=1):
             frame_path = self._frame_path(frame_index)
-            cmd = (
-                *webpmux,
-                "-get",
-                "frame",
-                str(frame_index),
-                str(self.original_path),
-                "-o",
-                str(frame_path),
-            )
-            try:
-                subprocess.run(cmd, check=True, capture_output=True)  # noqa: S603
-            except subprocess.CalledProcessError:
-                break
-            yield PathInfo(
+            frame_path.write_bytes(frame.data)
+            self._frames[frame_index] = frame
+            path_info = PathInfo(
                 path_info=self.path_info,
                 path=frame_path,
                 frame=frame_index,
                 container_parents=container_parents,
             )
-            if frame_path.exists():
-                extracted.append(frame_path)
-
-        if not extracted:
-            msg = "No frames found — is this actually an animated WebP?"
-            raise ValueError(msg)
-
-        self._durations = self._read_durations(len(extracted))
+            with BytesIO(frame.data) as frame_buffer:
+                # An animation may mix lossless and lossy frames.
+                path_info.detected = self._frame_detected(
+                    frame_buffer, lossless=is_lossless(frame_buffer)
+                )
+            yield path_info
+
+        self._loop = animation.loop
         self._do_repack = True
         self._walk_finish()
 
@@ -331,12 +308,23 @@ class WebPMuxAnimatedLossless(WebPAnimatedLossless):
         finally:
             self._cleanup_tmp_dir()
 
+    @staticmethod
+    def _frame_options(frame: WebPFrame) -> str:
+        """Format a frame's ANMF parameters as webpmux's +d+x+y+m[+-]b."""
+        blend = "+b" if frame.blend else "-b"
+        return (
+            f"+{frame.duration}+{frame.x_offset}+{frame.y_offset}"
+            f"+{int(frame.dispose)}{blend}"
+        )
+
     def webpmux_pack_args(self) -> tuple[str, ...]:
         """Args for external tool."""
         out: list[str] = []
-        for index, dur in self._durations.items():
-            out.extend(["-frame", str(self._frame_path(index)), f"+{dur}"])
-        out.extend(["-loop", "0", "-o", "-"])
+        for index, frame in self._frames.items():
+            out.extend(
+                ["-frame", str(self._frame_path(index)), self._frame_options(frame)]
+            )
+        out.extend(["-loop", str(self._loop), "-o", "-"])
         return tuple(out)
 
 
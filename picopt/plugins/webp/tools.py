@@ -13,7 +13,6 @@ formats (skipping the intermediate PNG round-trip for PPM/TIFF).
 from __future__ import annotations
 
 import os
-import subprocess
 from abc import ABC
 from io import BytesIO
 from pathlib import Path
@@ -22,7 +21,7 @@ from typing import BinaryIO
 
 from typing_extensions import override
 
-from picopt.plugins.base import ExternalTool, Handler, ToolStatus
+from picopt.plugins.base import ContainerHandler, ExternalTool, Handler, ToolStatus
 
 
 def run_disk_input_tool(
@@ -165,22 +164,19 @@ class Img2WebPTool(WebPExternalTool):
     @override
     def run_pack(self, handler: Handler) -> BinaryIO:
         img2webp_args = getattr(handler, "img2webp_args", None)
-        if img2webp_args is None:
+        if img2webp_args is None or not isinstance(handler, ContainerHandler):
             msg = f"Img2WebPTool cannot pack {type(handler).__name__}"
             raise TypeError(msg)
-        args = (*self.exec_args(), *img2webp_args())
-        proc = subprocess.run(args, check=True, capture_output=True)  # noqa: S603
-        return BytesIO(proc.stdout)
+        return handler.run_pack_ext((*self.exec_args(), *img2webp_args()))
 
 
 class WebPMuxTool(ExternalTool):
     """
-    The ``webpmux`` external animated-WebP demuxer + packer.
+    The ``webpmux`` external animated-WebP packer.
 
-    Used for both unpacking (``webpmux -get frame N``) and packing
-    (``webpmux -frame ... -loop 0``). The unpack side is invoked from the
-    handler's overridden ``walk()``; the pack side is the standard
-    ``run_pack`` entry point that the handler's ``pack_into`` calls.
+    Used for packing only (``webpmux -frame ... -loop N``), through the
+    standard ``run_pack`` entry point that the handler's ``pack_into``
+    calls. The handler's overridden ``walk()`` demuxes frames in process.
     """
 
     name = "webpmux"
@@ -190,9 +186,7 @@ class WebPMuxTool(ExternalTool):
     @override
     def run_pack(self, handler: Handler) -> BinaryIO:
         webpmux_pack_args = getattr(handler, "webpmux_pack_args", None)
-        if webpmux_pack_args is None:
+        if webpmux_pack_args is None or not isinstance(handler, ContainerHandler):
             msg = f"WebPMuxTool cannot pack {type(handler).__name__}"
             raise TypeError(msg)
-        args = (*self.exec_args(), *webpmux_pack_args())
-        proc = subprocess.run(args, check=True, capture_output=True)  # noqa: S603
-        return BytesIO(proc.stdout)
+        return handler.run_pack_ext((*self.exec_args(), *webpmux_pack_args()))
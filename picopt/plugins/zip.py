@@ -8,9 +8,16 @@ inventory.
 
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from copy import copy
+from os import SEEK_CUR
+from shutil import copyfileobj
+from struct import Struct
 from types import MappingProxyType
-from typing import TYPE_CHECKING
-from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, is_zipfile
+from typing import IO, TYPE_CHECKING, Any, BinaryIO, NamedTuple
+from zipfile import ZIP_DEFLATED, ZIP_STORED, BadZipFile, ZipFile, is_zipfile
+from zlib import DEFLATED, MAX_WBITS, Z_DEFAULT_COMPRESSION, compressobj, crc32
 
 from typing_extensions import override
 
@@ -29,10 +36,11 @@ from picopt.plugins.seven_zip import Cb7, SevenZip
 from picopt.plugins.tar import Cbt, Tar, TarBz, TarGz, TarXz
 
 if TYPE_CHECKING:
-    from io import BytesIO
+    from io import BufferedReader, BytesIO
     from pathlib import Path
     from zipfile import ZipInfo
 
+    from picopt.archiveinfo import ArchiveInfo
     from picopt.path import PathInfo
 
 # Already-compressed formats gain nothing from deflate; store them.
@@ -40,6 +48,25 @@ _INCOMPRESSIBLE_SUFFIXES = frozenset(
     {".avif", ".gif", ".jpeg", ".jpg", ".jxl", ".png", ".webp"}
 )
 _UTF8_FLAG_BIT = 0x800
+_ENCRYPTED_FLAG_BIT = 0x1
+_DATA_DESCRIPTOR_FLAG_BIT = 0x8
+# Local file header: signature, versions, flags, method, time, date, crc,
+# sizes, then the name and extra field lengths.
+_LOCAL_HEADER = Struct("<4s5H3L2H")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+_COPY_CHUNK_SIZE = 1024 * 1024
+_DEFAULT_EXTERNAL_ATTR = 0o600 << 16  # ?rw-------
+# Members deflated ahead of the write, per thread.
+_DEFLATE_WINDOW = 2
+
+
+class _Member(NamedTuple):
+    """A member planned for the repack."""
+
+    path_info: PathInfo
+    zipinfo: ZipInfo
+    raw: bool = False
+    deflated: Future[tuple[int, int, bytes]] | None = None
 
 
 def _fix_zip_filename_encoding(zipinfo: ZipInfo) -> None:
@@ -68,6 +95,42 @@ def _is_incompressible(filename: str) -> bool:
     return suffix in _INCOMPRESSIBLE_SUFFIXES
 
 
+def _is_unchanged(path_info: PathInfo, zipinfo: ZipInfo) -> bool:
+    """Whether a member still holds the bytes the source archive has."""
+    if path_info.is_in_source():
+        return True
+    if path_info.bytes_in() != zipinfo.file_size:
+        return False
+    return crc32(path_info.data()) == zipinfo.CRC
+
+
+def _deflate(data: bytes) -> tuple[int, int, bytes]:
+    """Deflate one member's data as writestr() would for its ZipInfo."""
+    compressor = compressobj(Z_DEFAULT_COMPRESSION, DEFLATED, -MAX_WBITS)
+    return len(data), crc32(data), compressor.compress(data) + compressor.flush()
+
+
+def _copy_payload(
+    source: BufferedReader | BytesIO, zipinfo: ZipInfo, dest: IO[bytes]
+) -> None:
+    """Copy a member's compressed payload from the source archive, undecoded."""
+    source.seek(zipinfo.header_offset)
+    header = source.read(_LOCAL_HEADER.size)
+    fields = _LOCAL_HEADER.unpack(header) if len(header) == _LOCAL_HEADER.size else ()
+    if not fields or fields[0] != _LOCAL_HEADER_SIGNATURE:
+        msg = f"Bad local file header for {zipinfo.filename}"
+        raise BadZipFile(msg)
+    source.seek(fields[-2] + fields[-1], SEEK_CUR)
+    remaining = zipinfo.compress_size
+    while remaining:
+        chunk = source.read(min(remaining, _COPY_CHUNK_SIZE))
+        if not chunk:
+            msg = f"Truncated data for {zipinfo.filename}"
+            raise BadZipFile(msg)
+        dest.write(chunk)
+        remaining -= len(chunk)
+
+
 # ---------------------------------------------------------------------------
 # Tool (always-available stdlib zipfile)
 # ---------------------------------------------------------------------------
@@ -80,7 +143,7 @@ class ZipTool(StdLibTool):
     module_name = "zipfile"
 
     @override
-    def run_pack(self, handler: Handler) -> BytesIO:
+    def run_pack(self, handler: Handler) -> BinaryIO:
         if not isinstance(handler, Zip):
             msg = "StdlibZipTool only packs Zip handlers"
             raise TypeError(msg)
@@ -125,6 +188,13 @@ class Zip(ArchiveHandler):
     INPUT_FILE_FORMATS = frozenset({OUTPUT_FILE_FORMAT})
     ARCHIVE_CLASS = ZipFile
     PIPELINE: tuple[tuple[Tool, ...], ...] = ((_ZIP_TOOL,),)
+    CAN_APPEND: bool = True
+    CAN_SHARD: bool = True
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Init the source handle unchanged members are copied from."""
+        super().__init__(*args, **kwargs)
+        self._source: BufferedReader | BytesIO | None = None
 
     @override
     @classmethod
@@ -140,29 +210,136 @@ class Zip(ArchiveHandler):
     def _archive_readfile(self, archive, archiveinfo):
         return archive.read(archiveinfo.filename)
 
+    @override
+    def _archive_spillfile(self, archive, archiveinfo, fp: BinaryIO) -> None:
+        with archive.open(archiveinfo.filename) as member:
+            copyfileobj(member, fp)
+
     @override
     def _set_comment(self, archive) -> None:
         if archive.comment:
             self.comment = archive.comment
 
     @override
-    def _archive_for_write(self, output_buffer: BytesIO) -> ZipFile:
-        return ZipFile(output_buffer, "x", compression=ZIP_DEFLATED, compresslevel=9)
+    def _archive_for_write(self, output_buffer: BinaryIO) -> ZipFile:
+        # Appending rewrites the central directory after the new members.
+        mode = "a" if self._append else "x"
+        return ZipFile(output_buffer, mode, compression=ZIP_DEFLATED, compresslevel=9)
 
-    @override
-    def _pack_info_one_file(self, archive, path_info) -> None:
-        archiveinfo = path_info.archiveinfo
-        zipinfo = archiveinfo.to_zipinfo()
-        _fix_zip_filename_encoding(zipinfo)
+    def _compress_type(self, archiveinfo: ArchiveInfo, zipinfo: ZipInfo) -> int:
         if not archiveinfo.is_native_zipinfo or (
             not self.config.keep_metadata and zipinfo.compress_type == ZIP_STORED
         ):
             # Converted from another archive format (or stripping metadata):
             # choose compression by content instead of the ZipInfo default.
-            zipinfo.compress_type = (
-                ZIP_STORED if _is_incompressible(zipinfo.filename) else ZIP_DEFLATED
-            )
-        archive.writestr(zipinfo, path_info.data())
+            return ZIP_STORED if _is_incompressible(zipinfo.filename) else ZIP_DEFLATED
+        return zipinfo.compress_type
+
+    @override
+    def _is_copied_raw(self, archiveinfo: ArchiveInfo) -> bool:
+        if not archiveinfo.is_native_zipinfo:
+            return False
+        zipinfo = archiveinfo.to_zipinfo()
+        return not (
+            zipinfo.flag_bits & _ENCRYPTED_FLAG_BIT
+        ) and zipinfo.compress_type == self._compress_type(archiveinfo, zipinfo)
+
+    def _write_compressed(
+        self, archive: ZipFile, zipinfo: ZipInfo, payload: bytes | None
+    ) -> None:
+        """
+        Write a member whose payload is already compressed.
+
+        zipfile has no public way to add compressed bytes, so this does what
+        writestr() does around them: a local header from the ZipInfo, which
+        already holds the CRC and sizes, the payload, then the central
+        directory bookkeeping. A None payload is copied verbatim from the
+        source archive.
+        """
+        dest = archive.fp
+        if dest is None:
+            msg = "Attempt to write to ZIP archive that was already closed"
+            raise ValueError(msg)
+        source_info = copy(zipinfo)
+        # The sizes go in the local header, not a trailing data descriptor.
+        zipinfo.flag_bits &= ~_DATA_DESCRIPTOR_FLAG_BIT
+        dest.seek(archive.start_dir)
+        zipinfo.header_offset = dest.tell()
+        archive._writecheck(zipinfo)  # noqa: SLF001
+        archive._didModify = True  # noqa: SLF001
+        dest.write(zipinfo.FileHeader())
+        if payload is not None:
+            dest.write(payload)
+        else:
+            if self._source is None:
+                self._source = self.path_info.fp_or_buffer()
+            _copy_payload(self._source, source_info, dest)
+        archive.start_dir = dest.tell()
+        archive.filelist.append(zipinfo)
+        archive.NameToInfo[zipinfo.filename] = zipinfo
+
+    def _plan_member(
+        self, path_info: PathInfo, pool: ThreadPoolExecutor | None = None
+    ) -> _Member:
+        """Decide how to write a member, starting its deflate on ``pool``."""
+        archiveinfo = path_info.archiveinfo
+        if archiveinfo is None:
+            msg = f"{path_info.full_output_name()} is not an archive member."
+            raise ValueError(msg)
+        zipinfo = archiveinfo.to_zipinfo()
+        _fix_zip_filename_encoding(zipinfo)
+        if self._is_copied_raw(archiveinfo) and _is_unchanged(path_info, zipinfo):
+            return _Member(path_info, zipinfo, raw=True)
+        zipinfo.compress_type = self._compress_type(archiveinfo, zipinfo)
+        deflated = None
+        if pool is not None and zipinfo.compress_type == ZIP_DEFLATED:
+            deflated = pool.submit(_deflate, path_info.data())
+        return _Member(path_info, zipinfo, deflated=deflated)
+
+    def _write_member(self, archive: ZipFile, member: _Member) -> None:
+        zipinfo = member.zipinfo
+        if member.raw:
+            self._write_compressed(archive, zipinfo, None)
+        elif member.deflated is not None:
+            zipinfo.file_size, zipinfo.CRC, payload = member.deflated.result()
+            zipinfo.compress_size = len(payload)
+            # As writestr() would set them.
+            zipinfo.flag_bits = 0
+            if not zipinfo.external_attr:
+                zipinfo.external_attr = _DEFAULT_EXTERNAL_ATTR
+            self._write_compressed(archive, zipinfo, payload)
+        else:
+            archive.writestr(zipinfo, member.path_info.data())
+
+    @override
+    def _pack_info_one_file(self, archive, path_info) -> None:
+        self._write_member(archive, self._plan_member(path_info))
+
+    @override
+    def _archive_write(self, archive) -> None:
+        """
+        Deflate members concurrently, writing them in archive order.
+
+        zlib releases the GIL, so threads compress on the idle workers' cores
+        the scheduler granted this repack. A window of members per thread
+        bounds how much data is held ahead of the write.
+        """
+        threads = self._threads
+        pending: deque[_Member] = deque()
+        try:
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                for path_info in self._pop_sorted_contents():
+                    pending.append(self._plan_member(path_info, pool))
+                    if len(pending) > threads * _DEFLATE_WINDOW:
+                        self._write_member(archive, pending.popleft())
+                while pending:
+                    self._write_member(archive, pending.popleft())
+        finally:
+            if self._source is not None:
+                self._source.close()
+                self._source = None
+        if self.comment:
+            archive.comment = self.comment
 
 
 class Cbz(Zip):
@@ -12,6 +12,7 @@ if TYPE_CHECKING:
 
     from picopt.config.settings import PicoptSettings
     from picopt.path import PathInfo
+    from picopt.shared_buffer import SharedBuffer
 
 
 class ReportStats:
@@ -26,7 +27,7 @@ class ReportStats:
         bytes_in: int = 0,
         bytes_out: int = 0,
         exc: BaseException | None = None,
-        data: bytes = b"",
+        data: bytes | SharedBuffer = b"",
         config: PicoptSettings | None = None,
         path_info: PathInfo | None = None,
         converted: bool = False,
@@ -37,7 +38,9 @@ class ReportStats:
         self.bytes_in: int = bytes_in
         self.bytes_out: int = bytes_out
         self.exc: BaseException | None = exc
-        self.data: bytes = data
+        # Optimized bytes of an in-container entry; a SharedBuffer once a
+        # worker has moved them to shared memory for the trip back.
+        self.data: bytes | SharedBuffer = data
         self.changed: bool = changed
         # Don't store these large data structs, just tidbits.
         self.bigger: bool = config.bigger if config else False
@@ -46,6 +49,8 @@ class ReportStats:
         self._full_name: str = path_info.full_output_name() if path_info else str(path)
         self.saved: int = self.bytes_in - self.bytes_out
         self.converted: bool = converted
+        # Peak memory the worker's job added, when measurable.
+        self.peak_rss: int | None = None
 
     def _new_percent_saved(self) -> str:
         """Spit out how much space the optimization saved."""
@@ -0,0 +1,113 @@
+"""
+Shared memory transport for member and frame bytes.
+
+Archive members, animation frames and their optimized results cross between
+processes several times: unpack worker → scheduler → leaf worker → scheduler
+→ repack worker. Pickling the bytes each way costs pipe traffic and a copy in
+the scheduler process for every member of every archive in flight.
+
+A SharedBuffer instead parks the bytes in a named shared memory segment once,
+in the worker that produced them, and pickles as just the segment's name and
+size. Consumers read the segment directly. The scheduler owns segment
+lifetimes: it unlinks a container's segments alongside its staging cleanup.
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Final
+
+from loguru import logger
+
+# Payloads smaller than this pickle faster than a segment can be created,
+# mapped and unlinked.
+SHARE_THRESHOLD: Final = 64 * 1024
+# Segments outlive the worker that creates them, so the resource tracker,
+# which unlinks a process's "leaked" segments, must stay out of the way.
+_UNTRACKED: Final = sys.version_info >= (3, 13)
+_TRACKER_TYPE: Final = "shared_memory"
+
+
+def _open(name: str | None = None, size: int = 0) -> SharedMemory:
+    """Create or attach to a segment the resource tracker doesn't know about."""
+    if _UNTRACKED:
+        return SharedMemory(name, create=name is None, size=size, track=False)
+    shm = SharedMemory(name, create=name is None, size=size)
+    resource_tracker.unregister(shm._name, _TRACKER_TYPE)  # noqa: SLF001
+    return shm
+
+
+@dataclass(frozen=True, slots=True)
+class SharedBuffer:
+    """Handle to bytes in a named shared memory segment."""
+
+    name: str
+    size: int
+
+    @classmethod
+    def create(cls, data: bytes | memoryview) -> SharedBuffer:
+        """Copy ``data`` into a new segment."""
+        size = len(data)
+        shm = _open(size=size)
+        try:
+            shm.buf[:size] = data
+        except BaseException:
+            shm.close()
+            _unlink(shm)
+            raise
+        shm.close()
+        return cls(shm.name, size)
+
+    def __len__(self) -> int:
+        """Return the size of the bytes, so empty buffers are falsy like bytes."""
+        return self.size
+
+    def read(self, length: int | None = None) -> bytes:
+        """Copy the bytes, or just the first ``length`` of them, out."""
+        end = self.size if length is None else min(length, self.size)
+        shm = _open(self.name)
+        try:
+            with shm.buf[:end] as view:
+                return bytes(view)
+        finally:
+            shm.close()
+
+    def copy(self) -> SharedBuffer:
+        """Copy into a new segment with its own lifetime."""
+        shm = _open(self.name)
+        try:
+            with shm.buf[: self.size] as view:
+                return self.create(view)
+        finally:
+            shm.close()
+
+    def unlink(self) -> None:
+        """Destroy the segment. Processes that still have it mapped keep it."""
+        try:
+            shm = _open(self.name)
+        except FileNotFoundError:
+            return
+        shm.close()
+        _unlink(shm)
+
+
+def _unlink(shm: SharedMemory) -> None:
+    if not _UNTRACKED:
+        # unlink() unregisters, which must balance a registration.
+        resource_tracker.register(shm._name, _TRACKER_TYPE)  # noqa: SLF001
+    shm.unlink()
+
+
+def share(data: bytes | SharedBuffer) -> bytes | SharedBuffer:
+    """Move large ``data`` into shared memory for the trip between processes."""
+    if isinstance(data, SharedBuffer) or len(data) < SHARE_THRESHOLD:
+        return data
+    try:
+        return SharedBuffer.create(data)
+    except OSError as exc:
+        # Out of shared memory just means pickling the bytes as before.
+        logger.debug(f"Shared memory unavailable, pickling {len(data)} bytes: {exc}")
+        return data
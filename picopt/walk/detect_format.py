@@ -58,9 +58,10 @@ _TIFF_FORMAT_STR = "TIFF"
 _WEBP_FORMAT_STR = "WEBP"
 
 
-def _extract_image_info_from_image(
+def extract_image_info_from_image(
     image: ImageFile, info: dict[str, Any], *, keep_metadata: bool
 ) -> None:
+    """Fill ``info`` from an opened image's header, without verify()."""
     image_format_str = image.format
     if not image_format_str:
         return
@@ -90,7 +91,7 @@ def _extract_image_info(
         # then breaks lazy attrs like is_animated and n_frames.
         with Image.open(path_info.path_or_buffer()) as image:
             image_format_str = image.format
-            _extract_image_info_from_image(image, info, keep_metadata=keep_metadata)
+            extract_image_info_from_image(image, info, keep_metadata=keep_metadata)
             image.verify()
     except UnidentifiedImageError:
         # Not an image at all: normal, the non-PIL detectors take over.
@@ -152,10 +152,19 @@ class HandlerFactory:
 
         return repack_handler_class
 
+    def __getstate__(self) -> dict[str, Any]:
+        """Drop the reporter for worker handoff; workers never report."""
+        state = self.__dict__.copy()
+        state["_reporter"] = None
+        return state
+
     def _create_handler_get_class_and_format(
         self, config: PicoptSettings, path_info: PathInfo
-    ) -> tuple[FileFormat | None, type[Handler] | None, Mapping[str, Any]]:
+    ) -> tuple[
+        FileFormat | None, type[Handler] | None, Mapping[str, Any], OSError | None
+    ]:
         handler_cls: type[Handler] | None = None
+        warning: OSError | None = None
         try:
             # Unpack workers pre-detect archive members so the expensive
             # PIL sniff doesn't serialize on this thread.
@@ -170,35 +179,34 @@ class HandlerFactory:
             )
         except OSError as exc:
             logger.warning(f"{path_info.full_output_name()}: {exc}")
-            self._reporter.stats.record_warning(path_info.path, str(exc))
             print_exc_unless_expected(exc)
+            warning = exc
             file_format = None
             info = {}
-        return file_format, handler_cls, info
+        return file_format, handler_cls, info, warning
 
-    def create_handler(
+    def build_handler(
         self,
         path_info: PathInfo,
-        timestamps: Grove | None = None,
         settings: PicoptSettings | None = None,
-    ) -> Handler | None:
+    ) -> tuple[Handler | None, OSError | None]:
         """
-        Return a handler for the image format.
+        Detect the format and construct a handler, without timestamps.
 
-        ``settings`` carries a directory's resolved ``.picopt.yaml``
-        configuration; the handler is constructed with it so per-directory
-        options travel into workers and archive members.
+        Safe to run in a worker process: touches neither the reporter nor
+        the run's timestamps. Returns the handler (or None) and the OSError
+        that made detection give up, for the main thread to record.
         """
         if path_info.noop:
-            return None
+            return None, None
 
         config = settings or self._config
-        file_format, handler_cls, info = self._create_handler_get_class_and_format(
-            config, path_info
+        file_format, handler_cls, info, warning = (
+            self._create_handler_get_class_and_format(config, path_info)
         )
 
         if not handler_cls or not file_format:
-            return None
+            return None, warning
 
         kwargs: dict[str, Any] = {}
         if issubclass(handler_cls, ImageHandler):
@@ -207,19 +215,47 @@ class HandlerFactory:
             repack_handler_class = self._get_repack_handler_class(
                 config, path_info, file_format
             )
-            if repack_handler_class:
-                kwargs["repack_handler_class"] = repack_handler_class
-                if issubclass(handler_cls, ArchiveHandler):
-                    kwargs["timestamps"] = _build_archive_stamps(path_info, timestamps)
-            else:
-                return None
-
-        return handler_cls(
+            if not repack_handler_class:
+                return None, warning
+            kwargs["repack_handler_class"] = repack_handler_class
+
+        handler = handler_cls(
             config,
             path_info,
             input_file_format=file_format,
             **kwargs,
         )
+        return handler, warning
+
+    def record_warning(self, path_info: PathInfo, warning: OSError) -> None:
+        """Record a detection warning in the run stats. Main thread only."""
+        self._reporter.stats.record_warning(path_info.path, str(warning))
+
+    @staticmethod
+    def attach_timestamps(handler: Handler, timestamps: Grove | None) -> None:
+        """Give an archive handler its picklable slice of the run's timestamps."""
+        if isinstance(handler, ArchiveHandler):
+            handler.set_timestamps(_build_archive_stamps(handler.path_info, timestamps))
+
+    def create_handler(
+        self,
+        path_info: PathInfo,
+        timestamps: Grove | None = None,
+        settings: PicoptSettings | None = None,
+    ) -> Handler | None:
+        """
+        Return a handler for the image format.
+
+        ``settings`` carries a directory's resolved ``.picopt.yaml``
+        configuration; the handler is constructed with it so per-directory
+        options travel into workers and archive members.
+        """
+        handler, warning = self.build_handler(path_info, settings)
+        if warning is not None:
+            self.record_warning(path_info, warning)
+        if handler is not None:
+            self.attach_timestamps(handler, timestamps)
+        return handler
 
     @staticmethod
     def create_repack_handler(
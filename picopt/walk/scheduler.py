@@ -8,12 +8,38 @@ Design notes (see HANDOFF-PICOPT-DISPATCH-REWRITE.md for rationale):
 
 * One main-thread loop owns every executor.submit() call. Dispatch is not
   scattered across walk_dir / _handle_file / _handle_container anymore.
-* Three job kinds: UnpackJob, OptimizeLeafJob, RepackJob. Each runs in a
-  worker process, returns a plain dataclass / ReportStats, never mutates
-  scheduler state directly.
+* Job kinds: DetectJob, UnpackJob, OptimizeLeafJob, RepackJob. Each
+  runs in a worker process, returns a plain dataclass / ReportStats, never
+  mutates scheduler state directly. DetectJob turns a bare PathInfo into a
+  handler so the PIL sniff scales with the pool, not the main thread.
 * Containers become ContainerNodes that the scheduler threads together into
   a tree. Leaves are NOT nodes; they're tracked in a dict[Future, node].
+* Identical leaves coalesce: hardlinks of one inode (and, with ``dedupe``,
+  equal content digests) queue once; the rest wait on that leader and adopt
+  its result, through a FollowJob relink/copy for files on disk.
+* Container affinity: an archive whose members are few and small is
+  optimized and repacked entirely inside its unpack worker, since fanning
+  it out would cost more in pickling and scheduling than the work itself.
+* Leaf batching: the members of a BATCH_MEMBERS container (animation
+  frames) are optimized several to an OptimizeBatchJob, so a long
+  animation pays a handful of worker round trips instead of one per frame.
+  Frames arrive already detected, so their unpack skips the PIL sniff too.
+* Sharded unpack: a large top-level archive that can read one slice of its
+  members (CAN_SHARD) unpacks as several UnpackJobs, one per contiguous
+  index range, so reading and format sniffing a huge archive spreads over
+  the pool. Their results merge into the one ContainerNode.
+* Streaming repack: a top-level container that can append (CAN_APPEND)
+  writes its repack in runs. Each run of finished members that continues
+  the members already written, in archive order, goes to an AppendJob.
+  Their bytes are then released, so a huge archive holds only its
+  out-of-order window instead of every finished member until the last.
+* Member bytes cross processes in shared memory segments, named in the
+  pickled PathInfos and reports. Each node owns the segments of its
+  children and unlinks them once its repack has read them, or on cancel.
 * Backpressure: len(inflight) <= 2 * max_workers. Overflow sits in `ready`.
+* The directory walk is a generator the loop pulls from only while `ready`
+  is below a high-water mark, so optimization starts as soon as the first
+  files are found and queued work stays bounded regardless of tree size.
 * Rollback-on-repack-failure: mark node CANCELLED, discard _optimized_contents,
   rmtree staging, and drop any late-arriving leaf results whose owning node
   has state CANCELLED.
@@ -31,29 +57,57 @@ from collections import deque
 from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 from dataclasses import dataclass, field
 from enum import Enum, auto
-from itertools import chain
+from itertools import chain, count
+from multiprocessing import Manager
+from queue import Empty
 from typing import TYPE_CHECKING
 
+from picopt.cache import predigest
 from picopt.exceptions import print_exc_unless_expected
+from picopt.memory_costs import MemoryCosts, PeakRss, cost_key
+from picopt.plugins.base import ContainerHandler, ImageHandler
+from picopt.plugins.base.handler import DEDUPE_LINK
 from picopt.report import ReportStats
+from picopt.shared_buffer import SharedBuffer, share
 from picopt.walk.detect_format import predetect_format
 from picopt.walk.dir_timestamps import DirTimestamper
 
 if TYPE_CHECKING:
-    from collections.abc import Callable
+    from collections.abc import Callable, Iterable, Iterator
+    from multiprocessing.managers import SyncManager
     from pathlib import Path
+    from queue import Queue
 
     from picopt.config.settings import PicoptSettings
     from picopt.log.reporter import Reporter
     from picopt.path import PathInfo
-    from picopt.plugins.base import ContainerHandler, ImageHandler
+    from picopt.plugins.base import Handler
     from picopt.walk.grove import Grove
+    from picopt.walk.handler_factory import HandlerFactory
 
 
 # --------------------------------------------------------------------- state
 
+# Containers at or under both limits (total member bytes, member count) are
+# optimized end-to-end in their unpack worker instead of fanned out. A
+# worker optimizes a small archive's pages serially in about the time it
+# takes the scheduler to round-trip them through the pool.
+_INLINE_MAX_BYTES = 1024 * 1024
+_INLINE_MAX_MEMBERS = 16
+
+# Children an unpack worker publishes per message while it is still walking
+# a large container, and how often the scheduler checks for them when no
+# future completes.
+_STREAM_BATCH_SIZE = 8
+# An OptimizeBatchJob closes at this many members or bytes, whichever comes
+# first. Bigger frames are worth a worker round trip each.
+_LEAF_BATCH_MAX_MEMBERS = 8
+_LEAF_BATCH_MAX_BYTES = 1024 * 1024
+_STREAM_POLL_SECONDS = 0.05
+
 # Multiplier from a top-level item's on-disk size to its estimated peak resident
-# memory while optimized. A container holds, concurrently: the whole archive
+# memory while optimized, used for each format until MemoryCosts has learned its
+# own ratio from measured worker peaks. A container holds, concurrently: the whole archive
 # bytes, every decompressed member, the optimized copies, and the output buffer
 # built at repack — plus a pickled duplicate of much of that in the worker
 # process. Measured peak RSS / on-disk size is ~3x for comic archives, so the
@@ -63,6 +117,28 @@ if TYPE_CHECKING:
 # deadlocks, it just overshoots once.
 _MEM_COST_FACTOR = 3
 
+# Fraction of ``--memory-limit`` past which a newly admitted container is
+# unpacked with its members staged on disk rather than held in memory. Nested
+# containers inherit their top-level ancestor's decision.
+_SPILL_BUDGET_FRACTION = 0.5
+
+# A top-level archive that can shard unpacks in one job per this many bytes
+# of it, up to one per worker. Smaller slices would spend more re-reading
+# the archive's index in every worker than they save.
+_SHARD_BYTES = 256 * 1024 * 1024
+
+# A streaming repack appends once this many finished members, or this many
+# bytes of them, continue the members already written in archive order.
+# Fewer would spend a job (and a rewritten central directory) on too little.
+_APPEND_MIN_MEMBERS = 32
+_APPEND_MIN_BYTES = 16 * 1024 * 1024
+
+# Multiplier from max_workers to the number of queued-but-unsubmitted jobs at
+# which the scheduler stops pulling from the walk source. Enough to keep the
+# 2 * max_workers in-flight window full between ticks; more only holds
+# handlers (and their detection results) in memory for no throughput gain.
+_READY_HIGH_WATER_FACTOR = 4
+
 
 class NodeState(Enum):
     """Lifecycle of a ContainerNode."""
@@ -82,6 +158,43 @@ class NodeState(Enum):
 # _handle_completion.
 
 
+@dataclass
+class DetectResult:
+    """
+    Return value of DetectJob.run().
+
+    ``handler`` is None when the file has no enabled handler. ``warning`` is
+    the OSError that made detection give up, for the main thread's stats.
+    ``path_info`` is the worker's copy; it is the same object as
+    ``handler.path_info`` after the pickle round trip.
+    """
+
+    path_info: PathInfo
+    handler: Handler | None = None
+    warning: OSError | None = None
+    exc: Exception | None = None
+
+
+@dataclass
+class DetectJob:
+    """Detect a file's format and build its handler in a worker."""
+
+    factory: HandlerFactory
+    path_info: PathInfo
+    settings: PicoptSettings | None = None
+
+    def run(self) -> DetectResult:
+        """Sniff the format and construct the handler. Worker-side."""
+        try:
+            handler, warning = self.factory.build_handler(self.path_info, self.settings)
+            if handler is not None and handler.CACHEABLE and handler.config.dedupe:
+                predigest(handler.path_info)
+        except Exception as exc:
+            print_exc_unless_expected(exc)
+            return DetectResult(path_info=self.path_info, exc=exc)
+        return DetectResult(path_info=self.path_info, handler=handler, warning=warning)
+
+
 @dataclass
 class UnpackResult:
     """
@@ -110,7 +223,8 @@ class UnpackResult:
     - `_optimized_contents` (set[PathInfo]) — may have entries added for
       children that were skipped/copied verbatim (noop children). The
       scheduler appends successful leaf results to this same set, so the
-      roundtrip preserves the walk()-time additions.
+      roundtrip preserves the walk()-time additions. A sharded unpack
+      returns one result per shard; each merges the ones before it.
     - internal caches the handler populates during walk() (file lists,
       archive member tables, etc.) — opaque to the scheduler but needed
       by repack().
@@ -119,6 +233,43 @@ class UnpackResult:
     handler: ContainerHandler
     children: list[PathInfo]
     exc: Exception | None = None
+    # Set when the worker optimized and repacked the container itself:
+    # the repack report, and the member errors the fan-out path would
+    # have recorded. ``handler`` is then the repack handler.
+    report: ReportStats | None = None
+    errors: list[ReportStats] = field(default_factory=list)
+    # Peak memory the unpack added in the worker, when measurable.
+    peak_rss: int | None = None
+
+
+def _resolve_do_repack(handler: ContainerHandler, *, had_work: bool) -> bool:
+    """
+    Decide whether a container whose children are all done needs repacking.
+
+    Respect the handler's own _do_repack flag (set during walk) OR whether
+    any child produced replacement bytes. Handlers like Img2WebPAnimated
+    set _do_repack=True unconditionally during walk() because format
+    conversion always requires repacking even when no individual child was
+    "optimized". A requested container format conversion (e.g. CBR -> CBZ)
+    also needs a repack even when every member was already optimized.
+    """
+    if not handler.is_do_repack():
+        convert_intent = (
+            handler.repack_handler_class is not None
+            and type(handler) is not handler.repack_handler_class
+        )
+        handler.set_do_repack(do_repack=had_work or convert_intent)
+    return handler.is_do_repack()
+
+
+def _noop_repack_report(handler: ContainerHandler) -> ReportStats:
+    """Stand in for the repack of a container with no work."""
+    return ReportStats(
+        handler.original_path,
+        bytes_in=handler.path_info.bytes_in(),
+        bytes_out=handler.path_info.bytes_in(),
+        changed=False,
+    )
 
 
 @dataclass
@@ -126,16 +277,126 @@ class UnpackJob:
     """Run handler.walk() in a worker; return materialized children."""
 
     handler: ContainerHandler
+    # Builds member handlers for an inline optimization; None always fans out.
+    factory: HandlerFactory | None = None
+    # Queue for publishing children in batches while the walk continues,
+    # tagged with ``stream_id``; None returns them all with the result.
+    stream: Queue[tuple[int, list[PathInfo]]] | None = None
+    stream_id: int = 0
+
+    def _may_inline(self, children: list[PathInfo]) -> bool:
+        """Whether the container is still small enough to optimize here."""
+        return (
+            self.factory is not None
+            and self.handler.get_staging_dir() is None
+            and len(children) <= _INLINE_MAX_MEMBERS
+            and sum(child.bytes_in() for child in children) <= _INLINE_MAX_BYTES
+        )
+
+    def _inline_members(
+        self, children: list[PathInfo]
+    ) -> list[tuple[PathInfo, Handler | None]] | None:
+        """Build member handlers here, or return None to fan the container out."""
+        if self.factory is None or not self._may_inline(children):
+            return None
+        members = []
+        for child in children:
+            try:
+                handler, warning = self.factory.build_handler(
+                    child, self.handler.config
+                )
+            except Exception:
+                return None
+            # Nested containers and detection trouble take the main path,
+            # which knows how to schedule and report them.
+            if warning is not None or isinstance(handler, ContainerHandler):
+                return None
+            members.append((child, handler))
+        return members
+
+    def _run_inline(self, children: list[PathInfo]) -> UnpackResult | None:
+        """
+        Optimize and repack a small container without leaving this worker.
+
+        Mirrors the scheduler's leaf completion and repack decision so both
+        paths produce the same reports.
+        """
+        if self.factory is None or (members := self._inline_members(children)) is None:
+            return None
+        handler = self.handler
+        contents = handler.get_optimized_contents()
+        errors: list[ReportStats] = []
+        had_work = False
+        for path_info, member_handler in members:
+            if member_handler is not None:
+                report = member_handler.optimize_wrapper()
+                if report.exc is None:
+                    handler.hydrate_optimized_path_info(path_info, report)
+                    had_work = had_work or report.changed
+                else:
+                    errors.append(report)
+            contents.add(path_info)
+        if _resolve_do_repack(handler, had_work=had_work):
+            handler = self.factory.create_repack_handler(handler.config, handler)
+            report = RepackJob(handler=handler).run()
+        else:
+            report = _noop_repack_report(handler)
+        # The members are packed; don't pickle them back.
+        handler.get_optimized_contents().clear()
+        return UnpackResult(handler=handler, children=[], report=report, errors=errors)
+
+    def _publish(self, children: list[PathInfo]) -> None:
+        """Send a batch of children to the scheduler ahead of the result."""
+        assert self.stream is not None
+        for child in children:
+            child.share_data()
+        self.stream.put((self.stream_id, children))
+
+    def _walk(self) -> tuple[list[PathInfo], bool]:
+        """
+        Walk the container, returning the unpublished children.
+
+        Once the container is too big to optimize inline, children are
+        published in batches as they are read, so their optimization starts
+        while the rest of the archive is still being decompressed.
+        """
+        # Pre-detect member formats here so the expensive PIL sniff
+        # parallelizes instead of serializing on the scheduler thread.
+        keep_metadata = self.handler.config.keep_metadata
+        dedupe = self.handler.config.dedupe
+        children: list[PathInfo] = []
+        streaming = False
+        for child in self.handler.walk():
+            # Animation frames arrive detected by the handler that wrote them.
+            if child.detected is None and not child.noop:
+                predetect_format(child, keep_metadata=keep_metadata)
+            if dedupe and not child.noop:
+                predigest(child)
+            children.append(child)
+            if self.stream is None:
+                continue
+            streaming = streaming or not self._may_inline(children)
+            if streaming and len(children) >= _STREAM_BATCH_SIZE:
+                self._publish(children)
+                children = []
+        return children, streaming
 
     def run(self) -> UnpackResult:
         """Unpack the container and list its children. Worker-side."""
+        with PeakRss() as rss:
+            result = self._run()
+        result.peak_rss = rss.peak
+        return result
+
+    def _run(self) -> UnpackResult:
         try:
-            children = list(self.handler.walk())
-            # Pre-detect member formats here so the expensive PIL sniff
-            # parallelizes instead of serializing on the scheduler thread.
-            keep_metadata = self.handler.config.keep_metadata
-            for child in children:
-                predetect_format(child, keep_metadata=keep_metadata)
+            children, streamed = self._walk()
+            if not streamed and (result := self._run_inline(children)) is not None:
+                return result
+            # Send member bytes back by shared memory segment name, so they
+            # reach leaf and repack workers without riding the pipe.
+            for child in chain(children, self.handler.get_optimized_contents()):
+                child.share_data()
             return UnpackResult(handler=self.handler, children=children)
         except Exception as exc:
             print_exc_unless_expected(exc)
@@ -148,12 +409,42 @@ class OptimizeLeafJob:
 
     handler: ImageHandler
     path_info: PathInfo  # kept so main thread can hydrate it from result.data
+    # Set when this job leads a group of coalesced identical inputs.
+    dedupe_key: tuple[str, ...] | None = None
 
     def run(self) -> ReportStats:
         """Optimize one leaf. Worker-side."""
         # optimize_wrapper() already catches Exception and returns a
         # ReportStats(exc=...). It never raises under normal paths.
-        return self.handler.optimize_wrapper()
+        with PeakRss() as rss:
+            report = self.handler.optimize_wrapper()
+        report.data = share(report.data)
+        report.peak_rss = rss.peak
+        return report
+
+
+@dataclass
+class OptimizeBatchJob:
+    """Run several in-container OptimizeLeafJobs in one worker."""
+
+    jobs: list[OptimizeLeafJob]
+
+    def run(self) -> list[ReportStats]:
+        """Optimize each leaf in turn, returning reports in job order. Worker-side."""
+        return [job.run() for job in self.jobs]
+
+
+@dataclass
+class FollowJob(OptimizeLeafJob):
+    """Adopt a coalesced leader's written file instead of optimizing."""
+
+    source: Path | None = None
+    link: bool = False  # hardlink to source instead of copying it
+
+    def run(self) -> ReportStats:
+        """Relink or copy the leader's result. Worker-side."""
+        assert self.source is not None
+        return self.handler.follow_wrapper(self.source, link=self.link)
 
 
 @dataclass
@@ -164,14 +455,38 @@ class RepackJob:
 
     def run(self) -> ReportStats:
         """Repack a container. Worker-side."""
-        try:
-            return self.handler.repack()
-        except Exception as exc:
-            print_exc_unless_expected(exc)
-            return self.handler.error(exc)
+        with PeakRss() as rss:
+            try:
+                report = self.handler.repack()
+            except Exception as exc:
+                print_exc_unless_expected(exc)
+                report = self.handler.error(exc)
+            else:
+                report.data = share(report.data)
+        report.peak_rss = rss.peak
+        return report
+
+
+@dataclass
+class AppendJob:
+    """Run handler.optimize() in a worker to append members to its repack."""
 
+    handler: ContainerHandler
 
-Job = UnpackJob | OptimizeLeafJob | RepackJob
+    def run(self) -> ReportStats:
+        """Append a run of finished members to the pack output. Worker-side."""
+        with PeakRss() as rss:
+            try:
+                self.handler.optimize().close()
+                report = ReportStats(self.handler.original_path)
+            except Exception as exc:
+                print_exc_unless_expected(exc)
+                report = self.handler.error(exc)
+        report.peak_rss = rss.peak
+        return report
+
+
+Job = DetectJob | UnpackJob | OptimizeLeafJob | OptimizeBatchJob | RepackJob | AppendJob
 
 
 # --------------------------------------------------------------------- nodes
@@ -189,7 +504,31 @@ class ContainerNode:
     had_work: bool = False  # any child produced replacement bytes
     had_error: bool = False  # any child errored; don't timestamp this subtree
     staging_dir: Path | None = None
-    cost: int = 0  # memory budget charged for this node (0 = not charged)
+    # Memory charged for this node (0 = not charged): against the global
+    # budget for a top-level node, against its parent's sub-budget for a
+    # nested one. It is also this node's own sub-budget for nested unpacks.
+    cost: int = 0
+    held: int = 0  # bytes of unpacked members held in memory
+    drawn: int = 0  # sub-budget charged by in-flight nested containers
+    # Nested container unpacks waiting for the sub-budget to free up.
+    waiting: list[tuple[UnpackJob, ContainerNode]] = field(default_factory=list)
+    spill: bool = False  # unpacked under memory pressure; members go to disk
+    # Memory cost model key, for top-level nodes, and the largest peak RSS
+    # of any job in this subtree, to learn from when it finishes.
+    cost_key: str | None = None
+    peak_rss: int = 0
+    # Shared memory holding this node's member bytes, unlinked after repack.
+    segments: set[SharedBuffer] = field(default_factory=set)
+    # Key of this node's unpack in the scheduler's child stream, if any.
+    stream_id: int | None = None
+    unpacks: int = 1  # UnpackJobs (shards) not yet done
+    # Streaming repack: the archive index of the next member to append, the
+    # members an in-flight AppendJob is writing, the temp file appends go
+    # to, and the contents size at which to look for a run to append again.
+    next_index: int = 0
+    appending: list[PathInfo] = field(default_factory=list)
+    pack_path: Path | None = None
+    append_scan_at: int = 0
 
     def is_top_level(self) -> bool:
         """Return True if this node has no container parent."""
@@ -199,6 +538,14 @@ class ContainerNode:
 # ---------------------------------------------------------- leaf tracking
 
 
+@dataclass
+class _DetectEntry:
+    """What the scheduler tracks per in-flight DetectJob future."""
+
+    job: DetectJob
+    parent: ContainerNode | None  # None = directory file, not in container
+
+
 @dataclass
 class _LeafEntry:
     """What the scheduler tracks per in-flight OptimizeLeafJob future."""
@@ -221,7 +568,7 @@ class Scheduler:
     container.optimize_contents lands here.
     """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         *,
         config: PicoptSettings,
@@ -235,6 +582,12 @@ class Scheduler:
         child_enqueue_callback: Callable[
             [Scheduler, ContainerNode, list[PathInfo]], None
         ],
+        detect_done_callback: Callable[
+            [Scheduler, ContainerNode | None, DetectResult], Handler | None
+        ]
+        | None = None,
+        handler_factory: HandlerFactory | None = None,
+        stream_children: bool = False,
     ) -> None:
         """Initialize scheduler state."""
         self._config = config
@@ -244,15 +597,34 @@ class Scheduler:
         self._max_workers = max_workers
         self._create_repack_handler = create_repack_handler
         self._child_enqueue_callback = child_enqueue_callback
+        self._detect_done_callback = detect_done_callback
+        # Lets unpack workers optimize small containers inline.
+        self._handler_factory = handler_factory
+        # Unpack workers publish children here while still walking. The
+        # manager process is started by run(), before the pool forks.
+        self._stream_children = stream_children
+        self._manager: SyncManager | None = None
+        self._stream_queue: Queue[tuple[int, list[PathInfo]]] | None = None
+        self._streams: dict[int, ContainerNode] = {}
+        self._stream_ids = count()
 
         self._ready: deque[tuple[Job, ContainerNode | None]] = deque()
         # Top-level items deferred by the memory gate wait here in FIFO
         # order instead of being re-scanned through _ready on every tick.
         self._gated: deque[tuple[Job, ContainerNode | None]] = deque()
+        self._inflight_detect: dict[Future, _DetectEntry] = {}
         self._inflight_unpack: dict[Future, ContainerNode] = {}
         self._inflight_leaf: dict[Future, _LeafEntry] = {}
+        self._inflight_batch: dict[
+            Future, tuple[OptimizeBatchJob, ContainerNode | None]
+        ] = {}
         self._inflight_repack: dict[Future, ContainerNode] = {}
+        self._inflight_append: dict[Future, ContainerNode] = {}
         self._live_nodes: set[ContainerNode] = set()
+        # In-run dedupe: leaves waiting on an identical leader, by its key.
+        self._followers: dict[
+            tuple[str, ...], list[tuple[OptimizeLeafJob, ContainerNode | None]]
+        ] = {}
 
         self._dirs = DirTimestamper(timestamps)
         self._fail_fast_triggered: bool = False
@@ -265,32 +637,148 @@ class Scheduler:
         # single archive larger than the whole budget still runs (alone).
         self._byte_budget: int = config.memory_limit
         self._inflight_bytes: int = 0
+        # Learned per-format costs, refined from the peak RSS workers report
+        # and kept in the result cache dir between runs.
+        self._memory_costs = MemoryCosts.from_cache_dir(
+            _MEM_COST_FACTOR, config.cache_dir
+        )
+
+        # Lazy walk source. Each next() enqueues at most one top-level job
+        # (or just announces/seals a directory).
+        self._source: Iterator[None] | None = None
+        self._ready_high_water: int = _READY_HIGH_WATER_FACTOR * max_workers
 
     # ---------------------------------------------------------- public API
-    def enqueue_leaf(
-        self, job: OptimizeLeafJob, parent: ContainerNode | None = None
-    ) -> None:
-        """Enqueue a top-level or in-container leaf job."""
-        self._ready.append((job, parent))
+    def _count_child(self, path_info: PathInfo, parent: ContainerNode | None) -> None:
+        """Count a new child against its container or directory tracker."""
         if parent is not None:
             parent.pending += 1
-        elif job.path_info.path is not None:
-            self._dirs.enqueue_child(job.path_info.path)
+        elif path_info.path is not None:
+            self._dirs.enqueue_child(path_info.path)
 
-    def enqueue_container(
-        self, handler: ContainerHandler, parent: ContainerNode | None = None
+    def _add_container(
+        self,
+        handler: ContainerHandler,
+        parent: ContainerNode | None,
+        *,
+        first: bool = False,
     ) -> ContainerNode:
-        """Create a node for a container and enqueue its UnpackJob."""
+        """Create a node for an already-counted container; queue its unpack."""
         node = ContainerNode(handler=handler, parent=parent)
         self._live_nodes.add(node)
         if parent is not None:
             parent.children.append(node)
-            parent.pending += 1
-        elif handler.path_info.path is not None:
-            self._dirs.enqueue_child(handler.path_info.path)
-        self._ready.append((UnpackJob(handler=handler), node))
+        if (shards := self._shard_count(handler, parent)) > 1:
+            # A shard is never small enough to optimize inline.
+            jobs = [UnpackJob(handler=shard) for shard in handler.shard(shards)]
+            node.unpacks = shards
+            node.staging_dir = handler.get_staging_dir()
+        else:
+            jobs = [UnpackJob(handler=handler, factory=self._handler_factory)]
+        if self._stream_queue is not None:
+            node.stream_id = next(self._stream_ids)
+            self._streams[node.stream_id] = node
+            for job in jobs:
+                job.stream_id = node.stream_id
+                job.stream = self._stream_queue
+        items = [(job, node) for job in jobs]
+        if first:
+            self._ready.extendleft(reversed(items))
+        else:
+            self._ready.extend(items)
         return node
 
+    def _shard_count(
+        self, handler: ContainerHandler, parent: ContainerNode | None
+    ) -> int:
+        """How many UnpackJobs a new container's walk splits into."""
+        if (
+            parent is not None
+            or handler.path_info.path is None
+            or not handler.CAN_SHARD
+        ):
+            return 1
+        shards = int(handler.path_info.bytes_in()) // _SHARD_BYTES
+        return max(1, min(self._max_workers, shards))
+
+    def enqueue_detect(
+        self, job: DetectJob, parent: ContainerNode | None = None
+    ) -> None:
+        """
+        Enqueue format detection for a file or undetected member.
+
+        The child is counted once here; the job it resolves into is not
+        counted again.
+        """
+        self._count_child(job.path_info, parent)
+        self._ready.append((job, parent))
+
+    def enqueue_leaf(
+        self, job: OptimizeLeafJob, parent: ContainerNode | None = None
+    ) -> None:
+        """Enqueue a top-level or in-container leaf job."""
+        self._count_child(job.path_info, parent)
+        self._queue_leaf(job, parent)
+
+    def enqueue_leaves(
+        self, jobs: list[OptimizeLeafJob], parent: ContainerNode
+    ) -> None:
+        """
+        Enqueue a container's leaf jobs, batched if its members want that.
+
+        Leaves that may coalesce with an identical one still queue alone, so
+        followers can wait on them.
+        """
+        batch: list[OptimizeLeafJob] = []
+        batch_bytes = 0
+        for job in jobs:
+            self._count_child(job.path_info, parent)
+            if not parent.handler.BATCH_MEMBERS or job.handler.dedupe_key():
+                self._queue_leaf(job, parent)
+                continue
+            batch.append(job)
+            batch_bytes += job.path_info.bytes_in()
+            if (
+                len(batch) >= _LEAF_BATCH_MAX_MEMBERS
+                or batch_bytes >= _LEAF_BATCH_MAX_BYTES
+            ):
+                self._ready.append((OptimizeBatchJob(jobs=batch), parent))
+                batch = []
+                batch_bytes = 0
+        if batch:
+            self._ready.append((OptimizeBatchJob(jobs=batch), parent))
+
+    def _queue_leaf(
+        self,
+        job: OptimizeLeafJob,
+        parent: ContainerNode | None,
+        *,
+        first: bool = False,
+    ) -> None:
+        """
+        Queue an already-counted leaf, coalescing it with an identical one.
+
+        The first leaf with a given dedupe key leads; later ones wait on it
+        and adopt its result when it completes.
+        """
+        if (key := job.handler.dedupe_key()) is not None:
+            if (followers := self._followers.get(key)) is not None:
+                followers.append((job, parent))
+                return
+            self._followers[key] = []
+            job.dedupe_key = key
+        if first:
+            self._ready.appendleft((job, parent))
+        else:
+            self._ready.append((job, parent))
+
+    def enqueue_container(
+        self, handler: ContainerHandler, parent: ContainerNode | None = None
+    ) -> ContainerNode:
+        """Create a node for a container and enqueue its UnpackJob."""
+        self._count_child(handler.path_info, parent)
+        return self._add_container(handler, parent)
+
     def accept_prebuilt_report(self, report: ReportStats, top_path: Path) -> None:
         """
         Accept a ReportStats built on the main thread.
@@ -316,25 +804,53 @@ class Scheduler:
         """Remove a directory tracker without finalizing (used on walk errors)."""
         self._dirs.cancel_dir(dir_path)
 
-    def run(self) -> None:
-        """Drain ready, gated, and inflight until all are empty."""
+    def run(self, source: Iterator[None] | None = None) -> None:
+        """
+        Drain source, ready, gated, and inflight until all are empty.
+
+        ``source`` is the walk generator. It is advanced only while the
+        ready queue is below the high-water mark, so walking and detection
+        interleave with optimization instead of running to completion first.
+        """
+        self._source = source
+        if self._stream_children:
+            self._manager = Manager()
+            self._stream_queue = self._manager.Queue()
         try:
-            while self._ready or self._gated or self._inflight_count() > 0:
+            while (
+                self._source is not None
+                or self._ready
+                or self._gated
+                or self._inflight_count() > 0
+            ):
+                self._pull_source()
                 self._submit_ready()
                 if self._inflight_count() == 0:
                     continue
                 all_futs = list(
                     chain(
+                        self._inflight_detect,
                         self._inflight_unpack,
                         self._inflight_leaf,
+                        self._inflight_batch,
                         self._inflight_repack,
+                        self._inflight_append,
                     )
                 )
-                done, _ = wait(all_futs, return_when=FIRST_COMPLETED)
+                # While unpacks may be streaming children, wake up to take
+                # them even if no future completes.
+                timeout = _STREAM_POLL_SECONDS if self._streams else None
+                done, _ = wait(all_futs, timeout=timeout, return_when=FIRST_COMPLETED)
+                # Workers publish every batch before returning, so draining
+                # first delivers a node's children before its unpack result.
+                self._drain_streams()
                 for fut in done:
                     self._handle_completion(fut)
         finally:
+            self._close_source()
             self._cleanup_all_staging()
+            self._close_streams()
+            self._memory_costs.save()
 
     # ------------------------------------------------------- internals
     #
@@ -346,23 +862,47 @@ class Scheduler:
         for the 2 * max_workers backpressure cap.
         """
         return (
-            len(self._inflight_unpack)
+            len(self._inflight_detect)
+            + len(self._inflight_unpack)
             + len(self._inflight_leaf)
+            + len(self._inflight_batch)
             + len(self._inflight_repack)
+            + len(self._inflight_append)
         )
 
+    def _close_source(self) -> None:
+        """Stop pulling from the walk source."""
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+
+    def _pull_source(self) -> None:
+        """Advance the walk source until the ready queue hits its high-water mark."""
+        while (
+            self._source is not None
+            and len(self._ready) + len(self._gated) < self._ready_high_water
+        ):
+            try:
+                next(self._source)
+            except StopIteration:
+                self._source = None
+
     def _drop_cancelled_ready_job(self, job: Job, node: ContainerNode) -> None:
         """
         Decrement parent pending counter for a leaf of a cancelled subtree.
 
-        UnpackJob/RepackJob jobs belong to ``node`` itself; the cancel walk
-        already decremented the parent's pending counter for them, so they
-        need no further bookkeeping.
+        UnpackJob/RepackJob/AppendJob jobs belong to ``node`` itself; the
+        cancel walk already decremented the parent's pending counter for
+        them, so they need no further bookkeeping.
         """
         match job:
-            case UnpackJob() | RepackJob():
+            case UnpackJob() | RepackJob() | AppendJob():
                 pass
+            case OptimizeBatchJob():
+                for _ in job.jobs:
+                    self._child_done(node)
             case _:
+                self._promote_followers(job)
                 self._child_done(node)
 
     def _track_submitted_job(
@@ -370,6 +910,8 @@ class Scheduler:
     ) -> None:
         """Record an in-flight future under the right map and update state."""
         match job:
+            case DetectJob():
+                self._inflight_detect[fut] = _DetectEntry(job=job, parent=node)
             case UnpackJob():
                 assert node is not None
                 node.state = NodeState.UNPACKING
@@ -378,14 +920,22 @@ class Scheduler:
                 self._inflight_leaf[fut] = _LeafEntry(job=job, parent=node)
                 if node is not None and node.state is NodeState.NEW:
                     node.state = NodeState.OPTIMIZING
+            case OptimizeBatchJob():
+                self._inflight_batch[fut] = (job, node)
+                if node is not None and node.state is NodeState.NEW:
+                    node.state = NodeState.OPTIMIZING
             case RepackJob():
                 assert node is not None
                 node.state = NodeState.REPACKING
                 self._inflight_repack[fut] = node
+            case AppendJob():
+                assert node is not None
+                self._inflight_append[fut] = node
 
-    def _est_cost(self, path_info: PathInfo) -> int:
+    def _est_cost(self, handler: Handler) -> int:
         """Estimate peak resident memory for a top-level item, in bytes."""
-        return int(path_info.bytes_in()) * _MEM_COST_FACTOR
+        size = int(handler.path_info.bytes_in())
+        return self._memory_costs.estimate(cost_key(handler), size)
 
     def _charge_info(self, job: Job, node: ContainerNode | None) -> tuple[bool, int]:
         """
@@ -396,16 +946,21 @@ class Scheduler:
         already-admitted container (in-container leaves, nested-container
         unpacks, and every RepackJob) are exempt — their memory is already
         accounted for by their top-level ancestor, and gating them could
-        deadlock the container that must repack to release budget.
+        deadlock the container that must repack to release budget. Nested
+        unpacks instead draw on their parent's sub-budget; see
+        ``_admit_nested``.
         """
         match job:
             case UnpackJob():
-                if node is not None and node.is_top_level():
-                    return True, self._est_cost(node.handler.path_info)
+                # A sharded unpack is charged once, by its first shard.
+                if node is not None and node.is_top_level() and not node.cost:
+                    return True, self._est_cost(node.handler)
+            case FollowJob():
+                pass  # a file copy, not an optimization
             case OptimizeLeafJob():
                 if node is None:  # standalone directory leaf
-                    return True, self._est_cost(job.path_info)
-            case _:  # RepackJob and progress on already-admitted containers
+                    return True, self._est_cost(job.handler)
+            case _:  # Batch/Repack/AppendJob, progress on admitted containers
                 pass
         return False, 0
 
@@ -422,12 +977,74 @@ class Scheduler:
 
     def _retire_node(self, node: ContainerNode) -> None:
         """Release a node's memory charge and drop it from the live set."""
-        self._release_budget(node.cost)
+        if node.parent is None:
+            self._release_budget(node.cost)
+        elif node.cost:
+            parent = node.parent
+            parent.drawn = max(0, parent.drawn - node.cost)
+            # Siblings parked on the parent's sub-budget may fit now.
+            self._ready.extend(parent.waiting)
+            parent.waiting.clear()
         node.cost = 0
         self._live_nodes.discard(node)
 
+    def _admit_nested(self, job: Job, node: ContainerNode | None) -> bool:
+        """
+        Charge a nested container's unpack to its parent's sub-budget.
+
+        A parent's sub-budget is its own charge, less the unpacked members it
+        already holds in memory. Nested unpacks that don't fit park on the
+        parent until a sibling retires. Like the global gate, a parent with
+        nothing drawn admits any one child, so every subtree makes progress.
+        Returns False when the job was parked.
+        """
+        if (
+            self._byte_budget <= 0
+            or not isinstance(job, UnpackJob)
+            or node is None
+            or node.parent is None
+        ):
+            return True
+        parent = node.parent
+        cost = self._est_cost(node.handler)
+        if parent.drawn and parent.held + parent.drawn + cost > parent.cost:
+            parent.waiting.append((job, node))
+            return False
+        parent.drawn += cost
+        node.cost = cost
+        return True
+
+    def _is_memory_tight(self, node: ContainerNode, cost: int) -> bool:
+        """Whether a container about to unpack should spill its members."""
+        if self._byte_budget <= 0:
+            return False
+        if (parent := node.parent) is not None:
+            # This node's own draw is already in parent.drawn.
+            used = parent.held + parent.drawn
+            return parent.spill or used > parent.cost * _SPILL_BUDGET_FRACTION
+        used = self._inflight_bytes + cost
+        return used > self._byte_budget * _SPILL_BUDGET_FRACTION
+
+    def _pack_threads(self) -> int:
+        """
+        Return the threads a new repack or append may compress on.
+
+        Workers busy with anything else keep their cores; the rest are split
+        between the packs, so a lone repack at the end of a run gets them all.
+        """
+        packs = len(self._inflight_repack) + len(self._inflight_append)
+        busy = self._inflight_count() - packs
+        return max(1, (self._max_workers - busy) // (packs + 1))
+
     def _submit_one(self, job: Job, node: ContainerNode | None, cost: int) -> None:
         """Submit one admitted job and charge its budget (if any)."""
+        if isinstance(job, UnpackJob):
+            assert node is not None
+            if node.state is NodeState.NEW:
+                node.spill = self._is_memory_tight(node, cost)
+            job.handler.set_spill(spill=node.spill)
+        elif isinstance(job, RepackJob | AppendJob):
+            job.handler.set_threads(threads=self._pack_threads())
         fut = self._executor.submit(job.run)
         self._track_submitted_job(fut, job, node)
         if cost:
@@ -435,6 +1052,7 @@ class Scheduler:
             if isinstance(job, UnpackJob):
                 assert node is not None
                 node.cost = cost
+                node.cost_key = cost_key(node.handler)
             else:  # standalone leaf
                 self._inflight_leaf[fut].cost = cost
 
@@ -474,6 +1092,8 @@ class Scheduler:
             if charged and not self._admits(cost):
                 self._gated.append((job, node))
                 continue
+            if not self._admit_nested(job, node):
+                continue
             self._submit_one(job, node, cost if charged else 0)
 
     def _cancel_subtree(
@@ -490,13 +1110,18 @@ class Scheduler:
             cancelled.add(node)
             node.state = NodeState.CANCELLED
             node.handler.get_optimized_contents().clear()
+            node.waiting.clear()
             stack.extend(node.children)
         # Purge queues of anything belonging to a cancelled node.
+        purged = [job for (job, n) in chain(self._ready, self._gated) if n in cancelled]
         self._ready = deque((job, n) for (job, n) in self._ready if n not in cancelled)
         self._gated = deque((job, n) for (job, n) in self._gated if n not in cancelled)
+        for job in purged:
+            self._promote_followers(job)
         # Clean staging immediately for every cancelled node.
         for node in cancelled:
             self._cleanup_node_staging(node)
+            self._release_segments(node)
             self._retire_node(node)
         # Already-running futures check state on completion and drop results.
 
@@ -506,12 +1131,21 @@ class Scheduler:
         tops = [n for n in list(self._live_nodes) if n.is_top_level()]
         for top in tops:
             self._cancel_subtree(top, reason=reason)
+        self._close_source()
         self._ready.clear()
         self._gated.clear()
 
     def _handle_completion(self, fut: Future) -> None:
         """Dispatch one completed future by which inflight map owns it."""
-        if fut in self._inflight_unpack:
+        if fut in self._inflight_detect:
+            entry = self._inflight_detect.pop(fut)
+            exc = fut.exception()
+            if exc is not None and isinstance(exc, Exception):
+                result = DetectResult(path_info=entry.job.path_info, exc=exc)
+            else:
+                result = fut.result()
+            self._handle_detect_done(entry, result)
+        elif fut in self._inflight_unpack:
             node = self._inflight_unpack.pop(fut)
             exc = fut.exception()
             if exc is not None and isinstance(exc, Exception):
@@ -530,26 +1164,82 @@ class Scheduler:
                 )
             else:
                 report = fut.result()
+            # Followers copy a member leader's segment before the leader's
+            # own completion can release it.
+            self._fan_out(entry.job, report)
             self._handle_leaf_done(entry, report)
+        elif fut in self._inflight_batch:
+            self._handle_batch_done(fut)
         elif fut in self._inflight_repack:
             node = self._inflight_repack.pop(fut)
-            exc = fut.exception()
-            if exc is not None:
-                report = ReportStats(node.handler.original_path, exc=exc)
-            else:
-                report = fut.result()
-            self._handle_repack_done(node, report)
+            self._handle_repack_done(node, self._node_report(fut, node))
+        elif fut in self._inflight_append:
+            node = self._inflight_append.pop(fut)
+            self._handle_append_done(node, self._node_report(fut, node))
+
+    @staticmethod
+    def _node_report(fut: Future, node: ContainerNode) -> ReportStats:
+        """Return a repack or append future's report, or one for its crash."""
+        exc = fut.exception()
+        if exc is not None:
+            return ReportStats(node.handler.original_path, exc=exc)
+        return fut.result()
+
+    def _detect_resolved_nothing(
+        self, path_info: PathInfo, parent: ContainerNode | None
+    ) -> None:
+        """Finish a detected child that became no job (skip, noop, error)."""
+        if parent is not None:
+            # Pass the member through unmodified so repack keeps it.
+            parent.handler.get_optimized_contents().add(path_info)
+            self._child_done(parent)
+        elif path_info.path is not None:
+            self._dirs.child_done(path_info.path.parent)
+
+    def _handle_detect_done(self, entry: _DetectEntry, result: DetectResult) -> None:
+        """Process a DetectJob completion: queue the job it resolved into."""
+        parent = entry.parent
+        if parent is not None and parent.state is NodeState.CANCELLED:
+            self._child_done(parent)
+            return
+        if parent is None and self._fail_fast_triggered:
+            return
+        handler = None
+        if self._detect_done_callback is not None:
+            handler = self._detect_done_callback(self, parent, result)
+        # Resolved work jumps the queue of further detections.
+        match handler:
+            case ContainerHandler():
+                self._add_container(handler, parent, first=True)
+            case ImageHandler():
+                job = OptimizeLeafJob(handler=handler, path_info=result.path_info)
+                self._queue_leaf(job, parent, first=True)
+            case _:
+                self._detect_resolved_nothing(result.path_info, parent)
 
     def _handle_unpack_done(self, node: ContainerNode, result: UnpackResult) -> None:
         """Process an UnpackJob completion."""
+        node.unpacks -= 1
+        if node.stream_id is not None and not node.unpacks:
+            self._streams.pop(node.stream_id, None)
+        self._note_peak_rss(node, result.peak_rss)
         # Replace the pre-walk handler with its pickle-roundtripped,
         # walk()-mutated twin. See UnpackResult docstring for which
-        # attributes this restores.
+        # attributes this restores. Keep what streamed children and
+        # earlier shards already finished into the old one.
+        self._hold(
+            node, chain(result.children, result.handler.get_optimized_contents())
+        )
+        result.handler.merge_shard(node.handler)
         node.handler = result.handler
         node.staging_dir = result.handler.get_staging_dir()
+        self._own_segments(
+            node, chain(result.children, node.handler.get_optimized_contents())
+        )
 
         if node.state is NodeState.CANCELLED:
             self._cleanup_node_staging(node)
+            self._release_segments(node)
             return
 
         if result.exc is not None:
@@ -561,14 +1251,25 @@ class Scheduler:
             self._handle_repack_done(node, report)  # reuses finalize path
             return
 
+        if result.report is not None:
+            # Optimized inline by the unpack worker: finish it like a repack.
+            for report in result.errors:
+                self._reporter.record_report(report)
+            node.had_error = bool(result.errors)
+            node.state = NodeState.REPACKING
+            self._handle_repack_done(node, result.report)
+            return
+
         # Hand children to the walk layer so it can create handlers and
         # enqueue them back against this node as parent.
         self._child_enqueue_callback(self, node, result.children)
+        if node.unpacks:
+            return  # other shards are still reading their slices
+        node.state = NodeState.OPTIMIZING
         if node.pending == 0:
-            node.state = NodeState.OPTIMIZING
             self._maybe_start_repack(node)
         else:
-            node.state = NodeState.OPTIMIZING
+            self._maybe_append(node)
 
     def _handle_leaf_done(self, entry: _LeafEntry, report: ReportStats) -> None:
         """Process an OptimizeLeafJob completion."""
@@ -578,13 +1279,15 @@ class Scheduler:
 
         # In-container leaf: hydrate PathInfo from bytes, stash in parent.
         if parent is not None:
+            self._note_peak_rss(parent, report.peak_rss)
             if parent.state is NodeState.CANCELLED:
                 # drop on the floor, but still decrement so parent can
                 # eventually finalize (its own cancel walk will handle it)
+                self._release_report_data(report)
                 self._child_done(parent)
                 return
             if report.exc is None:
-                parent.handler.hydrate_optimized_path_info(entry.job.path_info, report)
+                self._hydrate(parent, entry.job.path_info, report)
                 parent.handler.get_optimized_contents().add(entry.job.path_info)
                 if report.changed:
                     parent.had_work = True
@@ -599,6 +1302,12 @@ class Scheduler:
             return
 
         # Top-level directory leaf: straight to totals + timestamps.
+        if entry.cost and report.exc is None:
+            self._memory_costs.observe(
+                cost_key(entry.job.handler),
+                entry.job.path_info.bytes_in(),
+                report.peak_rss,
+            )
         self._record_totals(report)
         self._write_timestamp(report, entry.job.path_info.top_path)
         if entry.job.path_info.path is not None:
@@ -606,6 +1315,52 @@ class Scheduler:
                 entry.job.path_info.path.parent, errored=bool(report.exc)
             )
 
+    def _handle_batch_done(self, fut: Future) -> None:
+        """Process an OptimizeBatchJob completion as each of its leaves."""
+        batch, parent = self._inflight_batch.pop(fut)
+        exc = fut.exception()
+        if exc is not None:
+            reports = [
+                ReportStats(job.path_info.path or job.handler.original_path, exc=exc)
+                for job in batch.jobs
+            ]
+        else:
+            reports = fut.result()
+        # Batched leaves never lead coalesced followers; nothing to fan out.
+        for job, report in zip(batch.jobs, reports, strict=True):
+            self._handle_leaf_done(_LeafEntry(job=job, parent=parent), report)
+
+    def _fan_out(self, leader: OptimizeLeafJob, report: ReportStats) -> None:
+        """Hand a coalesced leader's result to every leaf waiting on it."""
+        if leader.dedupe_key is None:
+            return
+        followers = self._followers.pop(leader.dedupe_key, [])
+        # A leader on disk that replaced its file leaves a result to adopt
+        # by relinking or copying; that file I/O runs in the pool.
+        source = None
+        if report.changed and report.exc is None and leader.path_info.path:
+            source = report.path
+        link = leader.dedupe_key[0] == DEDUPE_LINK
+        for job, parent in followers:
+            if source is None:
+                entry = _LeafEntry(job=job, parent=parent)
+                self._handle_leaf_done(entry, job.handler.adopt_report(report))
+            else:
+                follow = FollowJob(
+                    handler=job.handler,
+                    path_info=job.path_info,
+                    source=source,
+                    link=link,
+                )
+                self._ready.appendleft((follow, parent))
+
+    def _promote_followers(self, job: Job) -> None:
+        """Requeue the followers of a leader dropped before it ran."""
+        if not isinstance(job, OptimizeLeafJob) or job.dedupe_key is None:
+            return
+        for follower, parent in self._followers.pop(job.dedupe_key, []):
+            self._queue_leaf(follower, parent)
+
     def _handle_repack_failure(self, report: ReportStats, node: ContainerNode) -> None:
         if self._config.fail_fast:
             self._reporter.record_report(report)
@@ -641,7 +1396,11 @@ class Scheduler:
 
     def _handle_repack_done(self, node: ContainerNode, report: ReportStats) -> None:
         """Process a RepackJob completion (or synthesized no-op/error)."""
+        # The repack has read every member; their segments are spent.
+        self._release_segments(node)
+        self._note_peak_rss(node, report.peak_rss)
         if node.state is NodeState.CANCELLED:
+            self._release_report_data(report)
             self._cleanup_node_staging(node)
             self._retire_node(node)
             return
@@ -654,6 +1413,12 @@ class Scheduler:
         # Success: accumulate, timestamp, cleanup, notify parent.
         self._record_totals(report)
         if node.is_top_level():
+            if node.cost_key is not None:
+                self._memory_costs.observe(
+                    node.cost_key,
+                    node.handler.path_info.bytes_in(),
+                    node.peak_rss or None,
+                )
             top_path = node.handler.path_info.top_path
             # A member error inside means the container isn't fully
             # optimized; timestamping it would skip the failed member
@@ -671,7 +1436,7 @@ class Scheduler:
             # conversion rename (performed on the worker's pickled copy).
             parent = node.parent
             assert parent is not None
-            parent.handler.hydrate_optimized_path_info(node.handler.path_info, report)
+            self._hydrate(parent, node.handler.path_info, report)
             parent.handler.get_optimized_contents().add(node.handler.path_info)
             if report.changed:
                 parent.had_work = True
@@ -697,45 +1462,118 @@ class Scheduler:
         nodes, so this is safe on every completion path.
         """
         node.pending = max(0, node.pending - 1)
-        self._maybe_start_repack(node)
+        if node.pending:
+            self._maybe_append(node)
+        else:
+            self._maybe_start_repack(node)
 
     def _maybe_start_repack(self, node: ContainerNode) -> None:
         """If pending == 0, enqueue RepackJob or synthesize no-op completion."""
         if node.pending != 0 or node.state is NodeState.CANCELLED:
             return
-        if node.state in (NodeState.REPACKING, NodeState.DONE):
+        # An unpack still streaming children may have more to come.
+        if node.state in (NodeState.UNPACKING, NodeState.REPACKING, NodeState.DONE):
+            return
+        # The repack appends after the run an AppendJob is still writing.
+        if node.appending:
             return
 
-        # Respect the handler's own _do_repack flag (set during walk) OR
-        # whether any child produced replacement bytes. Handlers like
-        # Img2WebPAnimated set _do_repack=True unconditionally during walk()
-        # because format conversion always requires repacking even when no
-        # individual child was "optimized". A requested container format
-        # conversion (e.g. CBR -> CBZ) also needs a repack even when every
-        # member was already optimized.
-        if not node.handler.is_do_repack():
-            convert_intent = (
-                node.handler.repack_handler_class is not None
-                and type(node.handler) is not node.handler.repack_handler_class
-            )
-            node.handler.set_do_repack(do_repack=node.had_work or convert_intent)
-        if not node.handler.is_do_repack():
+        if not _resolve_do_repack(node.handler, had_work=node.had_work):
             # No work: synthesize a no-op completion so the parent chain
             # gets notified identically to a real repack.
-            noop = ReportStats(
-                node.handler.original_path,
-                bytes_in=node.handler.path_info.bytes_in(),
-                bytes_out=node.handler.path_info.bytes_in(),
-                changed=False,
-            )
-            self._handle_repack_done(node, noop)
+            self._handle_repack_done(node, _noop_repack_report(node.handler))
             return
 
         # Repack under the handler's own (per-directory) config.
         repack_handler = self._create_repack_handler(node.handler.config, node.handler)
+        if node.pack_path is not None:
+            repack_handler.set_append(append=True)
         node.handler = repack_handler
         self._ready.append((RepackJob(handler=repack_handler), node))
 
+    # ---------------------------------------------------- streaming repack
+
+    def _pop_appendable(self, node: ContainerNode) -> list[PathInfo]:
+        """
+        Take the finished members that continue the output, in order.
+
+        Returns nothing until the run is long enough to be worth a job.
+        Members a run is waiting on make the scan wait for more to finish.
+        """
+        contents = node.handler.get_optimized_contents()
+        if len(contents) < node.append_scan_at:
+            return []
+        by_index = {
+            path_info.archive_index: path_info
+            for path_info in contents
+            if path_info.archive_index is not None
+        }
+        run: list[PathInfo] = []
+        while (path_info := by_index.get(node.next_index + len(run))) is not None:
+            run.append(path_info)
+        if (
+            len(run) < _APPEND_MIN_MEMBERS
+            and sum(path_info.bytes_in() for path_info in run) < _APPEND_MIN_BYTES
+        ):
+            node.append_scan_at = len(contents) + _APPEND_MIN_MEMBERS - len(run)
+            return []
+        contents.difference_update(run)
+        node.next_index += len(run)
+        node.append_scan_at = 0
+        return run
+
+    def _maybe_append(self, node: ContainerNode) -> None:
+        """
+        Append a run of finished members to a streaming repack.
+
+        Only once some member changed, so the container will repack anyway,
+        and only for a container on disk: a nested container's output goes
+        back to its parent in memory regardless.
+        """
+        if (
+            node.state is not NodeState.OPTIMIZING
+            or node.appending
+            or not node.had_work
+            or not node.is_top_level()
+            or node.handler.path_info.path is None
+        ):
+            return
+        repack_class = node.handler.repack_handler_class or type(node.handler)
+        if not repack_class.CAN_APPEND or not (run := self._pop_appendable(node)):
+            return
+        repack_handler = self._create_repack_handler(node.handler.config, node.handler)
+        appender = repack_handler.copy_for_append(run)
+        appender.set_append(append=node.pack_path is not None)
+        node.pack_path = appender.pack_output_path()
+        node.appending = run
+        self._ready.appendleft((AppendJob(handler=appender), node))
+
+    def _handle_append_done(self, node: ContainerNode, report: ReportStats) -> None:
+        """Release an appended run's bytes and carry on with the container."""
+        self._note_peak_rss(node, report.peak_rss)
+        run, node.appending = node.appending, []
+        self._release_members(node, run)
+        if node.state is NodeState.CANCELLED:
+            # The append may have recreated the temp file after cleanup.
+            self._cleanup_node_staging(node)
+            return
+        if report.exc is not None:
+            self._handle_repack_failure(report, node)
+            return
+        if node.pending:
+            self._maybe_append(node)
+        else:
+            self._maybe_start_repack(node)
+
+    @staticmethod
+    def _note_peak_rss(node: ContainerNode, peak_rss: int | None) -> None:
+        """Attribute a job's peak memory to its top-level container."""
+        if peak_rss is None:
+            return
+        while node.parent is not None:
+            node = node.parent
+        node.peak_rss = max(node.peak_rss, peak_rss)
+
     def _record_totals(self, report: ReportStats) -> None:
         """Hand one ReportStats off to the Reporter for stats + progress + log."""
         self._reporter.record_report(report)
@@ -747,6 +1585,10 @@ class Scheduler:
 
     def _cleanup_node_staging(self, node: ContainerNode) -> None:
         """Rmtree this node's staging_dir, swallowing errors."""
+        if node.pack_path is not None:
+            # A streaming repack that didn't replace the container leaves
+            # its partial output; a finished one already moved it into place.
+            node.pack_path.unlink(missing_ok=True)
         if node.staging_dir is None:
             return
         try:
@@ -756,6 +1598,91 @@ class Scheduler:
         node.staging_dir = None
 
     def _cleanup_all_staging(self) -> None:
-        """Emergency cleanup: rmtree every live node's staging dir."""
+        """Emergency cleanup: rmtree every live node's staging dir and segments."""
         for node in list(self._live_nodes):
             self._cleanup_node_staging(node)
+            self._release_segments(node)
+
+    # ------------------------------------------------------ child streams
+
+    def _drain_streams(self) -> None:
+        """Enqueue every batch of children unpack workers have published."""
+        if self._stream_queue is None:
+            return
+        while True:
+            try:
+                stream_id, children = self._stream_queue.get_nowait()
+            except Empty:
+                return
+            node = self._streams.get(stream_id)
+            if node is None or node.state is NodeState.CANCELLED:
+                for child in children:
+                    if (shared := child.shared_buffer()) is not None:
+                        shared.unlink()
+                continue
+            self._own_segments(node, children)
+            self._hold(node, children)
+            self._child_enqueue_callback(self, node, children)
+
+    def _close_streams(self) -> None:
+        """Release undelivered batches and stop the stream's manager."""
+        self._streams.clear()
+        self._drain_streams()
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+        self._stream_queue = None
+
+    @staticmethod
+    def _hold(node: ContainerNode, path_infos: Iterable[PathInfo]) -> None:
+        """Count unpacked members held in memory against ``node``'s sub-budget."""
+        node.held += sum(
+            path_info.bytes_in()
+            for path_info in path_infos
+            if path_info.spill_path() is None and not path_info.is_in_source()
+        )
+
+    # ------------------------------------------------------- shared memory
+
+    @staticmethod
+    def _own_segments(node: ContainerNode, path_infos: Iterable[PathInfo]) -> None:
+        """Make ``node`` responsible for unlinking these entries' segments."""
+        for path_info in path_infos:
+            if (shared := path_info.shared_buffer()) is not None:
+                node.segments.add(shared)
+
+    @staticmethod
+    def _hydrate(
+        parent: ContainerNode, path_info: PathInfo, report: ReportStats
+    ) -> None:
+        """Hydrate a finished child onto its parent, trading its segments."""
+        old = path_info.shared_buffer()
+        parent.handler.hydrate_optimized_path_info(path_info, report)
+        if isinstance(report.data, SharedBuffer):
+            parent.segments.add(report.data)
+        if old is not None and path_info.shared_buffer() != old:
+            # The unoptimized bytes are dead weight now; free them early.
+            parent.segments.discard(old)
+            old.unlink()
+
+    @staticmethod
+    def _release_members(node: ContainerNode, path_infos: Iterable[PathInfo]) -> None:
+        """Free the bytes of members the output already holds."""
+        for path_info in path_infos:
+            if path_info.spill_path() is None and not path_info.is_in_source():
+                node.held = max(0, node.held - path_info.bytes_in())
+            if (shared := path_info.shared_buffer()) is not None:
+                node.segments.discard(shared)
+                shared.unlink()
+
+    @staticmethod
+    def _release_report_data(report: ReportStats) -> None:
+        """Unlink the segment of a result nobody will hydrate."""
+        if isinstance(report.data, SharedBuffer):
+            report.data.unlink()
+
+    @staticmethod
+    def _release_segments(node: ContainerNode) -> None:
+        """Unlink every segment ``node`` owns."""
+        while node.segments:
+            node.segments.pop().unlink()
@@ -25,11 +25,18 @@ from picopt.report import ReportStats
 from picopt.walk.grove import Grove
 from picopt.walk.handler_factory import HandlerFactory
 from picopt.walk.legacy_timestamps import OldTimestamps
-from picopt.walk.scheduler import ContainerNode, OptimizeLeafJob, Scheduler
+from picopt.walk.scheduler import (
+    ContainerNode,
+    DetectJob,
+    DetectResult,
+    OptimizeLeafJob,
+    Scheduler,
+)
 from picopt.walk.skip import WalkSkipper
 
 if TYPE_CHECKING:
     from argparse import Namespace
+    from collections.abc import Generator
 
     from picopt.config.settings import PicoptSettings
 
@@ -121,11 +128,39 @@ class Walk:
             roots = ", ".join(str(p) for p in dumped)
             logger.info(f"Dumped timestamps for: {roots}")
 
+    def _detect_error_report(
+        self, path_info: PathInfo, exc: Exception, *, in_container: bool
+    ) -> ReportStats:
+        """Build the report for a file that couldn't even be sniffed."""
+        path = (
+            Path(path_info.full_output_name())
+            if in_container
+            else path_info.path or Path()
+        )
+        return ReportStats(
+            path=path,
+            bytes_in=path_info.bytes_in(),
+            exc=exc,
+            config=self._config,
+            path_info=path_info,
+        )
+
     def _enqueue_children(
         self, sched: Scheduler, node: ContainerNode, children: list[PathInfo]
     ) -> None:
         """Bridge between scheduler and HandlerFactory for container children."""
+        leaves: list[OptimizeLeafJob] = []
         for path_info in children:
+            if path_info.detected is None and not path_info.noop:
+                # Unpack predetection failed or was skipped: sniff in the
+                # pool, not on this thread.
+                job = DetectJob(
+                    factory=self._handler_factory,
+                    path_info=path_info,
+                    settings=node.handler.config,
+                )
+                sched.enqueue_detect(job, parent=node)
+                continue
             try:
                 # Members inherit their container's (per-directory) config;
                 # nested containers pass it down automatically.
@@ -135,13 +170,7 @@ class Walk:
                 # bomb) is one error, not a run-ender. Pass it through
                 # unmodified so the repacked archive keeps it.
                 print_exc_unless_expected(exc)
-                report = ReportStats(
-                    path=Path(path_info.full_output_name()),
-                    bytes_in=path_info.bytes_in(),
-                    exc=exc,
-                    config=self._config,
-                    path_info=path_info,
-                )
+                report = self._detect_error_report(path_info, exc, in_container=True)
                 self._reporter.record_report(report)
                 node.handler.get_optimized_contents().add(path_info)
                 continue
@@ -152,13 +181,45 @@ class Walk:
             if isinstance(handler, ContainerHandler):
                 sched.enqueue_container(handler, parent=node)
             elif isinstance(handler, ImageHandler):
-                sched.enqueue_leaf(
-                    OptimizeLeafJob(handler=handler, path_info=path_info),
-                    parent=node,
-                )
+                leaves.append(OptimizeLeafJob(handler=handler, path_info=path_info))
+        if leaves:
+            sched.enqueue_leaves(leaves, parent=node)
+
+    def _detect_done(
+        self, sched: Scheduler, node: ContainerNode | None, result: DetectResult
+    ) -> Handler | None:
+        """
+        Finish a DetectJob on the main thread.
 
-    def walk_dir(self, dir_path_info: PathInfo, scheduler: Scheduler) -> None:
-        """Recursively walk a directory, enqueuing jobs into the scheduler."""
+        Records warnings and errors, attaches the run's timestamps, and
+        returns the handler to enqueue, or None to pass the file through.
+        """
+        path_info = result.path_info
+        if result.warning is not None:
+            self._handler_factory.record_warning(path_info, result.warning)
+        if result.exc is not None:
+            report = self._detect_error_report(
+                path_info, result.exc, in_container=node is not None
+            )
+            if node is None:
+                sched.accept_prebuilt_report(report, path_info.top_path)
+            else:
+                self._reporter.record_report(report)
+            return None
+        handler = result.handler
+        if handler is not None and not self._config.list_only:
+            self._handler_factory.attach_timestamps(handler, self._timestamps)
+            return handler
+        if node is None:
+            logger.debug(f"Skip: no handler: {path_info.full_output_name()}")
+            self._stats.record_skipped()
+            self._reporter.progress.mark_skipped()
+        return None
+
+    def walk_dir(
+        self, dir_path_info: PathInfo, scheduler: Scheduler
+    ) -> Generator[None]:
+        """Recursively walk a directory, yielding after each enqueued job."""
         if not dir_path_info.is_dir():
             return
 
@@ -191,7 +252,7 @@ class Walk:
                         path_info=dir_path_info,
                         path=entry_path,
                     )
-                    self.walk_file(path_info, scheduler)
+                    yield from self.walk_file(path_info, scheduler)
                 else:
                     files.append(entry_path)
 
@@ -200,27 +261,12 @@ class Walk:
                     path_info=dir_path_info,
                     path=entry_path,
                 )
-                self.walk_file(path_info, scheduler)
+                yield from self.walk_file(path_info, scheduler)
         except Exception:
             scheduler.cancel_dir(dir_path)
             raise
         scheduler.seal_dir(dir_path)
 
-    def _handle_file(
-        self, handler: Handler, path_info: PathInfo, scheduler: Scheduler
-    ) -> None:
-        """Enqueue the correct job for the handler type."""
-        match handler:
-            case ContainerHandler():
-                scheduler.enqueue_container(handler)
-            case ImageHandler():
-                scheduler.enqueue_leaf(
-                    OptimizeLeafJob(handler=handler, path_info=path_info),
-                )
-            case _:
-                msg = f"Bad picopt handler {handler}"
-                raise TypeError(msg)
-
     def _create_handler(
         self, path_info: PathInfo, settings: PicoptSettings | None = None
     ) -> Handler | None:
@@ -235,9 +281,9 @@ class Walk:
 
         return handler
 
-    def _walk_file_get_handler(
+    def _walk_file_enqueue(
         self, path_info: PathInfo, scheduler: Scheduler
-    ) -> Handler | None:
+    ) -> Generator[None]:
         settings: PicoptSettings | None = None
         if path_info.frame is None:
             skipper = self._skipper
@@ -247,44 +293,42 @@ class Walk:
                 settings = self._dirconfig.get_settings(path_info.top_path, dir_path)
 
             if skipper.is_walk_file_skip(path_info):
-                return None
+                return
 
             if path_info.is_dir():
-                self.walk_dir(path_info, scheduler)
-                return None
+                yield from self.walk_dir(path_info, scheduler)
+                return
 
             if skipper.is_older_than_timestamp(path_info):
-                return None
+                return
 
-        handler = self._create_handler(path_info, settings)
-        if not handler:
-            logger.debug(f"Skip: no handler: {path_info.full_output_name()}")
-            self._stats.record_skipped()
-            self._reporter.progress.mark_skipped()
-        return handler
+        # Format detection and handler construction run in the pool.
+        job = DetectJob(
+            factory=self._handler_factory, path_info=path_info, settings=settings
+        )
+        scheduler.enqueue_detect(job)
+        yield
 
-    def walk_file(self, path_info: PathInfo, scheduler: Scheduler) -> None:
+    def walk_file(self, path_info: PathInfo, scheduler: Scheduler) -> Generator[None]:
         """Optimize an individual file by enqueuing into the scheduler."""
         try:
-            if handler := self._walk_file_get_handler(path_info, scheduler):
-                self._handle_file(handler, path_info, scheduler)
+            yield from self._walk_file_enqueue(path_info, scheduler)
         except Exception as exc:
             print_exc_unless_expected(exc)
-            report = ReportStats(
-                path=path_info.path or Path(),
-                bytes_in=path_info.bytes_in(),
-                exc=exc,
-                config=self._config,
-                path_info=path_info,
-            )
+            report = self._detect_error_report(path_info, exc, in_container=False)
             scheduler.accept_prebuilt_report(report, path_info.top_path)
 
-    def _walk_top_path(self, top_path: Path, scheduler: Scheduler) -> None:
+    def _walk_top_path(self, top_path: Path, scheduler: Scheduler) -> Generator[None]:
         dirpath = Treestamps.get_dir(top_path)
         path_info = PathInfo(
             top_path=dirpath, convert=True, path=top_path, is_case_sensitive=None
         )
-        self.walk_file(path_info, scheduler)
+        yield from self.walk_file(path_info, scheduler)
+
+    def _walk_top_paths(self, scheduler: Scheduler) -> Generator[None]:
+        """Lazily walk every top path; the scheduler pulls this on demand."""
+        for top_path in self._top_paths:
+            yield from self._walk_top_path(top_path, scheduler)
 
     @staticmethod
     def _count_stops_here(
@@ -403,13 +447,13 @@ class Walk:
             max_workers=max_workers,
             create_repack_handler=HandlerFactory.create_repack_handler,
             child_enqueue_callback=self._enqueue_children,
+            detect_done_callback=self._detect_done,
+            handler_factory=self._handler_factory,
+            stream_children=True,
         )
 
         with progress:
-            for top_path in self._top_paths:
-                self._walk_top_path(top_path, scheduler)
-
-            scheduler.run()
+            scheduler.run(self._walk_top_paths(scheduler))
 
             self._executor.shutdown(wait=True)
 
@@ -1,14 +1,25 @@
 """Base class for testing images."""
 
+import inspect
 import shutil
 from collections.abc import Iterator
 from pathlib import Path
 from types import MappingProxyType
+from typing import TypeVar
 
 import pytest
 
+from picopt import PROGRAM_NAME, cli
+from picopt.config import PicoptConfig
+from picopt.log.reporter import Reporter
+from picopt.path import PathInfo
+from picopt.plugins.base import ContainerHandler
+from picopt.plugins.base.handler import Handler
+from picopt.walk.handler_factory import HandlerFactory
 from tests import IMAGES_DIR, get_test_dir
 
+_HandlerT = TypeVar("_HandlerT", bound=Handler)
+
 
 class BaseTest:
     """Test images dir."""
@@ -36,3 +47,31 @@ class BaseTest:
     def teardown_method(self: "BaseTest") -> None:
         """Tear down method."""
         shutil.rmtree(self.TMP_ROOT, ignore_errors=True)
+
+
+def make_handler(
+    path: Path,
+    formats: str,
+    handler_class: type[_HandlerT] = ContainerHandler,
+    path_info: PathInfo | None = None,
+    *,
+    convert: bool = False,
+) -> _HandlerT:
+    """
+    Build the handler for ``path`` as ``picopt -x formats path`` would.
+
+    An abstract ``handler_class`` lets the factory pick the handler; a
+    concrete one is built directly.
+    """
+    args = cli.get_arguments((PROGRAM_NAME, "-x", formats, str(path)))
+    config = PicoptConfig().get_config(args)
+    if path_info is None:
+        path_info = PathInfo(top_path=path.parent, path=path, convert=convert)
+    if inspect.isabstract(handler_class):
+        handler = HandlerFactory(config, Reporter()).create_handler(path_info)
+    else:
+        handler = handler_class(
+            config, path_info, input_file_format=handler_class.OUTPUT_FILE_FORMAT
+        )
+    assert isinstance(handler, handler_class)
+    return handler
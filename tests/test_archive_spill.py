@@ -0,0 +1,113 @@
+"""Test staging archive members on disk instead of in memory."""
+
+import shutil
+from pathlib import Path
+from typing import Any
+from zipfile import ZipFile
+
+import pytest
+
+from picopt import PROGRAM_NAME, cli
+from picopt.plugins import seven_zip
+from picopt.plugins.base import ContainerHandler, archive
+from tests import CONTAINER_DIR
+from tests.base import make_handler
+
+__all__ = ()  # hides module from pydocstring
+
+_FN = "test_zip.zip"
+_SEVEN_ZIP_FN = "test_7z.7z"
+_FORMATS = "ZIP,TAR,7Z"
+_ARGS = (PROGRAM_NAME, "-x", _FORMATS)
+_FNS = (_FN, "test_tar.tar", _SEVEN_ZIP_FN)
+
+
+def _handler(path: Path) -> ContainerHandler:
+    return make_handler(path, _FORMATS)
+
+
+class TestArchiveSpill:
+    """Spilled members read back from the staging dir."""
+
+    @pytest.mark.parametrize("fn", _FNS)
+    def test_large_members_spill(
+        self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, fn: str
+    ) -> None:
+        """Members over the threshold live in files under the staging dir."""
+        monkeypatch.setattr(archive, "_SPILL_MIN_BYTES", 1)
+        path = tmp_path / fn
+        shutil.copy(CONTAINER_DIR / fn, path)
+        handler = _handler(path)
+        children = list(handler.walk())
+        staging_dir = handler.get_staging_dir()
+        assert staging_dir is not None
+        try:
+            assert children
+            # Skipped members read for repack spill too; unchanged zip members
+            # stay in the source archive.
+            members = [
+                member
+                for member in (*children, *handler.get_optimized_contents())
+                if not member.is_in_source() and member.bytes_in()
+            ]
+            # A bulk extraction leaves its spilled members in a subdir.
+            spilled = [spill for spill in staging_dir.rglob("*") if spill.is_file()]
+            assert len(spilled) == len(members)
+            assert sorted(member.data() for member in members) == sorted(
+                spill.read_bytes() for spill in spilled
+            )
+        finally:
+            shutil.rmtree(staging_dir)
+
+    @pytest.mark.parametrize("spill", [False, True])
+    def test_tight_memory_spills(
+        self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, *, spill: bool
+    ) -> None:
+        """Under memory pressure members under the size threshold spill too."""
+        monkeypatch.setattr(archive, "_SPILL_TIGHT_MIN_BYTES", 1)
+        path = tmp_path / _FN
+        shutil.copy(CONTAINER_DIR / _FN, path)
+        handler = _handler(path)
+        handler.set_spill(spill=spill)
+        assert list(handler.walk())
+        staging_dir = handler.get_staging_dir()
+        assert (staging_dir is not None) is spill
+        if staging_dir is not None:
+            shutil.rmtree(staging_dir)
+
+    def test_spilled_repack_matches(
+        self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Spilling members doesn't change the optimized archive."""
+        outputs = []
+        for spill_min_bytes in (archive._SPILL_MIN_BYTES, 1):
+            monkeypatch.setattr(archive, "_SPILL_MIN_BYTES", spill_min_bytes)
+            path = tmp_path / str(spill_min_bytes) / _FN
+            path.parent.mkdir()
+            shutil.copy(CONTAINER_DIR / _FN, path)
+            cli.main((*_ARGS, str(path)))
+            outputs.append(path.read_bytes())
+        assert outputs[0] == outputs[1]
+        with ZipFile(tmp_path / "1" / _FN) as zf:
+            assert zf.testzip() is None
+
+    def test_seven_zip_pool_spills(
+        self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """7z members beyond the extraction memory pool are staged on disk."""
+        monkeypatch.setattr(seven_zip, "_MEMORY_POOL_MEMBERS", 0)
+        monkeypatch.setattr(seven_zip.SevenZip, "_external_tool", lambda _self: None)
+        path = tmp_path / _SEVEN_ZIP_FN
+        shutil.copy(CONTAINER_DIR / _SEVEN_ZIP_FN, path)
+        handler = _handler(path)
+        members = [child for child in handler.walk() if child.bytes_in()]
+        staging_dir = handler.get_staging_dir()
+        assert staging_dir is not None
+        try:
+            assert members
+            assert all(member.spill_path() for member in members)
+            assert sorted(member.data() for member in members) == sorted(
+                spill.read_bytes() for spill in staging_dir.iterdir()
+            )
+        finally:
+            shutil.rmtree(staging_dir)
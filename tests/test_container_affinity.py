@@ -0,0 +1,65 @@
+"""Test optimizing small containers inside their unpack worker."""
+
+import shutil
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from picopt import PROGRAM_NAME, cli
+from picopt.log.reporter import Reporter
+from picopt.walk import scheduler
+from picopt.walk.handler_factory import HandlerFactory
+from picopt.walk.scheduler import UnpackJob
+from tests import CONTAINER_DIR
+from tests.base import make_handler
+
+__all__ = ()  # hides module from pydocstring
+
+_FN = "test_zip.zip"
+_ARGS = (PROGRAM_NAME, "-x", "ZIP")
+
+
+def _unpack_job(path: Path, *, inline: bool) -> UnpackJob:
+    handler = make_handler(path, "ZIP")
+    factory = HandlerFactory(handler.config, Reporter()) if inline else None
+    return UnpackJob(handler=handler, factory=factory)
+
+
+class TestContainerAffinity:
+    """Small containers skip the fan-out but end up the same."""
+
+    def test_small_container_runs_inline(self: Any, tmp_path: Path) -> None:
+        """The unpack worker returns a finished repack report."""
+        path = tmp_path / _FN
+        shutil.copy(CONTAINER_DIR / _FN, path)
+        result = _unpack_job(path, inline=True).run()
+        assert result.exc is None
+        assert result.report is not None
+        assert result.report.exc is None
+        assert result.report.changed
+        assert not result.children
+        assert not result.handler.get_optimized_contents()
+
+    def test_without_factory_fans_out(self: Any, tmp_path: Path) -> None:
+        """With no factory the unpack worker only lists the members."""
+        path = tmp_path / _FN
+        shutil.copy(CONTAINER_DIR / _FN, path)
+        result = _unpack_job(path, inline=False).run()
+        assert result.report is None
+        assert result.children
+
+    def test_inline_matches_fan_out(
+        self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Both paths write the same archive."""
+        outputs = []
+        for inline_max_bytes in (scheduler._INLINE_MAX_BYTES, -1):
+            monkeypatch.setattr(scheduler, "_INLINE_MAX_BYTES", inline_max_bytes)
+            path = tmp_path / str(inline_max_bytes) / _FN
+            path.parent.mkdir()
+            shutil.copy(CONTAINER_DIR / _FN, path)
+            cli.main((*_ARGS, str(path)))
+            outputs.append(path.read_bytes())
+        assert outputs[0] == outputs[1]
+        assert len(outputs[0]) < (CONTAINER_DIR / _FN).stat().st_size
@@ -0,0 +1,145 @@
+"""Test in-run coalescing of identical inputs."""
+
+from pathlib import Path
+from typing import Any
+
+from picopt import cli
+from picopt.config import PicoptConfig
+from picopt.path import PathInfo
+from picopt.plugins.base.format import FileFormat
+from picopt.report import ReportStats
+from picopt.walk.scheduler import FollowJob, OptimizeLeafJob, Scheduler
+from tests.test_result_cache import _CountingHandler, _make_settings
+
+__all__ = ()  # hides module from pydocstring
+
+_KEY = ("member", "digest")
+_SAVED = b"saved"
+
+
+class _FakePathInfo:
+    """Minimal PathInfo stand-in exposing only what the scheduler reads."""
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path = path
+
+    def bytes_in(self) -> int:
+        return 1
+
+
+class _FakeHandler:
+    """Minimal ImageHandler stand-in with a fixed dedupe key."""
+
+    OUTPUT_FORMAT_STR = "PNG"
+    input_file_format = FileFormat("PNG")
+
+    def __init__(self, path: Path | None = None) -> None:
+        self.path_info = _FakePathInfo(path)
+        self.adopted: ReportStats | None = None
+
+    def dedupe_key(self) -> tuple[str, ...]:
+        return _KEY
+
+    def adopt_report(self, leader: ReportStats) -> ReportStats:
+        self.adopted = leader
+        return leader
+
+
+class _StubExecutor:
+    """Records submissions and returns opaque futures that never run."""
+
+    def __init__(self) -> None:
+        self.submitted: list[Any] = []
+
+    def submit(self, fn: Any) -> object:
+        self.submitted.append(fn)
+        return object()
+
+
+def _make_scheduler() -> "tuple[Scheduler, list[Any]]":
+    args = cli.get_arguments(("picopt", "."))
+    config = PicoptConfig().get_config(args)
+    scheduler = Scheduler(
+        config=config,
+        executor=_StubExecutor(),  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        timestamps=None,
+        reporter=None,  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        max_workers=2,
+        create_repack_handler=lambda *_a: None,  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        child_enqueue_callback=lambda *_a: None,
+    )
+    done: list[Any] = []
+    scheduler._handle_leaf_done = lambda entry, report: done.append((entry, report))  # pyright: ignore[reportAttributeAccessIssue]  # ty: ignore[invalid-assignment]
+    return scheduler, done
+
+
+def _leaf(path: Path | None = None) -> OptimizeLeafJob:
+    handler = _FakeHandler(path)
+    return OptimizeLeafJob(handler=handler, path_info=handler.path_info)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+
+
+class TestSchedulerDedupe:
+    """Identical leaves run once and share the result."""
+
+    def test_followers_adopt_leader_report(self: Any) -> None:
+        """Only the leader is queued; the rest adopt its report."""
+        scheduler, done = _make_scheduler()
+        leader, follower = _leaf(), _leaf()
+        scheduler._queue_leaf(leader, None)
+        scheduler._queue_leaf(follower, None)
+        assert [job for job, _ in scheduler._ready] == [leader]
+        report = ReportStats(Path("a.png"), data=_SAVED, changed=True)
+        scheduler._fan_out(leader, report)
+        assert follower.handler.adopted is report  # pyright: ignore[reportAttributeAccessIssue]  # ty: ignore[unresolved-attribute]
+        assert [entry.job for entry, _ in done] == [follower]
+        assert not scheduler._followers
+
+    def test_changed_file_leader_queues_follow(self: Any, tmp_path: Path) -> None:
+        """Followers of a rewritten file copy it in the pool."""
+        scheduler, done = _make_scheduler()
+        leader, follower = _leaf(tmp_path / "a.png"), _leaf(tmp_path / "b.png")
+        scheduler._queue_leaf(leader, None)
+        scheduler._queue_leaf(follower, None)
+        scheduler._ready.clear()
+        scheduler._fan_out(leader, ReportStats(tmp_path / "a.png", changed=True))
+        assert not done
+        ((follow, _),) = scheduler._ready
+        assert isinstance(follow, FollowJob)
+        assert follow.handler is follower.handler
+        assert follow.source == tmp_path / "a.png"
+        assert not follow.link
+
+    def test_dropped_leader_promotes_follower(self: Any) -> None:
+        """A leader dropped before running hands leadership on."""
+        scheduler, _ = _make_scheduler()
+        leader, follower = _leaf(), _leaf()
+        scheduler._queue_leaf(leader, None)
+        scheduler._queue_leaf(follower, None)
+        scheduler._ready.clear()
+        scheduler._promote_followers(leader)
+        assert [job for job, _ in scheduler._ready] == [follower]
+        assert follower.dedupe_key == _KEY
+
+
+class TestFollowWrapper:
+    """Followers on disk land the leader's result like their own."""
+
+    def test_hardlinks_stay_linked(self: Any, tmp_path: Path) -> None:
+        """A hardlink is relinked to the leader's rewritten file."""
+        settings = _make_settings(tmp_path / "cache")
+        leader_path, follower_path = tmp_path / "a.png", tmp_path / "b.png"
+        leader_path.write_bytes(b"original")
+        follower_path.hardlink_to(leader_path)
+        path_info = PathInfo(top_path=tmp_path, path=follower_path, convert=False)
+        handler = _CountingHandler(
+            settings, path_info, _CountingHandler.OUTPUT_FILE_FORMAT
+        )
+        assert handler.dedupe_key() is not None
+
+        leader_path.unlink()
+        leader_path.write_bytes(_SAVED)
+        report = handler.follow_wrapper(leader_path, link=True)
+        assert report.exc is None
+        assert report.changed
+        assert follower_path.read_bytes() == _SAVED
+        assert follower_path.stat().st_ino == leader_path.stat().st_ino
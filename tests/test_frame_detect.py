@@ -0,0 +1,42 @@
+"""Test that animation frames arrive detected as detect_format() would."""
+
+import pytest
+
+from picopt import PROGRAM_NAME, cli
+from picopt.config import PicoptConfig
+from picopt.path import PathInfo
+from picopt.plugins.webp.animated import PILPackWebPAnimatedLossless
+from picopt.walk.detect_format import detect_format
+from tests import IMAGES_DIR
+
+__all__ = ()
+
+FNS = ("test_animated_gif.gif", "test_animated_png.png", "test_animated_webp.webp")
+
+
+@pytest.mark.parametrize("keep_metadata", [True, False])
+@pytest.mark.parametrize("fn", FNS)
+def test_frames_predetected(fn: str, *, keep_metadata: bool) -> None:
+    """Extracted frames carry the format and info a sniff would find."""
+    path = IMAGES_DIR / fn
+    argv = [PROGRAM_NAME, str(path)]
+    if not keep_metadata:
+        argv.insert(1, "-M")
+    config = PicoptConfig().get_config(cli.get_arguments(argv))
+    handler = PILPackWebPAnimatedLossless(
+        config,
+        PathInfo(top_path=path.parent, path=path, convert=False),
+        input_file_format=PILPackWebPAnimatedLossless.OUTPUT_FILE_FORMAT,
+        info={},
+    )
+    frames = list(handler.walk())
+    assert frames
+    for frame in frames:
+        assert frame.detected is not None
+        sniffed = PathInfo(
+            path_info=frame,
+            frame=frame.frame,
+            data=frame.data(),
+            container_parents=frame.container_path_history(),
+        )
+        assert frame.detected == detect_format(sniffed, keep_metadata=keep_metadata)
@@ -0,0 +1,91 @@
+"""Test learned per-format memory costs."""
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from picopt.memory_costs import MemoryCosts, PeakRss
+
+__all__ = ()  # hides module from pydocstring
+
+_DEFAULT = 3
+_KEY = "PNG lossless -> PNG"
+_MIB = 1024 * 1024
+_SIZE = 10 * _MIB
+_CAN_RESET_PEAK = Path("/proc/self/clear_refs").exists()
+
+
+class TestPeakRss:
+    """Jobs measure the memory they add."""
+
+    @pytest.mark.skipif(not _CAN_RESET_PEAK, reason="needs /proc peak reset")
+    def test_measures_allocation(self: Any) -> None:
+        """A large allocation shows up in the peak."""
+        with PeakRss() as rss:
+            buf = bytearray(4 * _SIZE)
+            del buf
+        assert rss.peak is not None
+        assert rss.peak >= 2 * _SIZE
+
+    def test_nested_defers_to_outermost(self: Any) -> None:
+        """An inner measurement can't reset the outer one's peak."""
+        with PeakRss(), PeakRss() as inner:
+            pass
+        assert inner.peak is None
+
+
+class TestMemoryCosts:
+    """Ratios are learned per format and persist."""
+
+    def test_unknown_format_uses_default(self: Any) -> None:
+        """Until a format is observed the default factor applies."""
+        costs = MemoryCosts(_DEFAULT)
+        assert costs.estimate(_KEY, _SIZE) == _SIZE * _DEFAULT
+
+    def test_learns_fast_up_slow_down(self: Any) -> None:
+        """A hungry observation raises the ratio more than a lean one lowers it."""
+        costs = MemoryCosts(_DEFAULT)
+        costs.observe(_KEY, _SIZE, 2 * _SIZE)
+        assert costs.estimate(_KEY, _SIZE) == 2 * _SIZE
+        costs.observe(_KEY, _SIZE, 10 * _SIZE)
+        raised = costs.estimate(_KEY, _SIZE)
+        assert raised == 6 * _SIZE
+        costs.observe(_KEY, _SIZE, 2 * _SIZE)
+        lowered = costs.estimate(_KEY, _SIZE)
+        assert 5 * _SIZE < lowered < raised
+
+    def test_small_items_and_unmeasured_dont_teach(self: Any) -> None:
+        """Start-up overhead on tiny files says nothing about scaling."""
+        costs = MemoryCosts(_DEFAULT)
+        costs.observe(_KEY, 1024, 100 * _MIB)
+        costs.observe(_KEY, _SIZE, None)
+        assert costs.estimate(_KEY, _SIZE) == _SIZE * _DEFAULT
+
+    def test_persists_in_cache_dir(self: Any, tmp_path: Path) -> None:
+        """Learned ratios survive to the next run."""
+        costs = MemoryCosts.from_cache_dir(_DEFAULT, tmp_path)
+        costs.observe(_KEY, _SIZE, _SIZE)
+        costs.save()
+        reloaded = MemoryCosts.from_cache_dir(_DEFAULT, tmp_path)
+        assert reloaded.estimate(_KEY, _SIZE) == _SIZE
+        assert [path.name for path in tmp_path.iterdir()] == ["memory_costs.json"]
+
+    def test_lean_observations_floor_at_input_size(self: Any) -> None:
+        """Workers reusing freed heap can't wear the ratio below 1."""
+        costs = MemoryCosts(_DEFAULT)
+        for _ in range(100):
+            costs.observe(_KEY, _SIZE, _MIB)
+        assert costs.estimate(_KEY, _SIZE) == _SIZE
+
+    def test_loaded_ratio_floored(self: Any, tmp_path: Path) -> None:
+        """A worn-down ratio saved by an older run loads at the floor."""
+        (tmp_path / "memory_costs.json").write_text(f'{{"{_KEY}": 0.01}}')
+        costs = MemoryCosts.from_cache_dir(_DEFAULT, tmp_path)
+        assert costs.estimate(_KEY, _SIZE) == _SIZE
+
+    def test_corrupt_file_ignored(self: Any, tmp_path: Path) -> None:
+        """An unreadable costs file falls back to the default."""
+        (tmp_path / "memory_costs.json").write_text("{not json")
+        costs = MemoryCosts.from_cache_dir(_DEFAULT, tmp_path)
+        assert costs.estimate(_KEY, _SIZE) == _SIZE * _DEFAULT
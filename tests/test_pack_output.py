@@ -0,0 +1,80 @@
+"""Test packing containers straight into their sibling temp file."""
+
+import shutil
+from io import BufferedRandom, BytesIO
+from pathlib import Path
+from typing import Any
+from zipfile import ZipFile
+
+import pytest
+
+from picopt import PROGRAM_NAME, WORKING_SUFFIX, cli
+from picopt.path import PathInfo
+from picopt.plugins.zip import Zip
+from tests import CONTAINER_DIR
+from tests.base import make_handler
+
+__all__ = ()  # hides module from pydocstring
+
+_FN = "test_zip.zip"
+_ARGS = (PROGRAM_NAME, "-x", "ZIP")
+
+
+def _zip(tmp_path: Path) -> Path:
+    path = tmp_path / _FN
+    shutil.copy(CONTAINER_DIR / _FN, path)
+    return path
+
+
+def _handler(path: Path, path_info: PathInfo) -> Zip:
+    return make_handler(path, "ZIP", Zip, path_info)
+
+
+class TestPackOutput:
+    """Containers on disk pack into a file; nested ones into memory."""
+
+    def test_on_disk_packs_into_temp_file(self: Any, tmp_path: Path) -> None:
+        """The pack output is the sibling temp file that replaces the zip."""
+        path = _zip(tmp_path)
+        handler = _handler(path, PathInfo(top_path=tmp_path, path=path, convert=False))
+        with handler.open_pack_output() as output:
+            assert isinstance(output, BufferedRandom)
+            assert Path(output.name) == path.with_name(_FN + WORKING_SUFFIX)
+        assert handler.working_path == Path(output.name)
+
+    def test_nested_packs_into_memory(self: Any, tmp_path: Path) -> None:
+        """A nested container's bytes go back to its parent in memory."""
+        path = _zip(tmp_path)
+        parent = PathInfo(top_path=tmp_path, path=path, convert=False)
+        nested = PathInfo(path_info=parent, data=path.read_bytes(), convert=False)
+        handler = _handler(path, nested)
+        assert isinstance(handler.open_pack_output(), BytesIO)
+        assert handler.working_path == handler.original_path
+
+    @pytest.mark.parametrize("dry_run", [False, True])
+    def test_no_temp_file_left(self: Any, tmp_path: Path, *, dry_run: bool) -> None:
+        """Kept or discarded, the temp file doesn't outlive the run."""
+        path = _zip(tmp_path)
+        before = path.read_bytes()
+        args = (*_ARGS, "--dry_run") if dry_run else _ARGS
+        cli.main((*args, str(path)))
+        assert [child.name for child in tmp_path.iterdir()] == [_FN]
+        assert (path.read_bytes() == before) is dry_run
+        with ZipFile(path) as zf:
+            assert zf.testzip() is None
+
+    def test_failed_pack_removes_temp_file(
+        self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A pack that fails halfway leaves the original untouched."""
+        path = _zip(tmp_path)
+        before = path.read_bytes()
+
+        def _fail(*_args: Any) -> None:
+            msg = "disk full"
+            raise OSError(msg)
+
+        monkeypatch.setattr(Zip, "_archive_write", _fail)
+        cli.main((*_ARGS, str(path)))
+        assert [child.name for child in tmp_path.iterdir()] == [_FN]
+        assert path.read_bytes() == before
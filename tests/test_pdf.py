@@ -41,6 +41,9 @@ import pikepdf
 import pytest
 
 from picopt import PROGRAM_NAME, cli
+from picopt.config import PicoptConfig
+from picopt.path import PathInfo
+from picopt.plugins.pdf import Pdf
 from tests import assert_size_close, get_test_dir
 from tests.base import BaseTest
 
@@ -376,3 +379,95 @@ class TestPdfHuntedFixtures:
                     # Must still decode.
                     pikepdf.PdfImage(obj).as_pil_image()
             assert jbig2_count >= 1, "jbig2.pdf has no JBIG2 streams — wrong fixture"
+
+
+# ---------------------------------------------------------------------------
+# Stream index
+# ---------------------------------------------------------------------------
+
+
+def _pdf_handler(path: Path) -> Pdf:
+    config = PicoptConfig().get_config(
+        cli.get_arguments((PROGRAM_NAME, "-x", "PDF", str(path.parent)))
+    )
+    path_info = PathInfo(top_path=path.parent, path=path, convert=False)
+    return Pdf(config, path_info, input_file_format=Pdf.OUTPUT_FILE_FORMAT)
+
+
+class TestPdfStreamIndex:
+    """walk() indexes the streams in one pass and reads JPEGs from it."""
+
+    def test_yields_each_dct_image(self: TestPdfStreamIndex) -> None:
+        """Exactly the single-filter DCT images come out as children."""
+        path = PDF_FIXTURE_DIR / "smask.pdf"
+        handler = _pdf_handler(path)
+        children = list(handler.walk())
+        with pikepdf.open(path) as pdf:
+            jpegs = {
+                "pdf_obj_{}_{}.jpg".format(*obj.objgen)
+                for obj in pdf.objects
+                if isinstance(obj, pikepdf.Stream)
+                and obj.get(pikepdf.Name.Subtype) == pikepdf.Name.Image
+                and obj.get(pikepdf.Name.Filter) == pikepdf.Name.DCTDecode
+            }
+        assert len(jpegs) == 1
+        assert {
+            child.archiveinfo.filename() for child in children if child.archiveinfo
+        } == jpegs
+        assert handler.is_do_repack()
+
+    def test_multi_filter_image_is_not_a_jpeg(self: TestPdfStreamIndex) -> None:
+        """A wrapped DCT image is not yielded; the rewrite still runs."""
+        handler = _pdf_handler(PDF_FIXTURE_DIR / "multi_filter.pdf")
+        assert not list(handler.walk())
+        assert handler.is_do_repack()
+
+    def test_signature_object_refuses(self: TestPdfStreamIndex, tmp_path: Path) -> None:
+        """A /Type /Sig dictionary without SigFlags still refuses the rewrite."""
+        path = tmp_path / "sig_object.pdf"
+        with pikepdf.open(PDF_FIXTURE_DIR / "photo_jpeg.pdf") as pdf:
+            pdf.Root.Sig = pdf.make_indirect(pikepdf.Dictionary(Type=pikepdf.Name.Sig))
+            pdf.save(path)
+        handler = _pdf_handler(path)
+        assert not list(handler.walk())
+        assert not handler.is_do_repack()
+
+
+class TestPdfCompact:
+    """An already compact PDF skips the structural rewrite."""
+
+    @pytest.mark.parametrize(
+        ("fn", "repack"),
+        [("text_optimized.pdf", False), ("text_bloated.pdf", True)],
+    )
+    def test_fixture_repack(self: TestPdfCompact, fn: str, *, repack: bool) -> None:
+        """Only a PDF qpdf would shrink is repacked."""
+        handler = _pdf_handler(PDF_FIXTURE_DIR / fn)
+        list(handler.walk())
+        assert handler.is_do_repack() is repack
+
+    def test_weak_flate_repacks(self: TestPdfCompact, tmp_path: Path) -> None:
+        """Object streams alone don't make a PDF compact if Flate is weak."""
+        path = tmp_path / "weak_flate.pdf"
+        pikepdf.settings.set_flate_compression_level(1)
+        try:
+            with pikepdf.open(PDF_FIXTURE_DIR / "text_bloated.pdf") as pdf:
+                pdf.save(
+                    path,
+                    object_stream_mode=pikepdf.ObjectStreamMode.generate,
+                    compress_streams=True,
+                )
+        finally:
+            pikepdf.settings.set_flate_compression_level(-1)
+        handler = _pdf_handler(path)
+        list(handler.walk())
+        assert handler.is_do_repack()
+
+    def test_second_run_skips_rewrite(self: TestPdfCompact, tmp_path: Path) -> None:
+        """A PDF picopt already rewrote is left alone."""
+        path = tmp_path / "text_bloated.pdf"
+        shutil.copy(PDF_FIXTURE_DIR / "text_bloated.pdf", path)
+        _run_picopt(path)
+        handler = _pdf_handler(path)
+        list(handler.walk())
+        assert not handler.is_do_repack()
@@ -46,7 +46,10 @@ class TestPdfEncryptionPreserved:
         )
         path_info = PathInfo(top_path=TMP_ROOT, path=restricted_path, convert=False)
         handler = Pdf(config, path_info, input_file_format=Pdf.OUTPUT_FILE_FORMAT)
-        output_buffer = handler.pack_into()
+        # An on-disk PDF packs straight into its sibling temp file.
+        with handler.pack_into() as output_buffer:
+            output_buffer.seek(0)
+            output = output_buffer.read()
 
-        with pikepdf.open(BytesIO(output_buffer.getvalue())) as repacked:
+        with pikepdf.open(BytesIO(output)) as repacked:
             assert repacked.is_encrypted
@@ -0,0 +1,53 @@
+"""Test extracting solid RAR archives in one pass."""
+
+import shutil
+from pathlib import Path
+from typing import Any
+
+import pytest
+from rarfile import RarFile
+
+from picopt.plugins.rar import Cbr
+from tests import CONTAINER_DIR
+from tests.base import make_handler
+
+__all__ = ()  # hides module from pydocstring
+
+_FN = "test_cbr.cbr"
+_HAS_UNRAR = shutil.which("unrar") is not None
+
+
+def _handler(tmp_path: Path) -> Cbr:
+    path = tmp_path / _FN
+    shutil.copy(CONTAINER_DIR / _FN, path)
+    return make_handler(path, "CBR,CBZ", Cbr, convert=True)
+
+
+class TestRarBulk:
+    """Solid archives are extracted once; others member by member."""
+
+    def test_non_solid_reads_members(self: Any, tmp_path: Path) -> None:
+        """A non-solid archive gains nothing from bulk extraction."""
+        handler = _handler(tmp_path)
+        with RarFile(handler.path_info.path) as archive:
+            assert handler._bulk_extract(archive) is None
+        assert handler.get_staging_dir() is None
+
+    @pytest.mark.skipif(not _HAS_UNRAR, reason="needs unrar")
+    def test_solid_extracts_once(
+        self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Members read from the one extraction match rarfile's reads."""
+        with RarFile(CONTAINER_DIR / _FN) as archive:
+            expected = {
+                info.filename: archive.read(info) for info in archive.infolist()
+            }
+        monkeypatch.setattr(RarFile, "is_solid", lambda _self: True)
+        handler = _handler(tmp_path)
+        children = list(handler.walk())
+        staging_dir = handler.get_staging_dir()
+        assert staging_dir is not None
+        try:
+            assert {child.name(): child.data() for child in children} == expected
+        finally:
+            shutil.rmtree(staging_dir)
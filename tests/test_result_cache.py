@@ -0,0 +1,172 @@
+"""Test the persistent result cache."""
+
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO
+
+import pytest
+from typing_extensions import override
+
+from picopt import PROGRAM_NAME, cli
+from picopt.cache import ResultCache, result_key
+from picopt.config import PicoptConfig
+from picopt.config.settings import PicoptSettings
+from picopt.path import PathInfo
+from picopt.plugins.base.format import FileFormat
+from picopt.plugins.base.handler import Handler
+
+__all__ = ()
+
+_ORIGINAL_DATA = b"original image data" * 64
+_OPTIMIZED_DATA = b"optimized"
+_PNG_FORMAT = FileFormat("PNG", lossless=True, animated=False)
+_BLOB_SIZE = 4096
+_MAX_SIZE = _BLOB_SIZE * 3 + _BLOB_SIZE // 2
+
+
+class _CountingHandler(Handler):
+    """Handler whose optimize() returns a fixed result and counts calls."""
+
+    OUTPUT_FORMAT_STR = "PNG"
+    OUTPUT_FILE_FORMAT = _PNG_FORMAT
+    SUFFIXES = (".png",)
+    result: bytes = _OPTIMIZED_DATA
+    calls: int = 0
+
+    @override
+    def optimize(self) -> BinaryIO:
+        type(self).calls += 1
+        return BytesIO(self.result)
+
+
+@pytest.fixture
+def counting(monkeypatch: pytest.MonkeyPatch) -> type[_CountingHandler]:
+    """Reset the handler's call count and result for each test."""
+    monkeypatch.setattr(_CountingHandler, "calls", 0)
+    monkeypatch.setattr(_CountingHandler, "result", _OPTIMIZED_DATA)
+    return _CountingHandler
+
+
+def _make_settings(cache_dir: Path, *args: str) -> PicoptSettings:
+    argv = (PROGRAM_NAME, "--cache-dir", str(cache_dir), *args, ".")
+    return PicoptConfig().get_config(cli.get_arguments(argv))
+
+
+def _optimize_copy(settings: PicoptSettings, path: Path) -> int:
+    path.write_bytes(_ORIGINAL_DATA)
+    path_info = PathInfo(top_path=path.parent, path=path, convert=False)
+    report = _CountingHandler(settings, path_info, _PNG_FORMAT).optimize_wrapper()
+    assert report.exc is None
+    return report.bytes_out
+
+
+class TestResultCache:
+    """Cache hits stand in for re-running the pipeline."""
+
+    def test_identical_bytes_hit_across_trees(
+        self, tmp_path: Path, counting: type[_CountingHandler]
+    ) -> None:
+        """A copy of an already-optimized file is served from the cache."""
+        settings = _make_settings(tmp_path / "cache")
+        for tree in ("a", "b"):
+            (tmp_path / tree).mkdir()
+            path = tmp_path / tree / "test.png"
+            assert _optimize_copy(settings, path) == len(_OPTIMIZED_DATA)
+            assert path.read_bytes() == _OPTIMIZED_DATA
+        assert counting.calls == 1
+
+    def test_no_gain_marker(
+        self,
+        tmp_path: Path,
+        counting: type[_CountingHandler],
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        """A result that wasn't kept is remembered as no gain."""
+        settings = _make_settings(tmp_path / "cache")
+        bigger = _ORIGINAL_DATA + b"bloat"
+        monkeypatch.setattr(counting, "result", bigger)
+        for name in ("a.png", "b.png"):
+            path = tmp_path / name
+            assert _optimize_copy(settings, path) == len(bigger)
+            assert path.read_bytes() == _ORIGINAL_DATA
+        assert counting.calls == 1
+
+    def test_settings_change_key(
+        self, tmp_path: Path, counting: type[_CountingHandler]
+    ) -> None:
+        """Output-affecting settings are part of the key."""
+        cache_dir = tmp_path / "cache"
+        _optimize_copy(_make_settings(cache_dir), tmp_path / "a.png")
+        _optimize_copy(_make_settings(cache_dir, "-M"), tmp_path / "b.png")
+        assert counting.calls == 2  # noqa: PLR2004
+
+    def test_lru_eviction(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """The least recently used blobs go first once over the size limit."""
+        clock = iter(range(0, 100000, 1000))
+        monkeypatch.setattr("picopt.cache.time.time", lambda: next(clock))
+        cache = ResultCache(tmp_path, _MAX_SIZE)
+        keys = [result_key(str(i), ()) for i in range(4)]
+        for key in keys[:3]:
+            cache.put(key, _BLOB_SIZE, b"x" * _BLOB_SIZE)
+        assert cache.get(keys[0]) is not None  # now most recently used
+        cache.put(keys[3], _BLOB_SIZE, b"x" * _BLOB_SIZE)
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None
+        assert cache.get(keys[3]) is not None
+        # The running total matches what is left.
+        (total,) = cache._db.execute("SELECT SUM(size) FROM results").fetchone()
+        assert cache._total() == total
+        blobs = [path for path in (tmp_path / "blobs").rglob("*") if path.is_file()]
+        assert len(blobs) == 2  # noqa: PLR2004
+
+    def test_eviction_ties_keep_rows_and_blobs(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Entries used at the same moment lose their row and blob together."""
+        monkeypatch.setattr("picopt.cache.time.time", lambda: 1000.0)
+        cache = ResultCache(tmp_path, _MAX_SIZE)
+        keys = [result_key(str(i), ()) for i in range(8)]
+        for index, key in enumerate(keys):
+            cache.put(key, _BLOB_SIZE, b"x" * _BLOB_SIZE if index % 2 else None)
+        rows = {key for (key,) in cache._db.execute("SELECT key FROM results")}
+        blob_rows = {
+            key
+            for (key,) in cache._db.execute("SELECT key FROM results WHERE no_gain = 0")
+        }
+        blobs = {
+            path.name for path in (tmp_path / "blobs").rglob("*") if path.is_file()
+        }
+        assert rows < set(keys)
+        assert blobs == blob_rows
+        (total,) = cache._db.execute("SELECT SUM(size) FROM results").fetchone()
+        assert cache._total() == total
+
+    def test_recent_hit_not_rewritten(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A lookup only writes its last use once that is stale."""
+        now = 1000.0
+        monkeypatch.setattr("picopt.cache.time.time", lambda: now)
+        cache = ResultCache(tmp_path, _MAX_SIZE)
+        key = result_key("0", ())
+        cache.put(key, 0, None)
+        statements: list[str] = []
+        cache._db.set_trace_callback(statements.append)
+        cache.get(key)
+        assert not any(sql.startswith("UPDATE") for sql in statements)
+        now += 3600
+        cache.get(key)
+        assert any(sql.startswith("UPDATE") for sql in statements)
+
+    def test_total_seeded_for_old_cache(self, tmp_path: Path) -> None:
+        """A cache made before the running total counts its existing rows."""
+        cache = ResultCache(tmp_path, _MAX_SIZE)
+        cache.put(result_key("0", ()), _BLOB_SIZE, b"x" * _BLOB_SIZE)
+        cache._db.executescript(
+            "DROP TABLE totals; DROP TRIGGER results_insert;"
+            " DROP TRIGGER results_delete; DROP TRIGGER results_resize;"
+        )
+        reopened = ResultCache(tmp_path, _MAX_SIZE)
+        assert reopened._total() == _BLOB_SIZE + 256
@@ -1,12 +1,18 @@
 """Test that scheduler failure paths never drop archive members."""
 
+from concurrent.futures import Future
 from pathlib import Path
 from typing import Any
 
 from picopt import cli
 from picopt.config import PicoptConfig
 from picopt.report import ReportStats
-from picopt.walk.scheduler import OptimizeLeafJob, Scheduler, _LeafEntry
+from picopt.walk.scheduler import (
+    OptimizeBatchJob,
+    OptimizeLeafJob,
+    Scheduler,
+    _LeafEntry,
+)
 
 __all__ = ()  # hides module from pydocstring
 
@@ -27,10 +33,25 @@ class _FakePathInfo:
     def bytes_in(self) -> int:
         return 100
 
+    def shared_buffer(self) -> None:
+        return None
+
+
+class _FakeLeafHandler:
+    """Minimal ImageHandler stand-in; never coalesced."""
+
+    original_path = _MEMBER_PATH
+
+    def dedupe_key(self) -> None:
+        return None
+
 
 class _FakeContainerHandler:
     """Minimal ContainerHandler stand-in for completion handling."""
 
+    CAN_SHARD = False
+    BATCH_MEMBERS = False
+
     def __init__(self, name: str) -> None:
         self.path_info = _FakePathInfo(name)
         self.original_path = Path(name)
@@ -57,6 +78,9 @@ class _FakeContainerHandler:
     def hydrate_optimized_path_info(self, path_info: Any, report: Any) -> None:
         self.hydrate_calls.append((path_info, report))
 
+    def merge_shard(self, other: Any) -> None:
+        self._optimized_contents.update(other.get_optimized_contents())
+
 
 class _FakeReporter:
     """Records every report it is handed."""
@@ -107,7 +131,7 @@ class TestSchedulerErrorPaths:
         parent = scheduler.enqueue_container(parent_handler)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
 
         member_info = _FakePathInfo(str(_MEMBER_PATH))
-        job = OptimizeLeafJob(handler=None, path_info=member_info)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        job = OptimizeLeafJob(handler=_FakeLeafHandler(), path_info=member_info)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
         scheduler.enqueue_leaf(job, parent)
         assert parent.pending == 1
 
@@ -149,7 +173,7 @@ class TestDirTimestampsOnError:
 
         member_path = tmp_path / "bad.png"
         member_info = _FakePathInfo(str(member_path), path=member_path)
-        job = OptimizeLeafJob(handler=None, path_info=member_info)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        job = OptimizeLeafJob(handler=_FakeLeafHandler(), path_info=member_info)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
         scheduler.enqueue_leaf(job)
 
         report = ReportStats(member_path, exc=ValueError("boom"))
@@ -168,7 +192,7 @@ class TestDirTimestampsOnError:
 
         member_path = tmp_path / "good.png"
         member_info = _FakePathInfo(str(member_path), path=member_path)
-        job = OptimizeLeafJob(handler=None, path_info=member_info)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        job = OptimizeLeafJob(handler=_FakeLeafHandler(), path_info=member_info)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
         scheduler.enqueue_leaf(job)
 
         report = ReportStats(member_path, bytes_in=10, bytes_out=5, changed=True)
@@ -325,7 +349,7 @@ class TestFailFast:
         parent_handler = _FakeContainerHandler("late.cbz")
         parent = scheduler.enqueue_container(parent_handler)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
         member_info = _FakePathInfo("member.png")
-        job = OptimizeLeafJob(handler=None, path_info=member_info)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        job = OptimizeLeafJob(handler=_FakeLeafHandler(), path_info=member_info)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
         scheduler.enqueue_leaf(job, parent)
 
         scheduler._cancel_subtree(parent, reason=None)
@@ -340,3 +364,57 @@ class TestFailFast:
         assert member_info not in parent_handler.get_optimized_contents()
         assert not parent_handler.hydrate_calls
         assert parent.pending == 0
+
+
+def _frame_jobs(count: int) -> list[OptimizeLeafJob]:
+    return [
+        OptimizeLeafJob(
+            handler=_FakeLeafHandler(),  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+            path_info=_FakePathInfo(f"frame_{index}.png"),  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        )
+        for index in range(count)
+    ]
+
+
+class TestLeafBatching:
+    """Members of a BATCH_MEMBERS container share a few leaf jobs."""
+
+    def _enqueue(self: Any, count: int, *, batch: bool) -> tuple[Scheduler, Any]:
+        scheduler, _, _ = _make_scheduler()
+        parent_handler = _FakeContainerHandler("animated.gif")
+        parent_handler.BATCH_MEMBERS = batch
+        parent = scheduler.enqueue_container(parent_handler)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        scheduler._ready.clear()  # the container's own unpack
+        scheduler.enqueue_leaves(_frame_jobs(count), parent)
+        return scheduler, parent
+
+    def test_frames_batched(self: Any) -> None:
+        """Frames queue a batch per eight, every one counted."""
+        scheduler, parent = self._enqueue(20, batch=True)
+        jobs = [job for job, _ in scheduler._ready]
+        assert all(isinstance(job, OptimizeBatchJob) for job in jobs)
+        assert [len(job.jobs) for job in jobs] == [8, 8, 4]  # pyright: ignore[reportAttributeAccessIssue]  # ty: ignore[unresolved-attribute]
+        assert parent.pending == 20  # noqa: PLR2004
+
+    def test_archive_members_not_batched(self: Any) -> None:
+        """Other containers keep a job per member."""
+        scheduler, parent = self._enqueue(3, batch=False)
+        jobs = [job for job, _ in scheduler._ready]
+        assert all(isinstance(job, OptimizeLeafJob) for job in jobs)
+        assert parent.pending == len(jobs) == 3  # noqa: PLR2004
+
+    def test_crashed_batch_keeps_every_frame(self: Any) -> None:
+        """A batch whose worker died reports and keeps each of its frames."""
+        scheduler, parent = self._enqueue(3, batch=True)
+        ((batch, _),) = scheduler._ready
+        fut: Future = Future()
+        fut.set_exception(RuntimeError("worker died"))
+        scheduler._inflight_batch[fut] = (batch, parent)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-assignment]
+        scheduler._handle_completion(fut)
+
+        contents = parent.handler.get_optimized_contents()
+        assert {job.path_info for job in batch.jobs} <= contents  # pyright: ignore[reportAttributeAccessIssue]  # ty: ignore[unresolved-attribute]
+        assert parent.pending == 0
+        assert parent.had_error
+        reports = scheduler._reporter.reports  # pyright: ignore[reportAttributeAccessIssue]  # ty: ignore[unresolved-attribute]
+        assert sum(1 for report in reports if report.exc) == 3  # noqa: PLR2004
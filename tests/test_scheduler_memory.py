@@ -4,6 +4,8 @@ from typing import Any
 
 from picopt import cli
 from picopt.config import PicoptConfig
+from picopt.memory_costs import cost_key
+from picopt.plugins.base.format import FileFormat
 from picopt.walk.scheduler import _MEM_COST_FACTOR, Scheduler
 
 __all__ = ()  # hides module from pydocstring
@@ -34,8 +36,15 @@ class _FakePathInfo:
 class _FakeHandler:
     """Minimal ContainerHandler stand-in with a sized path_info."""
 
+    OUTPUT_FORMAT_STR = "ZIP"
+    input_file_format = FileFormat("ZIP", archive=True)
+
     def __init__(self, size: int) -> None:
         self.path_info = _FakePathInfo(size)
+        self.spill = False
+
+    def set_spill(self, *, spill: bool) -> None:
+        self.spill = spill
 
 
 class _StubExecutor:
@@ -116,3 +125,81 @@ class TestSchedulerMemoryGate:
         assert len(executor.submitted) == _ALL
         assert len(scheduler._ready) == _NONE
         assert len(scheduler._gated) == _NONE
+
+    def test_tight_budget_spills_members(self: Any) -> None:
+        """Containers admitted past half the budget stage members on disk."""
+        scheduler, _ = _make_scheduler(_BUDGET)
+        handlers = [_FakeHandler(_SIZE) for _ in range(_FITS)]
+        for handler in handlers:
+            scheduler.enqueue_container(handler)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        scheduler._submit_ready()
+        assert [handler.spill for handler in handlers] == [False, True]
+
+    def test_roomy_budget_never_spills(self: Any) -> None:
+        """With memory to spare members stay in memory."""
+        scheduler, _ = _make_scheduler(1024**4)  # 1 TiB
+        handler = _FakeHandler(_SIZE)
+        scheduler.enqueue_container(handler)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        scheduler._submit_ready()
+        assert not handler.spill
+
+    def test_learned_costs_admit_more(self: Any) -> None:
+        """A format measured leaner than the default packs the budget tighter."""
+        scheduler, executor = _make_scheduler(_BUDGET)
+        handler = _FakeHandler(_SIZE)
+        # Observations need a realistically sized item; learn at 1 MiB.
+        scheduler._memory_costs.observe(cost_key(handler), 1024**2, 1024**2)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        scheduler.enqueue_container(handler)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        for _ in range(_TOTAL - 1):
+            scheduler.enqueue_container(_FakeHandler(_SIZE))  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        scheduler._submit_ready()
+        assert len(executor.submitted) == _TOTAL
+        assert scheduler._inflight_bytes == _SIZE * _TOTAL
+
+
+class TestNestedSubBudget:
+    """Nested containers draw on their parent's charge, not the global budget."""
+
+    def _admitted_parent(self: Any) -> "tuple[Scheduler, _StubExecutor, Any]":
+        scheduler, executor = _make_scheduler(_BUDGET)
+        parent = scheduler.enqueue_container(_FakeHandler(_SIZE))  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        scheduler._submit_ready()
+        assert parent.cost == _COST
+        return scheduler, executor, parent
+
+    def test_nested_unpacks_park_until_a_sibling_retires(self: Any) -> None:
+        """Only the nested unpacks that fit the parent's charge run at once."""
+        scheduler, executor, parent = self._admitted_parent()
+        children = [
+            scheduler.enqueue_container(_FakeHandler(_SIZE // _FITS), parent=parent)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+            for _ in range(_TOTAL)
+        ]
+        scheduler._submit_ready()
+        assert len(executor.submitted) == 1 + _FITS
+        assert len(parent.waiting) == _DEFERRED
+        assert scheduler._inflight_bytes == _COST
+
+        scheduler._retire_node(children[0])
+        assert not parent.waiting
+        scheduler._submit_ready()
+        assert len(executor.submitted) == 1 + _TOTAL
+        assert scheduler._inflight_bytes == _COST
+
+    def test_held_members_shrink_the_sub_budget(self: Any) -> None:
+        """Unpacked members already in memory leave less room for nesting."""
+        scheduler, executor, parent = self._admitted_parent()
+        parent.held = _COST // _FITS
+        for _ in range(_TOTAL):
+            scheduler.enqueue_container(_FakeHandler(_SIZE // _FITS), parent=parent)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        scheduler._submit_ready()
+        assert len(executor.submitted) == 1 + 1
+        assert len(parent.waiting) == _TOTAL - 1
+
+    def test_oversized_nested_runs_alone(self: Any) -> None:
+        """A nested container bigger than its parent's charge still runs."""
+        scheduler, executor, parent = self._admitted_parent()
+        for _ in range(_FITS):
+            scheduler.enqueue_container(_FakeHandler(_BIG_SIZE), parent=parent)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        scheduler._submit_ready()
+        assert len(executor.submitted) == 1 + 1
+        assert len(parent.waiting) == 1
@@ -0,0 +1,99 @@
+"""Test that the scheduler pulls the walk lazily."""
+
+from collections.abc import Generator
+from typing import Any
+
+from picopt import cli
+from picopt.config import PicoptConfig
+from picopt.plugins.base.format import FileFormat
+from picopt.walk.scheduler import _READY_HIGH_WATER_FACTOR, Scheduler
+
+__all__ = ()  # hides module from pydocstring
+
+_MAX_WORKERS = 2
+_HIGH_WATER = _READY_HIGH_WATER_FACTOR * _MAX_WORKERS
+_TOTAL = _HIGH_WATER * 10
+
+
+class _FakePathInfo:
+    """Minimal PathInfo stand-in exposing only what the scheduler reads."""
+
+    def __init__(self) -> None:
+        self.path = None
+
+    def bytes_in(self) -> int:
+        return 1
+
+
+class _FakeHandler:
+    """Minimal ContainerHandler stand-in."""
+
+    OUTPUT_FORMAT_STR = "ZIP"
+    input_file_format = FileFormat("ZIP", archive=True)
+
+    def __init__(self) -> None:
+        self.path_info = _FakePathInfo()
+
+    def set_spill(self, *, spill: bool) -> None:
+        pass
+
+
+class _StubExecutor:
+    """Records submissions and returns opaque futures that never run."""
+
+    def __init__(self) -> None:
+        self.submitted: list[Any] = []
+
+    def submit(self, fn: Any) -> object:
+        self.submitted.append(fn)
+        return object()
+
+
+def _make_scheduler() -> "tuple[Scheduler, _StubExecutor]":
+    args = cli.get_arguments(("picopt", "."))
+    config = PicoptConfig().get_config(args)
+    executor = _StubExecutor()
+    scheduler = Scheduler(
+        config=config,
+        executor=executor,  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        timestamps=None,
+        reporter=None,  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        max_workers=_MAX_WORKERS,
+        create_repack_handler=lambda *_a: None,  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        child_enqueue_callback=lambda *_a: None,
+    )
+    return scheduler, executor
+
+
+def _source(scheduler: Scheduler, pulled: list[int]) -> Generator[None]:
+    for index in range(_TOTAL):
+        pulled.append(index)
+        scheduler.enqueue_container(_FakeHandler())  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        yield
+
+
+class TestSchedulerStream:
+    """The walk source is advanced only up to the ready high-water mark."""
+
+    def test_pull_stops_at_high_water(self: Any) -> None:
+        """A huge walk is not enumerated before anything is submitted."""
+        scheduler, executor = _make_scheduler()
+        pulled: list[int] = []
+        scheduler._source = _source(scheduler, pulled)
+        scheduler._pull_source()
+        assert len(pulled) == _HIGH_WATER
+        assert len(scheduler._ready) == _HIGH_WATER
+
+        scheduler._submit_ready()
+        assert len(executor.submitted) == 2 * _MAX_WORKERS
+
+        scheduler._pull_source()
+        assert len(scheduler._ready) == _HIGH_WATER
+        assert len(pulled) == _HIGH_WATER + 2 * _MAX_WORKERS
+
+    def test_exhausted_source_is_dropped(self: Any) -> None:
+        """The source is released once the walk finishes."""
+        scheduler, _ = _make_scheduler()
+        scheduler._source = iter(())
+        scheduler._pull_source()
+        assert scheduler._source is None
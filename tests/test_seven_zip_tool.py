@@ -0,0 +1,136 @@
+"""Test the 7-Zip binary tier for 7z archives."""
+
+import shutil
+from pathlib import Path
+from tempfile import mkdtemp
+from typing import Any
+
+import pytest
+from py7zr import SevenZipFile
+
+from picopt.plugins.seven_zip import SevenZip, SevenZipTool
+from tests import CONTAINER_DIR
+from tests.base import make_handler
+
+__all__ = ()  # hides module from pydocstring
+
+_FN = "test_7z.7z"
+_HAS_7Z = any(shutil.which(binary) for binary in ("7zz", "7z"))
+_BANNERS = {
+    "\n7-Zip (z) 23.01 (x64) : Copyright (c) 1999-2023 Igor Pavlov : 2023-06-20\n": (
+        "23.01"
+    ),
+    "\n7-Zip [64] 16.02 : Copyright (c) 1999-2016 Igor Pavlov : 2016-05-21\n": (
+        "16.02"
+    ),
+    "command not found\n": "",
+}
+
+
+def _handler(tmp_path: Path) -> SevenZip:
+    path = tmp_path / _FN
+    shutil.copy(CONTAINER_DIR / _FN, path)
+    return make_handler(path, "7Z", SevenZip)
+
+
+def _stub_bulk_extract(
+    monkeypatch: pytest.MonkeyPatch, missing: str | None = None
+) -> list[Path]:
+    """Extract as ``7zz x -y`` would, with py7zr; optionally lose a member."""
+    runs = []
+
+    def _run_extractor(self: SevenZip, *_args: Any) -> Path:
+        extract_dir = Path(mkdtemp(dir=self._get_spill_dir()))
+        assert self.path_info.path is not None
+        with SevenZipFile(self.path_info.path) as archive:
+            archive.extractall(path=extract_dir)
+        if missing:
+            (extract_dir / missing).unlink()
+        runs.append(extract_dir)
+        return extract_dir
+
+    monkeypatch.setattr(SevenZip, "_external_tool", lambda _self: SevenZipTool())
+    monkeypatch.setattr(SevenZip, "_run_extractor", _run_extractor)
+    return runs
+
+
+def _walk_data(handler: SevenZip) -> list[tuple[str, bytes]]:
+    try:
+        return [(child.name(), child.data()) for child in handler.walk()]
+    finally:
+        if (staging_dir := handler.get_staging_dir()) is not None:
+            shutil.rmtree(staging_dir)
+
+
+def _contents(path: Path, dest: Path) -> dict[str, bytes]:
+    with SevenZipFile(path) as archive:
+        archive.extractall(path=dest)
+    return {
+        str(member.relative_to(dest)): member.read_bytes()
+        for member in dest.rglob("*")
+        if member.is_file()
+    }
+
+
+class TestSevenZipTool:
+    """The binary extracts and packs when installed; py7zr otherwise."""
+
+    @pytest.mark.parametrize(("banner", "version"), list(_BANNERS.items()))
+    def test_parse_version(self: Any, banner: str, version: str) -> None:
+        """The version is read from the banner line."""
+        assert SevenZipTool().parse_version(banner) == version
+
+    @pytest.mark.skipif(_HAS_7Z, reason="7-Zip binary installed")
+    def test_falls_back_to_py7zr(self: Any, tmp_path: Path) -> None:
+        """Without the binary nothing is extracted to the staging dir."""
+        handler = _handler(tmp_path)
+        assert handler._external_tool() is None
+        children = [child for child in handler.walk() if child.bytes_in()]
+        assert children
+        assert handler.get_staging_dir() is None
+
+    @pytest.mark.skipif(not _HAS_7Z, reason="needs 7zz or 7z")
+    def test_round_trip(self: Any, tmp_path: Path) -> None:
+        """Members survive extraction and repacking by the binary."""
+        expected = _contents(CONTAINER_DIR / _FN, tmp_path / "expected")
+        handler = _handler(tmp_path)
+        assert handler._external_tool() is not None
+        handler.get_optimized_contents().update(handler.walk())
+        staging_dir = handler.get_staging_dir()
+        try:
+            with handler.pack_into() as output:
+                output.seek(0)
+                data = output.read()
+        finally:
+            if staging_dir is not None:
+                shutil.rmtree(staging_dir)
+        packed = tmp_path / "packed.7z"
+        packed.write_bytes(data)
+        assert _contents(packed, tmp_path / "packed") == expected
+
+    @pytest.mark.parametrize("bulk", [False, True])
+    def test_duplicate_names(
+        self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, *, bulk: bool
+    ) -> None:
+        """Members sharing a name each keep their own bytes."""
+        members = [("a.txt", b"first " * 8), ("a.txt", b"second " * 8)]
+        path = tmp_path / "dup.7z"
+        with SevenZipFile(path, "w") as archive:
+            for name, data in members:
+                archive.writestr(data, name)
+        runs = _stub_bulk_extract(monkeypatch) if bulk else []
+        assert _walk_data(make_handler(path, "7Z", SevenZip)) == members
+        # One file on disk can't stand for both.
+        assert not runs
+
+    def test_missing_extraction_falls_back(
+        self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A member the binary didn't leave on disk is read with py7zr."""
+        expected = _contents(CONTAINER_DIR / _FN, tmp_path / "expected")
+        missing = next(iter(expected))
+        runs = _stub_bulk_extract(monkeypatch, missing)
+        children = dict(_walk_data(_handler(tmp_path)))
+        assert runs
+        assert children[missing] == expected[missing]
+        assert {name: children[name] for name in expected} == expected
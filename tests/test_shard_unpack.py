@@ -0,0 +1,186 @@
+"""Test unpacking a large archive in shards."""
+
+import tarfile
+from io import BytesIO
+from pathlib import Path
+from typing import Any
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import pikepdf
+import pytest
+
+from picopt import PROGRAM_NAME, cli
+from picopt.plugins.base import ContainerHandler
+from picopt.walk import scheduler
+from tests import IMAGES_DIR
+
+__all__ = ()  # hides module from pydocstring
+
+_PNG_FN = "test_png.png"
+_JPEG_FN = "test_jpg.jpg"
+_TEXT = b"panel " * 512
+_PAGES = 12
+_SHARDS = 3
+
+
+def _members() -> dict[str, bytes]:
+    png = (IMAGES_DIR / _PNG_FN).read_bytes()
+    members = {}
+    for page in range(_PAGES):
+        members[f"page{page:02}.png"] = png
+        members[f"note{page:02}.txt"] = _TEXT
+    return members
+
+
+def _make_zip(path: Path) -> None:
+    with ZipFile(path, "w", compression=ZIP_DEFLATED) as zf:
+        for name, data in _members().items():
+            zf.writestr(name, data)
+
+
+def _make_tar(path: Path) -> None:
+    with tarfile.open(path, "w") as tf:
+        for name, data in _members().items():
+            tarinfo = tarfile.TarInfo(name)
+            tarinfo.size = len(data)
+            tf.addfile(tarinfo, BytesIO(data))
+
+
+def _read_zip(path: Path) -> dict[str, bytes]:
+    with ZipFile(path) as zf:
+        assert zf.testzip() is None
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+def _read_tar(path: Path) -> dict[str, bytes]:
+    result = {}
+    with tarfile.open(path) as tf:
+        for tarinfo in tf:
+            fp = tf.extractfile(tarinfo)
+            assert fp is not None
+            result[tarinfo.name] = fp.read()
+    return result
+
+
+class TestShardUnpack:
+    """A large archive unpacks in several workers and repacks whole."""
+
+    @pytest.mark.parametrize(
+        ("fn", "formats", "make", "read"),
+        [
+            ("comic.cbz", "CBZ,PNG", _make_zip, _read_zip),
+            ("bundle.tar", "TAR,PNG", _make_tar, _read_tar),
+        ],
+    )
+    def test_shards(
+        self: Any,
+        tmp_path: Path,
+        monkeypatch: pytest.MonkeyPatch,
+        fn: str,
+        formats: str,
+        make: Any,
+        read: Any,
+    ) -> None:
+        """Every member comes back once, in order, whichever shard read it."""
+        path = tmp_path / fn
+        make(path)
+        monkeypatch.setattr(scheduler, "_SHARD_BYTES", path.stat().st_size // 4)
+        counts = []
+        shard = ContainerHandler.shard
+
+        def _spy(self: ContainerHandler, count: int) -> list[ContainerHandler]:
+            counts.append(count)
+            return shard(self, count)
+
+        monkeypatch.setattr(ContainerHandler, "shard", _spy)
+        before = path.stat().st_size
+        cli.main((PROGRAM_NAME, "-x", formats, "-j", str(_SHARDS), str(path)))
+        assert counts == [_SHARDS]
+        assert path.stat().st_size < before
+        assert [child.name for child in tmp_path.iterdir()] == [fn]
+        members = read(path)
+        assert list(members) == list(_members())
+        for name, data in members.items():
+            if name.endswith(".txt"):
+                assert data == _TEXT
+            else:
+                assert len(data) < len(_members()[name])
+
+
+def _make_pdf(path: Path, signature: str | None = None) -> None:
+    """Write a PDF with one JPEG image object per page, maybe signed."""
+    jpeg = (IMAGES_DIR / _JPEG_FN).read_bytes()
+    with pikepdf.new() as pdf:
+        for _ in range(_PAGES):
+            image = pdf.make_stream(
+                jpeg,
+                Type=pikepdf.Name.XObject,
+                Subtype=pikepdf.Name.Image,
+                Width=357,
+                Height=200,
+                ColorSpace=pikepdf.Name.DeviceRGB,
+                BitsPerComponent=8,
+                Filter=pikepdf.Name.DCTDecode,
+            )
+            page = pdf.add_blank_page(page_size=(357, 200))
+            page.Resources = pikepdf.Dictionary(XObject=pikepdf.Dictionary(Im0=image))
+            page.Contents = pdf.make_stream(b"q 357 0 0 200 0 0 cm /Im0 Do Q")
+        if signature == "flag":
+            pdf.Root.AcroForm = pikepdf.Dictionary(SigFlags=3)
+        elif signature == "object":
+            # Numbered last, so it falls in the last shard's slice.
+            pdf.Root.Sig = pdf.make_indirect(pikepdf.Dictionary(Type=pikepdf.Name.Sig))
+        pdf.save(path)
+
+
+def _jpeg_sizes(path: Path) -> list[int]:
+    with pikepdf.open(path) as pdf:
+        return [len(page.Resources.XObject.Im0.read_raw_bytes()) for page in pdf.pages]
+
+
+class TestShardPdf:
+    """A large PDF reads its JPEGs in several workers."""
+
+    def test_shards(self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Every page's image is optimized, whichever shard read it."""
+        path = tmp_path / "book.pdf"
+        _make_pdf(path)
+        before = _jpeg_sizes(path)
+        monkeypatch.setattr(scheduler, "_SHARD_BYTES", path.stat().st_size // 4)
+        counts = []
+        shard = ContainerHandler.shard
+
+        def _spy(self: ContainerHandler, count: int) -> list[ContainerHandler]:
+            counts.append(count)
+            return shard(self, count)
+
+        monkeypatch.setattr(ContainerHandler, "shard", _spy)
+        cli.main((PROGRAM_NAME, "-x", "PDF", "-j", str(_SHARDS), str(path)))
+        assert counts == [_SHARDS]
+        after = _jpeg_sizes(path)
+        assert len(after) == _PAGES
+        assert all(
+            size_after < size_before
+            for size_after, size_before in zip(after, before, strict=True)
+        )
+
+    @pytest.mark.parametrize("signature", ["flag", "object"])
+    def test_signed_shards_refuse(
+        self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, signature: str
+    ) -> None:
+        """A signature found by the first shard refuses the JPEGs of all."""
+        path = tmp_path / "signed.pdf"
+        _make_pdf(path, signature)
+        before = path.read_bytes()
+        monkeypatch.setattr(scheduler, "_SHARD_BYTES", len(before) // 4)
+        counts = []
+        shard = ContainerHandler.shard
+
+        def _spy(self: ContainerHandler, count: int) -> list[ContainerHandler]:
+            counts.append(count)
+            return shard(self, count)
+
+        monkeypatch.setattr(ContainerHandler, "shard", _spy)
+        cli.main((PROGRAM_NAME, "-x", "PDF", "-j", str(_SHARDS), str(path)))
+        assert counts == [_SHARDS]
+        assert path.read_bytes() == before
@@ -0,0 +1,114 @@
+"""Test shared memory transport of member bytes."""
+
+import pickle
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from picopt.report import ReportStats
+from picopt.shared_buffer import SHARE_THRESHOLD, SharedBuffer, share
+from picopt.walk.scheduler import ContainerNode, Scheduler
+
+if TYPE_CHECKING:
+    from picopt.path import PathInfo
+
+__all__ = ()  # hides module from pydocstring
+
+_DATA = b"\x89PNG" * SHARE_THRESHOLD
+_OPTIMIZED = b"\x89PNG" * (SHARE_THRESHOLD // 2)
+
+
+def _member(tmp_path: Path, data: bytes = _DATA) -> "PathInfo":
+    # Imported late: picopt.path must not be the first picopt module loaded.
+    from picopt.path import PathInfo
+
+    return PathInfo(top_path=tmp_path, data=data, convert=False)
+
+
+def _is_live(shared: SharedBuffer) -> bool:
+    try:
+        shared.read(1)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+class _FakeContainerHandler:
+    """Minimal ContainerHandler stand-in that hydrates like the real one."""
+
+    def hydrate_optimized_path_info(self, path_info: Any, report: Any) -> None:
+        if report.data:
+            path_info.set_data(report.data)
+
+
+class TestSharedBuffer:
+    """Bytes round trip through a named segment."""
+
+    def test_small_data_stays_bytes(self: Any) -> None:
+        """Tiny payloads pickle cheaper than a segment costs."""
+        assert share(b"tiny") == b"tiny"
+
+    def test_round_trip(self: Any) -> None:
+        """Large payloads are moved out and read back intact."""
+        shared = share(_DATA)
+        assert isinstance(shared, SharedBuffer)
+        try:
+            assert len(shared) == len(_DATA)
+            assert shared.read() == _DATA
+            assert shared.read(4) == b"\x89PNG"
+            copy = shared.copy()
+            assert copy.name != shared.name
+            assert copy.read() == _DATA
+            copy.unlink()
+        finally:
+            shared.unlink()
+        assert not _is_live(shared)
+        shared.unlink()  # idempotent
+
+
+class TestPathInfoSharing:
+    """PathInfos carry segment names between processes, not bytes."""
+
+    def test_pickle_drops_shared_bytes(self: Any, tmp_path: Path) -> None:
+        """Only the segment handle crosses the pipe."""
+        path_info = _member(tmp_path)
+        path_info.share_data()
+        shared = path_info.shared_buffer()
+        assert shared is not None
+        try:
+            pickled = pickle.dumps(path_info)
+            assert len(pickled) < len(_DATA)
+            copy = pickle.loads(pickled)  # noqa: S301
+            assert copy.bytes_in() == len(_DATA)
+            assert copy.header_bytes()[:4] == b"\x89PNG"
+            assert copy.data() == _DATA
+        finally:
+            shared.unlink()
+
+    def test_hydrate_frees_replaced_segment(self: Any, tmp_path: Path) -> None:
+        """Optimized bytes replace the original segment, which is unlinked."""
+        path_info = _member(tmp_path)
+        path_info.share_data()
+        old = path_info.shared_buffer()
+        assert old is not None
+        node = ContainerNode(handler=_FakeContainerHandler())  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        Scheduler._own_segments(node, (path_info,))
+
+        new = share(_OPTIMIZED)
+        assert isinstance(new, SharedBuffer)
+        Scheduler._hydrate(node, path_info, ReportStats(Path("m.png"), data=new))
+        assert node.segments == {new}
+        assert not _is_live(old)
+        assert path_info.data() == _OPTIMIZED
+
+        Scheduler._release_segments(node)
+        assert not node.segments
+        assert not _is_live(new)
+
+    @pytest.mark.parametrize("size", [0, SHARE_THRESHOLD - 1])
+    def test_small_members_not_shared(self: Any, tmp_path: Path, size: int) -> None:
+        """Members under the threshold keep their bytes in the pickle."""
+        path_info = _member(tmp_path, b"x" * size)
+        path_info.share_data()
+        assert path_info.shared_buffer() is None
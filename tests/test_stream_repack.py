@@ -0,0 +1,67 @@
+"""Test appending finished members to a repack in archive order."""
+
+from pathlib import Path
+from typing import Any
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import pytest
+
+from picopt import PROGRAM_NAME, WORKING_SUFFIX, cli
+from picopt.walk import scheduler
+from picopt.walk.scheduler import Scheduler
+from tests import IMAGES_DIR
+
+__all__ = ()  # hides module from pydocstring
+
+_FN = "comic.cbz"
+_PNG_FN = "test_png.png"
+_TEXT = b"panel " * 512
+_PAGES = 40
+
+
+def _names() -> list[str]:
+    """Pages with a text file between each, so order is easy to lose."""
+    names = []
+    for page in range(_PAGES):
+        names += [f"page{page:02}.png", f"note{page:02}.txt"]
+    return names
+
+
+def _make_comic(path: Path) -> None:
+    png = (IMAGES_DIR / _PNG_FN).read_bytes()
+    with ZipFile(path, "w", compression=ZIP_DEFLATED) as zf:
+        for name in _names():
+            zf.writestr(name, png if name.endswith(".png") else _TEXT)
+
+
+class TestStreamRepack:
+    """A large archive repacks in runs and keeps its member order."""
+
+    @pytest.mark.parametrize("min_members", [4, 10_000])
+    def test_appends_in_order(
+        self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, min_members: int
+    ) -> None:
+        """Members come out in archive order however the repack was split."""
+        monkeypatch.setattr(scheduler, "_APPEND_MIN_MEMBERS", min_members)
+        monkeypatch.setattr(scheduler, "_APPEND_MIN_BYTES", 1 << 62)
+        appends = []
+        handle_append_done = Scheduler._handle_append_done
+
+        def _count(self: Scheduler, node: Any, report: Any) -> None:
+            appends.append(len(node.appending))
+            handle_append_done(self, node, report)
+
+        monkeypatch.setattr(Scheduler, "_handle_append_done", _count)
+        path = tmp_path / _FN
+        _make_comic(path)
+        before = path.stat().st_size
+        cli.main((PROGRAM_NAME, "-x", "CBZ,PNG", "-j", "4", str(path)))
+        assert path.stat().st_size < before
+        assert [child.name for child in tmp_path.iterdir()] == [_FN]
+        with ZipFile(path) as zf:
+            assert zf.testzip() is None
+            assert zf.namelist() == _names()
+            assert zf.read("note00.txt") == _TEXT
+        assert bool(appends) is (min_members < _PAGES)
+        assert all(size >= min_members for size in appends)
+        assert not path.with_name(_FN + WORKING_SUFFIX).exists()
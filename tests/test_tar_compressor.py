@@ -0,0 +1,83 @@
+"""Test repacking compressed tarballs through an external compressor."""
+
+import shutil
+from io import BytesIO
+from pathlib import Path
+from tarfile import open as tar_open
+from typing import Any
+
+import pytest
+
+from picopt import PROGRAM_NAME, cli
+from picopt.config import PicoptConfig
+from picopt.log.reporter import Reporter
+from picopt.path import PathInfo
+from picopt.plugins import tar
+from picopt.plugins.tar import Tar
+from picopt.walk.handler_factory import HandlerFactory
+from tests import IMAGES_DIR
+
+__all__ = ()  # hides module from pydocstring
+
+_PNG_FN = "test_png.png"
+_FORMATS = {
+    "comic.tar.gz": ("w:gz", "TGZ,PNG"),
+    "comic.tar.bz2": ("w:bz2", "TBZ,PNG"),
+    "comic.tar.xz": ("w:xz", "TXZ,PNG"),
+}
+
+
+def _repack(path: Path, formats: str) -> tuple[Tar, bytes]:
+    path_info = PathInfo(top_path=path.parent, path=path, convert=False)
+    args = cli.get_arguments((PROGRAM_NAME, "-x", formats, str(path)))
+    config = PicoptConfig().get_config(args)
+    handler = HandlerFactory(config, Reporter()).create_handler(path_info)
+    assert isinstance(handler, Tar)
+    handler.get_optimized_contents().update(handler.walk())
+    with handler.pack_into() as output:
+        output.seek(0)
+        return handler, output.read()
+
+
+def _members(data: bytes) -> dict[str, bytes]:
+    with tar_open(fileobj=BytesIO(data), mode="r|*") as tf:
+        return {
+            info.name: member.read()
+            for info in tf
+            if (member := tf.extractfile(info)) is not None
+        }
+
+
+class TestTarCompressor:
+    """The compressor's output reads back like tarfile's own."""
+
+    @pytest.mark.parametrize(("fn", "fmt"), list(_FORMATS.items()))
+    def test_repack_reads_back(
+        self: Any, tmp_path: Path, fn: str, fmt: tuple[str, str]
+    ) -> None:
+        """Whichever tier is selected, the members survive the repack."""
+        mode, formats = fmt
+        path = tmp_path / fn
+        with tar_open(path, mode) as tf:  # pyright: ignore[reportCallIssue, reportArgumentType]  # ty: ignore[no-matching-overload]
+            tf.add(IMAGES_DIR / _PNG_FN, _PNG_FN)
+        _, data = _repack(path, formats)
+        assert _members(data) == {_PNG_FN: (IMAGES_DIR / _PNG_FN).read_bytes()}
+
+    @pytest.mark.skipif(not shutil.which("gzip"), reason="needs gzip")
+    def test_streams_through_compressor(
+        self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """The uncompressed tar goes through the compressor's pipes."""
+        # gzip takes the same arguments as pigz.
+        monkeypatch.setattr(
+            tar._PIGZ_TOOL, "_cached_path", Path(shutil.which("gzip") or "")
+        )
+        monkeypatch.setattr(tar._PIGZ_TOOL, "_probed_status", None)
+        path = tmp_path / "comic.tar.gz"
+        with tar_open(path, "w:gz") as tf:
+            tf.add(IMAGES_DIR / _PNG_FN, _PNG_FN)
+        handler, data = _repack(path, "TGZ,PNG")
+        assert handler._external_compressor() is tar._PIGZ_TOOL
+        # gzip -n leaves the header's timestamp zeroed.
+        assert data[4:8] == b"\0\0\0\0"
+        assert _members(data) == {_PNG_FN: (IMAGES_DIR / _PNG_FN).read_bytes()}
@@ -0,0 +1,80 @@
+"""Test reading tarballs in one forward pass."""
+
+from io import BytesIO
+from pathlib import Path
+from tarfile import TarFile, TarInfo
+from tarfile import open as tar_open
+from typing import Any
+
+import pytest
+
+from picopt import PROGRAM_NAME, cli
+from picopt.config import PicoptConfig
+from picopt.log.reporter import Reporter
+from picopt.path import PathInfo
+from picopt.plugins.tar import Tar
+from picopt.walk.handler_factory import HandlerFactory
+from tests import IMAGES_DIR
+
+__all__ = ()  # hides module from pydocstring
+
+_PNG_FN = "test_png.png"
+_TEXT_FN = "notes.txt"
+_TEXT = b"read on the way past\n" * 64
+_FORMATS = {
+    "comic.tar.gz": ("w:gz", "TGZ,PNG"),
+    "comic.tar.bz2": ("w:bz2", "TBZ,PNG"),
+    "comic.tar.xz": ("w:xz", "TXZ,PNG"),
+    "comic.cbt": ("w", "CBT,PNG"),
+}
+
+
+def _make_tar(path: Path, mode: str) -> None:
+    """Put a skipped member before and after the image."""
+    with tar_open(path, mode) as tf:  # pyright: ignore[reportCallIssue, reportArgumentType]  # ty: ignore[no-matching-overload]
+        for name in (_TEXT_FN, _PNG_FN, f"z{_TEXT_FN}"):
+            if name == _PNG_FN:
+                tf.add(IMAGES_DIR / _PNG_FN, _PNG_FN)
+                continue
+            info = TarInfo(name)
+            info.size = len(_TEXT)
+            tf.addfile(info, BytesIO(_TEXT))
+
+
+class TestTarStream:
+    """Skipped members are read as the stream passes them."""
+
+    @pytest.mark.parametrize(("fn", "fmt"), list(_FORMATS.items()))
+    def test_walk_streams(
+        self: Any, tmp_path: Path, fn: str, fmt: tuple[str, str]
+    ) -> None:
+        """Every member is read in one pass over a stream."""
+        mode, formats = fmt
+        path = tmp_path / fn
+        _make_tar(path, mode)
+        args = cli.get_arguments(
+            (PROGRAM_NAME, "-x", formats, "--ignore", "*.txt", str(path))
+        )
+        config = PicoptConfig().get_config(args)
+        path_info = PathInfo(top_path=tmp_path, path=path, convert=False)
+        handler = HandlerFactory(config, Reporter()).create_handler(path_info)
+        assert isinstance(handler, Tar)
+        assert handler._read_mode() == "r|*"
+        assert [child.name() for child in handler.walk()] == [_PNG_FN]
+        skipped = handler.get_optimized_contents()
+        assert sorted(member.name() for member in skipped) == [
+            _TEXT_FN,
+            f"z{_TEXT_FN}",
+        ]
+        assert {member.data() for member in skipped} == {_TEXT}
+
+    def test_repack_keeps_skipped(self: Any, tmp_path: Path) -> None:
+        """Members read on the way past survive the repack, in order."""
+        path = tmp_path / "comic.tar.gz"
+        _make_tar(path, "w:gz")
+        cli.main((PROGRAM_NAME, "-x", "TGZ,PNG", "--ignore", "*.txt", str(path)))
+        with TarFile.open(path) as tf:
+            assert tf.getnames() == [_TEXT_FN, _PNG_FN, f"z{_TEXT_FN}"]
+            member = tf.extractfile(f"z{_TEXT_FN}")
+            assert member is not None
+            assert member.read() == _TEXT
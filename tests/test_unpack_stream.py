@@ -0,0 +1,89 @@
+"""Test streaming unpacked members to the scheduler while unpacking."""
+
+import shutil
+from pathlib import Path
+from queue import Queue
+from typing import TYPE_CHECKING, Any
+
+import pytest
+
+from picopt import PROGRAM_NAME, cli
+from picopt.config import PicoptConfig
+from picopt.log.reporter import Reporter
+from picopt.walk import scheduler
+from picopt.walk.handler_factory import HandlerFactory
+from picopt.walk.scheduler import ContainerNode, NodeState, Scheduler, UnpackJob
+from tests import CONTAINER_DIR
+from tests.base import make_handler
+
+if TYPE_CHECKING:
+    from picopt.path import PathInfo
+
+__all__ = ()  # hides module from pydocstring
+
+_FN = "test_zip.zip"
+_EPUB_FN = "igp-twss.epub"
+_ARGS = (PROGRAM_NAME, "-x", "ZIP")
+_STREAM_ID = 7
+
+
+def _unpack_job(path: Path, fmt: str) -> UnpackJob:
+    handler = make_handler(path, fmt)
+    return UnpackJob(
+        handler=handler, factory=HandlerFactory(handler.config, Reporter())
+    )
+
+
+class TestUnpackStream:
+    """Large containers hand members over before the unpack finishes."""
+
+    def test_members_published_in_batches(self: Any, tmp_path: Path) -> None:
+        """Full batches go out on the stream; the rest ride the result."""
+        path = tmp_path / _EPUB_FN
+        shutil.copy(CONTAINER_DIR / _EPUB_FN, path)
+        job = _unpack_job(path, "EPUB")
+        stream: Queue[tuple[int, list[PathInfo]]] = Queue()
+        job.stream, job.stream_id = stream, _STREAM_ID
+        result = job.run()
+        assert result.exc is None
+        assert result.report is None
+        assert len(result.children) < scheduler._STREAM_BATCH_SIZE
+        batches = [stream.get_nowait() for _ in range(stream.qsize())]
+        assert len(batches) > 1
+        assert {stream_id for stream_id, _ in batches} == {_STREAM_ID}
+        # The first batch holds everything read while inlining was possible.
+        sizes = [len(batch) for _, batch in batches]
+        assert sizes[0] > scheduler._INLINE_MAX_MEMBERS
+        assert set(sizes[1:]) == {scheduler._STREAM_BATCH_SIZE}
+
+    def test_no_repack_while_unpacking(self: Any) -> None:
+        """Finishing every streamed member doesn't repack a partial archive."""
+        config = PicoptConfig().get_config(cli.get_arguments((PROGRAM_NAME, ".")))
+        sched = Scheduler(
+            config=config,
+            executor=None,  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+            timestamps=None,
+            reporter=Reporter(),
+            max_workers=1,
+            create_repack_handler=lambda _config, handler: handler,
+            child_enqueue_callback=lambda *_a: None,
+        )
+        node = ContainerNode(handler=None, state=NodeState.UNPACKING)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        sched._maybe_start_repack(node)
+        assert node.state is NodeState.UNPACKING
+        assert not sched._ready
+
+    def test_streamed_matches_inline(
+        self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A streamed unpack writes the same archive as an inline one."""
+        outputs = []
+        for batch_size, inline_max_bytes in ((8, scheduler._INLINE_MAX_BYTES), (1, -1)):
+            monkeypatch.setattr(scheduler, "_STREAM_BATCH_SIZE", batch_size)
+            monkeypatch.setattr(scheduler, "_INLINE_MAX_BYTES", inline_max_bytes)
+            path = tmp_path / str(batch_size) / _FN
+            path.parent.mkdir()
+            shutil.copy(CONTAINER_DIR / _FN, path)
+            cli.main((*_ARGS, str(path)))
+            outputs.append(path.read_bytes())
+        assert outputs[0] == outputs[1]
@@ -78,11 +78,22 @@ class _FakeNodeHandler:
 
     def __init__(self) -> None:
         self._optimized_contents: set[Any] = set()
+        self.config = None
 
     def get_optimized_contents(self) -> set[Any]:
         return self._optimized_contents
 
 
+class _FakeScheduler:
+    """Records detect jobs the walk layer enqueues."""
+
+    def __init__(self) -> None:
+        self.detects: list[tuple[Any, Any]] = []
+
+    def enqueue_detect(self, job: Any, parent: Any = None) -> None:
+        self.detects.append((job, parent))
+
+
 class TestEnqueueChildrenResilience:
     """A member that explodes during detection is one error, not a run-ender."""
 
@@ -110,11 +121,46 @@ class TestEnqueueChildrenResilience:
                 )
                 for _ in range(2)
             ]
+            for child in children:
+                # Predetected in the unpack worker; construction still fails.
+                child.detected = (None, {})
             walk._enqueue_children(None, node, children)  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
             assert handler.get_optimized_contents() == set(children)
         finally:
             walk._executor.shutdown(wait=False)
 
+    def test_undetected_member_detects_in_worker(
+        self: Any, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A member predetection missed is sniffed by a DetectJob, not inline."""
+        walk = Walk(_make_config())
+        try:
+
+            def _bomb(*_args: Any) -> None:
+                msg = "simulated DecompressionBombError"
+                raise ValueError(msg)
+
+            monkeypatch.setattr(walk, "_create_handler", _bomb)
+            scheduler = _FakeScheduler()
+            node = ContainerNode(handler=_FakeNodeHandler())  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+            child = PathInfo(
+                top_path=Path(),
+                path=None,
+                convert=False,
+                is_case_sensitive=True,
+                data=_DATA,
+            )
+            walk._enqueue_children(scheduler, node, [child])  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+            assert [job.path_info for job, _ in scheduler.detects] == [child]
+
+            monkeypatch.setattr(walk._handler_factory, "build_handler", _bomb)
+            job, parent = scheduler.detects[0]
+            result = job.run()
+            assert result.exc is not None
+            assert walk._detect_done(scheduler, parent, result) is None  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        finally:
+            walk._executor.shutdown(wait=False)
+
 
 class TestWalkResilience:
     """Hostile directory trees must not crash or hang the walk."""
@@ -0,0 +1,188 @@
+"""Test splitting animated WebP frames via RIFF chunk parsing."""
+
+from io import BytesIO
+from struct import pack
+
+import pytest
+from PIL import Image
+
+from picopt import cli
+from picopt.config import PicoptConfig
+from picopt.path import PathInfo
+from picopt.pillow.webp_demux import WebPFrame, demux
+from picopt.plugins.webp.animated import WebPMuxAnimatedLossless
+from picopt.walk.detect_format import detect_format
+from tests import IMAGES_DIR
+
+__all__ = ()
+
+ANIMATED_FN = "test_animated_webp.webp"
+LOSSLESS_FN = "test_webp_lossless.webp"
+FIXTURE_DURATION_MS = 200
+LOOP = 3
+
+
+def _chunk(fourcc: bytes, payload: bytes) -> bytes:
+    data = fourcc + pack("<I", len(payload)) + payload
+    if len(payload) % 2:
+        data += b"\x00"
+    return data
+
+
+def _riff(*chunks: bytes) -> bytes:
+    body = b"WEBP" + b"".join(chunks)
+    return b"RIFF" + pack("<I", len(body)) + body
+
+
+def _uint24(value: int) -> bytes:
+    return value.to_bytes(3, "little")
+
+
+def _anmf(
+    width: int, height: int, duration: int, flags: int, x: int, y: int, data: bytes
+) -> bytes:
+    params = (
+        _uint24(x // 2)
+        + _uint24(y // 2)
+        + _uint24(width - 1)
+        + _uint24(height - 1)
+        + _uint24(duration)
+        + bytes((flags,))
+    )
+    return _chunk(b"ANMF", params + data)
+
+
+def _image_chunks(data: bytes) -> bytes:
+    """Strip the RIFF header and any VP8X chunk from a still WebP."""
+    body = data[12:]
+    if body[:4] == b"VP8X":
+        body = body[8 + 10 :]
+    return body
+
+
+class TestWebPDemux:
+    """Every frame must come out as a still WebP with its ANMF parameters."""
+
+    def test_fixture_frames(self) -> None:
+        with (IMAGES_DIR / ANIMATED_FN).open("rb") as f:
+            animation = demux(f)
+            assert f.tell() == 0
+        with Image.open(IMAGES_DIR / ANIMATED_FN) as image:
+            assert len(animation.frames) == image.n_frames
+            assert animation.loop == image.info["loop"]
+        placements = [
+            ((12, 0), (97, 159), False, False),
+            ((2, 0), (107, 127), True, False),
+            ((0, 2), (109, 126), True, True),
+            ((2, 0), (107, 128), False, True),
+        ]
+        for frame, (offset, size, dispose, blend) in zip(
+            animation.frames, placements, strict=True
+        ):
+            assert frame.duration == FIXTURE_DURATION_MS
+            assert (frame.x_offset, frame.y_offset) == offset
+            assert (frame.dispose, frame.blend) == (dispose, blend)
+            with Image.open(BytesIO(frame.data)) as still:
+                still.load()
+                assert still.size == size
+
+    def test_params_and_loop(self) -> None:
+        image_chunks = _image_chunks((IMAGES_DIR / LOSSLESS_FN).read_bytes())
+        with Image.open(IMAGES_DIR / LOSSLESS_FN) as image:
+            width, height = image.size
+        anim = _chunk(b"ANIM", b"\x00" * 4 + pack("<H", LOOP))
+        data = _riff(
+            _chunk(b"VP8X", b"\x02" + b"\x00" * 9),
+            anim,
+            _anmf(width, height, 40, 0x0, 0, 0, image_chunks),
+            _anmf(width, height, 70, 0x3, 4, 6, image_chunks),
+        )
+        animation = demux(BytesIO(data))
+        assert animation.loop == LOOP
+        assert animation.frames[0][1:] == (40, 0, 0, False, True)
+        assert animation.frames[1][1:] == (70, 4, 6, True, False)
+
+    def test_alpha_frame_gets_vp8x(self) -> None:
+        buf = BytesIO()
+        Image.new("RGBA", (9, 7), (255, 0, 0, 128)).save(
+            buf, format="WEBP", lossless=False
+        )
+        image_chunks = _image_chunks(buf.getvalue())
+        assert image_chunks[:4] == b"ALPH"
+        data = _riff(_anmf(9, 7, 100, 0x0, 0, 0, image_chunks))
+        (frame,) = demux(BytesIO(data)).frames
+        assert frame.data[12:16] == b"VP8X"
+        with Image.open(BytesIO(frame.data)) as still:
+            still.load()
+            assert still.size == (9, 7)
+            assert still.mode == "RGBA"
+
+    def test_not_webp(self) -> None:
+        with pytest.raises(ValueError, match="Not a WebP"):
+            demux(BytesIO(b"GIF89a" + b"\x00" * 20))
+
+    def test_riff_size_over_declared(self) -> None:
+        data = bytearray((IMAGES_DIR / ANIMATED_FN).read_bytes())
+        # Cut the file mid chunk header but leave the declared size alone.
+        last_anmf = data.rindex(b"ANMF")
+        with pytest.raises(ValueError, match="Truncated WebP"):
+            demux(BytesIO(bytes(data[: last_anmf + 3])))
+
+    def test_still_has_no_frames(self) -> None:
+        with (IMAGES_DIR / LOSSLESS_FN).open("rb") as f:
+            assert demux(f).frames == ()
+
+
+class TestWebPMuxAnimatedLossless:
+    """Walk writes every demuxed frame; pack args carry their placement."""
+
+    def test_walk_writes_frames(self) -> None:
+        path = IMAGES_DIR / ANIMATED_FN
+        config = PicoptConfig().get_config(cli.get_arguments(("picopt", str(path))))
+        path_info = PathInfo(top_path=path.parent, path=path, convert=False)
+        handler = WebPMuxAnimatedLossless(
+            config,
+            path_info,
+            input_file_format=WebPMuxAnimatedLossless.OUTPUT_FILE_FORMAT,
+            info={"n_frames": 4},
+        )
+        try:
+            children = list(handler.walk())
+            assert [child.frame for child in children] == [1, 2, 3, 4]
+            for child in children:
+                assert child.path is not None
+                with Image.open(child.path) as still:
+                    still.load()
+                assert child.detected == detect_format(
+                    PathInfo(top_path=path.parent, path=child.path, convert=False),
+                    keep_metadata=config.keep_metadata,
+                )
+            assert handler._do_repack
+            args = handler.webpmux_pack_args()
+            assert args[2] == "+200+12+0+0-b"
+            assert args[-4:] == ("-loop", "0", "-o", "-")
+        finally:
+            handler._cleanup_tmp_dir()
+
+    def test_frame_options(self) -> None:
+        handler = WebPMuxAnimatedLossless.__new__(WebPMuxAnimatedLossless)
+        handler._working_tmp_dir = IMAGES_DIR
+        handler._frame_index_width = 1
+        handler._frames = {
+            1: WebPFrame(b"", 40, 0, 0, dispose=False, blend=True),
+            2: WebPFrame(b"", 70, 4, 6, dispose=True, blend=False),
+        }
+        handler._loop = 2
+        args = handler.webpmux_pack_args()
+        assert args == (
+            "-frame",
+            str(IMAGES_DIR / "frame_1.webp"),
+            "+40+0+0+0+b",
+            "-frame",
+            str(IMAGES_DIR / "frame_2.webp"),
+            "+70+4+6+1-b",
+            "-loop",
+            "2",
+            "-o",
+            "-",
+        )
@@ -0,0 +1,90 @@
+"""Test deflating zip members concurrently on repack."""
+
+from io import BytesIO
+from pathlib import Path
+from tarfile import TarFile, TarInfo
+from typing import Any
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import pytest
+
+from picopt import PROGRAM_NAME, cli
+from picopt.config import PicoptConfig
+from picopt.log.reporter import Reporter
+from picopt.plugins.base import ArchiveHandler, ContainerHandler
+from picopt.plugins.zip import Zip
+from picopt.walk import scheduler
+from picopt.walk.scheduler import Scheduler
+
+__all__ = ()  # hides module from pydocstring
+
+_TAR_FN = "docs.tar"
+_ZIP_FN = "docs.zip"
+_WORKERS = 16
+_MEMBERS = {
+    f"chapter{num:02}.txt": f"chapter {num} ".encode() * 4096 for num in range(12)
+}
+
+
+def _convert(root: Path) -> bytes:
+    """Convert a tar of text files to zip, so every member is deflated."""
+    root.mkdir()
+    with TarFile(root / _TAR_FN, "w") as tf:
+        for name, data in _MEMBERS.items():
+            info = TarInfo(name)
+            info.size, info.mtime = len(data), 946684800
+            tf.addfile(info, BytesIO(data))
+    cli.main(
+        (PROGRAM_NAME, "-x", "TAR,ZIP", "-c", "ZIP", "-j", "4", str(root / _TAR_FN))
+    )
+    return (root / _ZIP_FN).read_bytes()
+
+
+class TestZipDeflate:
+    """Concurrent deflate writes what serial writestr() does."""
+
+    def test_parallel_matches_serial(
+        self: Any, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Members come out identical and in order."""
+        # Repack in its own job, not inline in the unpack worker.
+        monkeypatch.setattr(scheduler, "_INLINE_MAX_BYTES", -1)
+        granted: list[int] = []
+        set_threads = ContainerHandler.set_threads
+
+        def _spy(self: ContainerHandler, *, threads: int) -> None:
+            granted.append(threads)
+            set_threads(self, threads=threads)
+
+        monkeypatch.setattr(ContainerHandler, "set_threads", _spy)
+        parallel = _convert(tmp_path / "parallel")
+        assert max(granted) > 1
+        monkeypatch.setattr(Zip, "_archive_write", ArchiveHandler._archive_write)
+        serial = _convert(tmp_path / "serial")
+        assert parallel == serial
+        with ZipFile(BytesIO(parallel)) as zf:
+            assert zf.testzip() is None
+            assert zf.namelist() == list(_MEMBERS)
+            assert {info.compress_type for info in zf.infolist()} == {ZIP_DEFLATED}
+
+    @pytest.mark.parametrize(
+        ("busy", "packs", "threads"),
+        [(0, 0, 16), (0, 1, 8), (8, 0, 8), (4, 3, 3), (15, 0, 1), (32, 0, 1)],
+    )
+    def test_threads_share_idle_workers(
+        self: Any, busy: int, packs: int, threads: int
+    ) -> None:
+        """Packs split the cores of the workers nothing else is using."""
+        config = PicoptConfig().get_config(cli.get_arguments((PROGRAM_NAME, ".")))
+        sched = Scheduler(
+            config=config,
+            executor=None,  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+            timestamps=None,
+            reporter=Reporter(),
+            max_workers=_WORKERS,
+            create_repack_handler=lambda _config, handler: handler,
+            child_enqueue_callback=lambda *_a: None,
+        )
+        sched._inflight_leaf.update({object(): None for _ in range(busy)})  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        sched._inflight_repack.update({object(): None for _ in range(packs)})  # pyright: ignore[reportArgumentType]  # ty: ignore[invalid-argument-type]
+        assert sched._pack_threads() == threads
@@ -0,0 +1,81 @@
+"""Test copying unchanged zip members without recompressing them."""
+
+from io import BytesIO
+from pathlib import Path
+from random import Random
+from typing import Any
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import pytest
+
+from picopt import PROGRAM_NAME, cli
+from picopt.config import PicoptConfig
+from picopt.log.reporter import Reporter
+from picopt.path import PathInfo
+from picopt.plugins.base import ContainerHandler
+from picopt.plugins.zip import _copy_payload
+from picopt.walk.handler_factory import HandlerFactory
+from tests import IMAGES_DIR
+
+__all__ = ()  # hides module from pydocstring
+
+_FN = "comic.cbz"
+_PNG_FN = "test_png.png"
+_TEXT_FN = "notes.txt"
+_ARGS = (PROGRAM_NAME, "-x", "CBZ,PNG")
+# Words in a random order deflate differently at different levels.
+_WORDS = ("panel", "page", "balloon", "gutter", "ink")
+_RANDOM = Random(0)  # noqa: S311
+_TEXT = " ".join(_RANDOM.choice(_WORDS) for _ in range(4096)).encode()
+
+
+def _payloads(path: Path) -> dict[str, bytes]:
+    """Map member names to their compressed bytes."""
+    payloads = {}
+    with ZipFile(path) as zf, path.open("rb") as fp:
+        for info in zf.infolist():
+            payload = BytesIO()
+            _copy_payload(fp, info, payload)
+            payloads[info.filename] = payload.getvalue()
+    return payloads
+
+
+@pytest.fixture
+def comic(tmp_path: Path) -> Path:
+    """Build a comic whose text member was deflated at a low level."""
+    path = tmp_path / _FN
+    with ZipFile(path, "w", compression=ZIP_DEFLATED, compresslevel=1) as zf:
+        zf.writestr(_TEXT_FN, _TEXT)
+        zf.write(IMAGES_DIR / _PNG_FN, _PNG_FN)
+    return path
+
+
+class TestZipRawCopy:
+    """Only replaced members are recompressed on repack."""
+
+    def test_unchanged_members_copied_verbatim(self: Any, comic: Path) -> None:
+        """The unchanged member keeps its exact compressed bytes."""
+        before = _payloads(comic)
+        cli.main((*_ARGS, str(comic)))
+        after = _payloads(comic)
+        assert after[_TEXT_FN] == before[_TEXT_FN]
+        assert after[_PNG_FN] != before[_PNG_FN]
+        with ZipFile(comic) as zf:
+            assert zf.testzip() is None
+            assert zf.read(_TEXT_FN) == _TEXT
+
+    def test_skipped_members_left_in_source(
+        self: Any, tmp_path: Path, comic: Path
+    ) -> None:
+        """Skipped members aren't decompressed during the walk."""
+        args = cli.get_arguments((*_ARGS, "--ignore", "*.txt", str(comic)))
+        config = PicoptConfig().get_config(args)
+        path_info = PathInfo(top_path=tmp_path, path=comic, convert=False)
+        handler = HandlerFactory(config, Reporter()).create_handler(path_info)
+        assert isinstance(handler, ContainerHandler)
+        assert [child.name() for child in handler.walk()] == [_PNG_FN]
+        (skipped,) = handler.get_optimized_contents()
+        assert skipped.is_in_source()
+        assert skipped.bytes_in() == len(_TEXT)
+        with pytest.raises(ValueError, match="unread"):
+            skipped.data()